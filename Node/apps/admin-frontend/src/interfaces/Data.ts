@@ -1,5 +1,16 @@
+export interface DiffCounts {
+    inserted: number;
+    changed: number;
+    removed: number;
+    unchanged: number;
+}
+
 export interface UpdateResponse {
     routesCount: string;
     routesInsertedCount: string;
+    changes: {
+        routes: DiffCounts;
+        dropp: DiffCounts;
+    };
     warnings: any[];
 }
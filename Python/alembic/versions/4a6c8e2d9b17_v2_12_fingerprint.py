@@ -0,0 +1,91 @@
+"""v2.12-fingerprint
+
+Revision ID: 4a6c8e2d9b17
+Revises: 7d3e9b1f0a42
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+import datetime
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '4a6c8e2d9b17'
+down_revision: Union[str, Sequence[str], None] = '7d3e9b1f0a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Unique constraints of tables, like `uid` of their models
+UIDS = {
+    'routes': (
+        'company_id',
+        'start_point_id',
+        'end_point_id',
+        'dropp_off_point_id',
+        'effective_from',
+        'effective_to',
+        'container_shipment_terms',
+        'container_transfer_terms',
+        'container_owner',
+        'is_through',
+    ),
+    'drop': (
+        'start_point_id',
+        'end_point_id',
+        'container_id',
+        'company_id',
+        'effective_from',
+        'effective_to',
+    ),
+}
+BATCH_SIZE = 1000
+
+
+def _fingerprint_part(value) -> str:
+    # Like `module_data_internal.schemas.fingerprint`, for values read from the database
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return str(int(value))
+    return str(value)
+
+
+def _fingerprint(values) -> str:
+    return hashlib.sha1('|'.join(map(_fingerprint_part, values)).encode()).hexdigest()
+
+
+def upgrade() -> None:
+    """Add indexed fingerprints of unique constraints to routes and drop, filled for existing rows."""
+    conn = op.get_bind()
+
+    for table_name, uid in UIDS.items():
+        op.add_column(table_name, sa.Column('fingerprint', sa.String(length=40), nullable=True))
+
+        table = sa.Table(table_name, sa.MetaData(), autoload_with=conn)
+        update = (
+            table.update()
+            .where(table.c.id == sa.bindparam('_id'))
+            .values(fingerprint=sa.bindparam('_fingerprint'))
+        )
+        rows = conn.execute(sa.select(table.c.id, *(table.c[column] for column in uid))).fetchall()
+        for i in range(0, len(rows), BATCH_SIZE):
+            conn.execute(update, [
+                {'_id': row[0], '_fingerprint': _fingerprint(row[1:])}
+                for row in rows[i:i + BATCH_SIZE]
+            ])
+
+        op.create_index(f'ix_{table_name}_fingerprint', table_name, ['fingerprint'])
+
+
+def downgrade() -> None:
+    """Remove fingerprints from routes and drop."""
+    for table_name in reversed(UIDS):
+        op.drop_index(f'ix_{table_name}_fingerprint', table_name=table_name)
+        op.drop_column(table_name, 'fingerprint')
@@ -0,0 +1,33 @@
+"""v2.11-content-hash
+
+Revision ID: 7d3e9b1f0a42
+Revises: 63b7b144c602
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3e9b1f0a42'
+down_revision: Union[str, Sequence[str], None] = '63b7b144c602'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add content hashes of sheet rows to routes and drop."""
+    op.add_column('routes', sa.Column('content_hash', sa.String(length=40), nullable=True))
+    op.create_index('ix_routes_content_hash', 'routes', ['content_hash'])
+    op.add_column('drop', sa.Column('content_hash', sa.String(length=40), nullable=True))
+    op.create_index('ix_drop_content_hash', 'drop', ['content_hash'])
+
+
+def downgrade() -> None:
+    """Remove content hashes of sheet rows from routes and drop."""
+    op.drop_index('ix_drop_content_hash', table_name='drop')
+    op.drop_column('drop', 'content_hash')
+    op.drop_index('ix_routes_content_hash', table_name='routes')
+    op.drop_column('routes', 'content_hash')
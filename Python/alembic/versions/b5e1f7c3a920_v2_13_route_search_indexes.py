@@ -0,0 +1,35 @@
+"""v2.13-route-search-indexes
+
+Revision ID: b5e1f7c3a920
+Revises: 4a6c8e2d9b17
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e1f7c3a920'
+down_revision: Union[str, Sequence[str], None] = '4a6c8e2d9b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add indexes of route search: routes by start and end points valid on a date, service prices by routes."""
+    op.create_index(
+        'ix_routes__type_start_point',
+        'routes',
+        ['type', 'start_point_id', 'end_point_id', 'effective_to', 'effective_from'],
+    )
+    op.create_index('ix_routes__type_end_point', 'routes', ['type', 'end_point_id', 'effective_to', 'effective_from'])
+    op.create_index('ix_service_prices__route', 'service_prices', ['route_id', 'container_id'])
+
+
+def downgrade() -> None:
+    """Remove indexes of route search."""
+    op.drop_index('ix_service_prices__route', table_name='service_prices')
+    op.drop_index('ix_routes__type_end_point', table_name='routes')
+    op.drop_index('ix_routes__type_start_point', table_name='routes')
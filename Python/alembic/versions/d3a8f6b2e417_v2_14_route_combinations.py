@@ -0,0 +1,125 @@
+"""v2.14-route-combinations
+
+Revision ID: d3a8f6b2e417
+Revises: b5e1f7c3a920
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8f6b2e417'
+down_revision: Union[str, Sequence[str], None] = 'b5e1f7c3a920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _combinations(conn):
+    # Like `module_data_internal.route_combinations`, for existing routes and drops
+    metadata = sa.MetaData()
+    routes = sa.Table('routes', metadata, autoload_with=conn)
+    prices = sa.Table('prices', metadata, autoload_with=conn)
+    drop = sa.Table('drop', metadata, autoload_with=conn)
+    sea, rail = routes.alias('sea_route'), routes.alias('rail_route')
+
+    drop_join_clause = sa.and_(
+        sea.c.dropp_off_point_id.is_(None),
+        rail.c.start_point_id == drop.c.start_point_id,
+        rail.c.end_point_id == drop.c.end_point_id,
+        sea.c.company_id == drop.c.company_id,
+        sa.exists().where(prices.c.route_id == rail.c.id, prices.c.container_id == drop.c.container_id),
+        drop.c.effective_from <= sea.c.effective_to,
+        drop.c.effective_from <= rail.c.effective_to,
+        drop.c.effective_to >= sea.c.effective_from,
+        drop.c.effective_to >= rail.c.effective_from,
+    )
+    rows = conn.execute(
+        sa.select(
+            sea.c.id, rail.c.id, drop.c.id, drop.c.container_id, sea.c.start_point_id, rail.c.end_point_id,
+            sea.c.effective_from, rail.c.effective_from, drop.c.effective_from,
+            sea.c.effective_to, rail.c.effective_to, drop.c.effective_to,
+        )
+        .select_from(sea)
+        .join(rail, sa.and_(
+            sea.c.end_point_id == rail.c.start_point_id,
+            sa.or_(sea.c.dropp_off_point_id.is_(None), sea.c.dropp_off_point_id == rail.c.end_point_id),
+            sea.c.effective_from <= rail.c.effective_to,
+            sea.c.effective_to >= rail.c.effective_from,
+        ))
+        .outerjoin(drop, drop_join_clause)
+        .where(
+            sea.c.type == 'SEA',
+            rail.c.type == 'RAIL',
+            sa.or_(
+                rail.c.container_owner == 'SOC',
+                sa.and_(sea.c.company_id == rail.c.company_id, rail.c.container_owner == 'COC'),
+            ),
+            sa.or_(
+                sa.and_(sa.not_(rail.c.is_through), sa.not_(sea.c.is_through)),
+                sea.c.company_id == rail.c.company_id,
+            ),
+            sa.or_(sea.c.dropp_off_point_id.isnot(None), drop.c.id.isnot(None)),
+        )
+    ).fetchall()
+
+    for sea_id, rail_id, drop_id, container_id, start_point_id, end_point_id, *dates in rows:
+        effective_from, effective_to = dates[:3], dates[3:]
+        if drop_id is None:
+            effective_from, effective_to = effective_from[:2], effective_to[:2]
+        yield {
+            'sea_route_id': sea_id,
+            'rail_route_id': rail_id,
+            'drop_id': drop_id,
+            'container_id': container_id,
+            'start_point_id': start_point_id,
+            'end_point_id': end_point_id,
+            'effective_from': max(effective_from),
+            'effective_to': min(effective_to),
+        }
+
+
+def upgrade() -> None:
+    """Add precomputed combinations of sea and rail routes with their drops, filled for existing routes."""
+    combinations = op.create_table(
+        'route_combinations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sea_route_id', sa.Integer(), nullable=False),
+        sa.Column('rail_route_id', sa.Integer(), nullable=False),
+        sa.Column('drop_id', sa.Integer(), nullable=True),
+        sa.Column('container_id', sa.Integer(), nullable=True),
+        sa.Column('start_point_id', sa.Integer(), nullable=False),
+        sa.Column('end_point_id', sa.Integer(), nullable=False),
+        sa.Column('effective_from', sa.DateTime(timezone=False), nullable=False),
+        sa.Column('effective_to', sa.DateTime(timezone=False), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['sea_route_id'], ['routes.id'], name='fk__route_combination_route__sea', ondelete='CASCADE',
+        ),
+        sa.ForeignKeyConstraint(
+            ['rail_route_id'], ['routes.id'], name='fk__route_combination_route__rail', ondelete='CASCADE',
+        ),
+        sa.ForeignKeyConstraint(['drop_id'], ['drop.id'], name='fk__route_combination_drop', ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_route_combinations_sea_route_id', 'route_combinations', ['sea_route_id'])
+    op.create_index('ix_route_combinations_rail_route_id', 'route_combinations', ['rail_route_id'])
+    op.create_index('ix_route_combinations_drop_id', 'route_combinations', ['drop_id'])
+    op.create_index(
+        'ix_route_combinations__points',
+        'route_combinations',
+        ['start_point_id', 'end_point_id', 'effective_to', 'effective_from'],
+    )
+
+    conn = op.get_bind()
+    rows = list(_combinations(conn))
+    for i in range(0, len(rows), BATCH_SIZE):
+        conn.execute(combinations.insert(), rows[i:i + BATCH_SIZE])
+
+
+def downgrade() -> None:
+    """Remove combinations of sea and rail routes."""
+    op.drop_table('route_combinations')
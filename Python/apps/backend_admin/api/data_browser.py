@@ -1,7 +1,9 @@
+from collections.abc import Awaitable, Callable
 from typing import Annotated
 
-from fastapi import APIRouter, BackgroundTasks, Query
+from fastapi import APIRouter, BackgroundTasks, Query, Request, Response
 from fastapi.params import Depends
+from fastapi.routing import APIRoute
 
 from backend_admin.dependencies.auth import request_auth
 from backend_admin.schemas.data_browser import (
@@ -37,10 +39,47 @@ from backend_admin.service.crud_route_segments import crud_route_segments
 from backend_admin.service.crud_services import crud_services
 from backend_admin.service.crud_settings import crud_settings
 from module_shared.cache_settings import delete_settings_cache, set_settings_cache
+from module_shared.data_version import (
+    CONTAINERS_DATA_VERSION,
+    ROUTES_DATA_VERSION,
+    bump_data_version,
+)
 from module_shared.database import Database, get_database
 from module_shared.models.setting import SettingItem
 
-router = APIRouter(prefix="/db", tags=["data-browser"])
+# Versions of data cached by the user API which write endpoints change, by prefixes of their paths;
+# endpoints of other paths change routes data
+_DATA_VERSIONS = {
+    "/db/containers": (ROUTES_DATA_VERSION, CONTAINERS_DATA_VERSION),
+    # settings have a cache of their own
+    "/db/settings": (),
+}
+
+
+class _DataVersionRoute(APIRoute):
+    """Write endpoints bump versions of the data they change after a successful response"""
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        handler = super().get_route_handler()
+        if not self.methods - {"GET", "HEAD"}:
+            return handler
+
+        versions = next(
+            (versions for prefix, versions in _DATA_VERSIONS.items() if self.path.startswith(prefix)),
+            (ROUTES_DATA_VERSION,),
+        )
+
+        async def handle_and_bump(request: Request) -> Response:
+            response = await handler(request)
+            if response.status_code < 400:
+                for version in versions:
+                    await bump_data_version(version)
+            return response
+
+        return handle_and_bump
+
+
+router = APIRouter(prefix="/db", tags=["data-browser"], route_class=_DataVersionRoute)
 
 
 # ─── Companies ────────────────────────────────────────────────────────────────
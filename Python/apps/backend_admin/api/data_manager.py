@@ -10,6 +10,11 @@ from backend_admin.dependencies.auth import request_auth
 from backend_admin.service.db_management.db_dumper import create_db_dump
 from backend_admin.service.db_management.db_eraser import clear_database_data
 from backend_admin.service.db_management.db_loader import load_db_dump
+from module_shared.data_version import (
+    CONTAINERS_DATA_VERSION,
+    ROUTES_DATA_VERSION,
+    bump_data_version,
+)
 from module_shared.database import Database, get_database
 from module_shared.responses import DetailErrorResponse, ErrorDescriptor, MultiErrorResponse
 from module_shared.responses_fabric import (
@@ -68,6 +73,8 @@ async def erase_all_data(
                 status_code=HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=create_an_error_descriptor_from_an_exception(e),
             ) from e
+    await bump_data_version(ROUTES_DATA_VERSION)
+    await bump_data_version(CONTAINERS_DATA_VERSION)
 
 
 @router.post("/data", status_code=204, responses={
@@ -83,6 +90,8 @@ async def load_dump(
 ):
     async with db.session_context() as session:
         errors = await load_db_dump(session, dump_file.decode())
+    await bump_data_version(ROUTES_DATA_VERSION)
+    await bump_data_version(CONTAINERS_DATA_VERSION)
 
     if errors:
         raise HTTPException(
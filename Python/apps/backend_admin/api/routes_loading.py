@@ -1,16 +1,21 @@
-from io import BytesIO
-from typing import Annotated
+import asyncio
+import os
+from collections.abc import AsyncGenerator
+from dataclasses import asdict
+from typing import Annotated, BinaryIO
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response, UploadFile
 from fastapi.params import Depends, File
+from fastapi.sse import EventSourceResponse, ServerSentEvent
 from starlette.status import (
     HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
+    HTTP_409_CONFLICT,
     HTTP_500_INTERNAL_SERVER_ERROR,
     HTTP_503_SERVICE_UNAVAILABLE,
 )
 
 import gspread
-import pandas
 from backend_admin.config import get_settings
 from backend_admin.dependencies.auth import request_auth
 from backend_admin.models.upoader_fields_config import UploaderFieldsConfig
@@ -22,9 +27,21 @@ from backend_admin.service.routes_loading.errors import (
     PointNotFoundException,
     PointsWithNanException,
 )
+from backend_admin.service.routes_loading.gsheets import download_worksheets, get_revision
+from backend_admin.service.routes_loading.jobs import (
+    UploadIsRunning,
+    UploadJob,
+    create_upload_job,
+    get_upload_job,
+    save_upload_file,
+    upload_lock,
+)
 from backend_admin.service.routes_loading.processor import load_data
-from gspread_dataframe import get_as_dataframe
+from backend_admin.service.routes_loading.sheets_cache import get_sheets_cache, sheets_cache_key
+from backend_admin.service.routes_loading.stages import StageTimer
+from backend_admin.service.routes_loading.xlsx import read_workbook
 from module_data_internal.schemas import RouteType
+from module_shared.data_version import ROUTES_DATA_VERSION, bump_data_version
 from module_shared.database import get_database
 from module_shared.resources import Resources
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -33,6 +50,13 @@ router = APIRouter(prefix="/data")
 settings = get_settings()
 
 
+def open_gsheets(gsheets_url: str):
+    gs = gspread.service_account(
+        filename=Resources.get(settings.GOOGLE_SERVICE_ACCOUNT_RESOURCE_NAME, scope="backend_admin").path,
+    )
+    return gs.open_by_url(gsheets_url)
+
+
 def get_fields_config_from_file():
     return UploaderFieldsConfig(
         **Resources.get(settings.DEFAULT_UPLOADER_FIELDS_CONFIG_RESOURCE_NAME, scope="backend_admin").read_json(),
@@ -51,7 +75,9 @@ async def update_from_gsheets(
     points_ws_name: str | None = settings.DEFAULT_POINTS_WS,
     services_ws_name: str | None = settings.DEFAULT_SERVICES_WS,
     load_on_warnings: bool = True,
-    data_file: Annotated[bytes | None, File()] = None,
+    diff: bool = False,
+    validate_only: bool = False,
+    data_file: Annotated[UploadFile | None, File()] = None,
 ):
     return await update_from_gsheets_with_custom_fields(
         db_session,
@@ -63,12 +89,14 @@ async def update_from_gsheets(
         points_ws_name,
         services_ws_name,
         load_on_warnings,
+        diff,
+        validate_only,
         data_file,
     )
 
 
 @router.post("/update-from-gsheets-with-custom-fields")
-async def update_from_gsheets_with_custom_fields(  # noqa: C901  # TODO: split it by worksheets
+async def update_from_gsheets_with_custom_fields(
     db_session: Annotated[AsyncSession, Depends(get_database().session)],
     fields_config: UploaderFieldsConfig,
     gsheets_url: str = settings.DEFAULT_GSHEETS_URL,
@@ -78,35 +106,65 @@ async def update_from_gsheets_with_custom_fields(  # noqa: C901  # TODO: split i
     points_ws_name: str | None = settings.DEFAULT_POINTS_WS,
     services_ws_name: str | None = settings.DEFAULT_SERVICES_WS,
     load_on_warnings: bool = True,
-    data_file: Annotated[bytes | None, File()] = None,
+    diff: bool = False,
+    validate_only: bool = False,
+    data_file: Annotated[UploadFile | None, File()] = None,
 ):
-    if data_file:
-        def download_data(ws):
-            return pandas.read_excel(BytesIO(data_file), ws)
-    else:
-        try:
-            gs = gspread.service_account(
-                filename=Resources.get(settings.GOOGLE_SERVICE_ACCOUNT_RESOURCE_NAME, scope="backend_admin").path,
-            )
-            sources_gs = gs.open_by_url(gsheets_url)
-        except Exception as e:
-            raise HTTPException(status_code=HTTP_503_SERVICE_UNAVAILABLE, detail={
-                "type": type(e).__name__,
-                "detail": str(e),
-            }) from e
-
-        def download_data(ws):
-            return get_as_dataframe(
-                sources_gs.worksheet(ws),
-                evaluate_formulas=True,
+    try:
+        async with upload_lock(blocking=False):
+            return await upload(
+                db_session,
+                fields_config,
+                gsheets_url,
+                sea_routes_ws_name,
+                rail_routes_ws_name,
+                dropp_routes_ws_name,
+                points_ws_name,
+                services_ws_name,
+                load_on_warnings,
+                diff,
+                data_file.file if data_file else None,
+                validate_only=validate_only,
             )
+    except UploadIsRunning as e:
+        raise HTTPException(status_code=HTTP_409_CONFLICT, detail="Another upload is running") from e
+
+
+async def upload(  # noqa: C901  # TODO: split it by worksheets
+    db_session: AsyncSession,
+    fields_config: UploaderFieldsConfig,
+    gsheets_url: str,
+    sea_routes_ws_name: str,
+    rail_routes_ws_name: str,
+    dropp_routes_ws_name: str,
+    points_ws_name: str | None,
+    services_ws_name: str | None,
+    load_on_warnings: bool,
+    diff: bool,
+    data_file: str | BinaryIO | None,
+    stages: StageTimer | None = None,
+    validate_only: bool = False,
+):
+    """Loads the sheets into the DB; with `validate_only` nothing is written and only the warnings are reported"""
+    stages = stages or StageTimer()
+
+    titles = [sea_routes_ws_name, rail_routes_ws_name, dropp_routes_ws_name, services_ws_name]
+    if points_ws_name:
+        titles.append(points_ws_name)
 
+    clean_cache_key = None
     try:
-        sea_routes_df = download_data(sea_routes_ws_name)
-        rail_routes_df = download_data(rail_routes_ws_name)
-        dropp_routes_df = download_data(dropp_routes_ws_name)
-        services_df = download_data(services_ws_name)
-        points_df = download_data(points_ws_name) if points_ws_name else None
+        async with stages.stage("download"):
+            if data_file:
+                frames = await asyncio.to_thread(read_workbook, data_file, titles)
+            else:
+                sources_gs = await asyncio.to_thread(open_gsheets, gsheets_url)
+                revision = await asyncio.to_thread(get_revision, sources_gs)
+                frames = await download_worksheets(sources_gs, titles, revision, get_sheets_cache())
+                if revision is not None:
+                    clean_cache_key = sheets_cache_key(
+                        "clean", sources_gs.id, revision, *titles, fields_config.model_dump_json(),
+                    )
 
     except Exception as e:
         raise HTTPException(status_code=HTTP_503_SERVICE_UNAVAILABLE, detail={
@@ -114,9 +172,15 @@ async def update_from_gsheets_with_custom_fields(  # noqa: C901  # TODO: split i
             "detail": str(e),
         }) from e
 
+    sea_routes_df = frames[sea_routes_ws_name]
+    rail_routes_df = frames[rail_routes_ws_name]
+    dropp_routes_df = frames[dropp_routes_ws_name]
+    services_df = frames[services_ws_name]
+    points_df = frames[points_ws_name] if points_ws_name else None
+
     routes_count = len(sea_routes_df) + len(rail_routes_df)
     try:
-        res, res_metadata, warnings = await load_data(
+        res, res_metadata, warnings, changes = await load_data(
             db_session,
             sea_routes_df,
             rail_routes_df,
@@ -125,6 +189,10 @@ async def update_from_gsheets_with_custom_fields(  # noqa: C901  # TODO: split i
             points_df,
             fields_config,
             load_on_warnings,
+            diff,
+            stages,
+            clean_cache_key,
+            validate_only,
         )
 
     except PointsWithNanException as e:
@@ -139,6 +207,16 @@ async def update_from_gsheets_with_custom_fields(  # noqa: C901  # TODO: split i
             "detail": str(e),
         }) from e
 
+    if validate_only:
+        return {
+            "routesCount": str(routes_count),
+            "routesValidCount": str(res_metadata),
+            "warnings": parse_all_warning_types(warnings, fields_config),
+        }
+
+    # points, companies and services are committed even if routes are not loaded
+    await bump_data_version(ROUTES_DATA_VERSION)
+
     if not res:
         raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail={
             "error": "Несколько ошибок во время загрузки данных из листов"
@@ -152,10 +230,107 @@ async def update_from_gsheets_with_custom_fields(  # noqa: C901  # TODO: split i
     return {
         "routesCount": str(routes_count),
         "routesInsertedCount": str(res_metadata),
+        "changes": {name: asdict(counts) for name, counts in changes.items()},
         "warnings": parsed_warnings,
     }
 
 
+UPLOAD_JOB_EVENTS_POLL_INTERVAL = 0.5
+
+
+async def process_upload_job(job: UploadJob, stages: StageTimer):
+    params = dict(job.params)
+    fields_config = UploaderFieldsConfig.model_validate(params.pop("fields_config"))
+    data_file_path = params.pop("data_file_path")
+
+    try:
+        async with get_database().session_context() as db_session:
+            return await upload(db_session, fields_config, data_file=data_file_path, stages=stages, **params)
+    finally:
+        if data_file_path:
+            os.remove(data_file_path)
+
+
+@router.post("/upload-jobs")
+async def create_upload_job_from_gsheets(
+    _: Annotated[None, Depends(request_auth)],
+    fields_config: Annotated[UploaderFieldsConfig, Depends(get_fields_config_from_file)],
+    gsheets_url: str = settings.DEFAULT_GSHEETS_URL,
+    sea_routes_ws_name: str = settings.DEFAULT_SEA_ROUTES_WS,
+    rail_routes_ws_name: str = settings.DEFAULT_RAIL_ROUTES_WS,
+    dropp_routes_ws_name: str = settings.DEFAULT_DROPP_ROUTES_WS,
+    points_ws_name: str | None = settings.DEFAULT_POINTS_WS,
+    services_ws_name: str | None = settings.DEFAULT_SERVICES_WS,
+    load_on_warnings: bool = True,
+    diff: bool = False,
+    validate_only: bool = False,
+    data_file: Annotated[UploadFile | None, File()] = None,
+):
+    """Queues an upload like `/update-from-gsheets`; its progress is polled or streamed by the returned job id"""
+    data_file_path = await asyncio.to_thread(save_upload_file, data_file.file) if data_file else None
+    try:
+        job = await create_upload_job({
+            "fields_config": fields_config.model_dump(mode="json"),
+            "gsheets_url": gsheets_url,
+            "sea_routes_ws_name": sea_routes_ws_name,
+            "rail_routes_ws_name": rail_routes_ws_name,
+            "dropp_routes_ws_name": dropp_routes_ws_name,
+            "points_ws_name": points_ws_name,
+            "services_ws_name": services_ws_name,
+            "load_on_warnings": load_on_warnings,
+            "diff": diff,
+            "validate_only": validate_only,
+            "data_file_path": data_file_path,
+        })
+    except Exception:
+        if data_file_path:
+            os.remove(data_file_path)
+        raise
+    return {"jobId": job.id, "status": job.status}
+
+
+def _job_response(job: UploadJob) -> dict:
+    return job.model_dump(mode="json", exclude={"params"})
+
+
+@router.get("/upload-jobs/{job_id}")
+async def get_upload_job_status(_: Annotated[None, Depends(request_auth)], job_id: str):
+    job = await get_upload_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Upload job not found")
+    return _job_response(job)
+
+
+@router.get("/upload-jobs/{job_id}/events", response_class=EventSourceResponse)
+async def stream_upload_job_status(
+    _: Annotated[None, Depends(request_auth)],
+    job_id: str,
+    response: Response = None,
+) -> AsyncGenerator[ServerSentEvent]:
+    """Streams `status` events with the job every time it changes, until the job is finished"""
+    if response is not None:
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"
+
+    last_state = None
+    event_id = 0
+    while True:
+        job = await get_upload_job(job_id)
+        if job is None:
+            yield ServerSentEvent(data={"detail": "Upload job not found"}, event="error", id=str(event_id))
+            return
+
+        state = _job_response(job)
+        if state != last_state:
+            yield ServerSentEvent(data=state, event="status", id=str(event_id))
+            event_id += 1
+            last_state = state
+
+        if job.is_finished:
+            return
+        await asyncio.sleep(UPLOAD_JOB_EVENTS_POLL_INTERVAL)
+
+
 def parse_all_warning_types(warnings, fc):
     return list({
         parse_error(err[0], err[1], err[2])
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from functools import cache
 
 from pydantic_settings import BaseSettings
@@ -20,3 +22,9 @@ class Settings(BaseSettings):
 
     GOOGLE_SERVICE_ACCOUNT_RESOURCE_NAME: str = "google_service_account.json"
     DEFAULT_UPLOADER_FIELDS_CONFIG_RESOURCE_NAME: str = "uploader_fields_config.json"
+
+    # Worksheets parsed from Google Sheets by revisions of spreadsheets
+    SHEETS_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), "backend_admin_sheets")
+
+    # Worker processes cleaning sheets and building rows of uploads; 0 runs them in threads
+    LOADING_PROCESSES: int = 2
@@ -1,4 +1,5 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from importlib.util import find_spec
 
 from fastapi import FastAPI
@@ -34,7 +35,19 @@ openapi_url = "/openapi.json" if shared_settings.ENVIRONMENT != "prod" else None
 async def lifespan(_: FastAPI):
     await get_database().init()
     await get_redis_client().init()
+
+    # API modules read settings on import, so they are imported after .env is loaded
+    from .api.routes_loading import process_upload_job
+    from .service.routes_loading.jobs import run_upload_worker
+    from .service.routes_loading.pool import get_loading_pool
+
+    get_loading_pool().init(get_settings().LOADING_PROCESSES)
+    upload_worker = asyncio.create_task(run_upload_worker(process_upload_job))
     yield
+    upload_worker.cancel()
+    with suppress(asyncio.CancelledError):
+        await upload_worker
+    get_loading_pool().close()
     await get_database().close()
     await get_redis_client().close()
 
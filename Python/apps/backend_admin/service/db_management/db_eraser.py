@@ -1,7 +1,17 @@
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-TABLES = {"drop", "service_prices", "prices", "routes", "companies", "containers", "points", "services"}
+TABLES = {
+    "route_combinations",
+    "drop",
+    "service_prices",
+    "prices",
+    "routes",
+    "companies",
+    "containers",
+    "points",
+    "services",
+}
 
 
 async def clear_database_data(session: AsyncSession):
@@ -1,4 +1,5 @@
 import sqlparse
+from module_data_internal.route_combinations import mark_route_combinations_stale
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -17,4 +18,6 @@ async def load_db_dump(db_session: AsyncSession, dump: str):
         except Exception as e:
             errors.append(e)
 
+    # dumps have no derived data
+    mark_route_combinations_stale(db_session, everything=True)
     return errors
@@ -0,0 +1,377 @@
+import hashlib
+from dataclasses import dataclass
+
+import pandas as pd
+from backend_admin.models.upoader_fields_config import UploaderFieldsConfig
+from module_data_internal.schemas import (
+    ContainerOwner,
+    ContainerShipmentTerms,
+    ContainerTransferTerms,
+    DropModel,
+    RouteModel,
+    RouteType,
+)
+from module_data_internal.schemas.fingerprint import join_values, make_fingerprint
+from pandas import DataFrame
+
+from .errors import InvalidDroppRow, NoPriceInRouteException, PointNotFoundException
+from .uploader import CompaniesStore, ContainerStore, ContainerUid, PointsHashedStore, ServicesStore
+
+DC20_24T = (20, 0, 24)
+DC20_28T = (20, 24, 28)
+HC40 = (40, 0, 28)
+
+# Price column, currency column and containers of the price, by route type
+_ROUTE_PRICES = {
+    RouteType.SEA: (
+        ("sea_20dc", "sea_20dc_currency", (DC20_24T, DC20_28T)),
+        ("sea_40hc", "sea_40hc_currency", (HC40,)),
+    ),
+    RouteType.RAIL: (
+        ("rail_20dc24t", "rail_20dc24t_currency", (DC20_24T,)),
+        ("rail_20dc28t", "rail_20dc28t_currency", (DC20_28T,)),
+        ("rail_40hc", "rail_40hc_currency", (HC40,)),
+    ),
+}
+_DEFAULT_CURRENCY = {RouteType.SEA: "USD", RouteType.RAIL: "РУБ"}
+
+
+@dataclass
+class ReferenceIds:
+    """
+    Ids of points, companies, containers and services by their keys in the sheets.
+
+    Rows are built from ids, not ORM objects, so they can be built in worker processes.
+    """
+
+    points: dict[str, int]
+    companies: dict[str, int]
+    containers: dict[ContainerUid, int]
+    services: dict[str, int]
+
+    @classmethod
+    def from_stores(
+        cls,
+        points: PointsHashedStore,
+        companies: CompaniesStore,
+        containers: ContainerStore,
+        services: ServicesStore,
+    ) -> "ReferenceIds":
+        return cls(
+            points={name: point.id for name, point in points.items()},
+            companies={name: company.id for name, company in companies.items()},
+            containers={key: container.id for key, container in containers.items()},
+            services={name: service.id for name, service in services.items()},
+        )
+
+
+@dataclass
+class RoutesRows:
+    """
+    Rows of routes, prices and service prices ready for bulk insert.
+
+    Routes are indexed by their positions in the sheets; prices and service prices refer to them by `route`.
+    """
+
+    routes: DataFrame
+    prices: DataFrame
+    service_prices: DataFrame
+
+    def __len__(self):
+        return len(self.routes)
+
+
+class _RowErrors:
+    """The first error of every row of a frame with a range index"""
+
+    def __init__(self, size: int):
+        self.errors = pd.Series(None, index=range(size), dtype=object)
+
+    def add(self, errors: pd.Series) -> None:
+        """Sets errors of rows which have no error yet"""
+        errors = errors.dropna()
+        errors = errors[self.errors[errors.index].isna().to_numpy()]
+        self.errors[errors.index] = errors
+
+    def add_where(self, mask: pd.Series, make_error) -> None:
+        self.add(pd.Series([make_error() for _ in range(mask.sum())], index=mask.index[mask], dtype=object))
+
+    @property
+    def failed(self) -> pd.Series:
+        return self.errors.notna()
+
+    def to_warnings(self, index: pd.Index, route_types: pd.Series | None = None) -> list:
+        return [
+            (self.errors[i], index[i], route_types[i] if route_types is not None else None)
+            for i in self.errors.index[self.failed]
+        ]
+
+
+def _row_strings(df: DataFrame) -> pd.Series:
+    """
+    Values of every row joined into a string.
+
+    Values are formatted like ones of fingerprints, so the string of a row doesn't depend on dtypes of columns
+    (an empty cell turns a column of integers into floats).
+    """
+    values = df[sorted(df.columns)].astype(object)
+    values = values.where(values.notna(), None)
+    return pd.Series(
+        [join_values(row) for row in values.itertuples(index=False, name=None)],
+        index=df.index,
+        dtype=object,
+    )
+
+
+def _hashes(strings: pd.Series) -> pd.Series:
+    return pd.Series([hashlib.sha1(s.encode()).hexdigest() for s in strings], index=strings.index, dtype=object)
+
+
+def _content_hashes(routes: DataFrame, prices: DataFrame, service_prices: DataFrame) -> pd.Series:
+    """Hashes of routes together with their prices and service prices"""
+    strings = _row_strings(routes)
+    for rows in (prices, service_prices):
+        if rows.empty:
+            continue
+        rows_strings = _row_strings(rows.drop(columns="route")).groupby(rows["route"].to_numpy())
+        strings = strings + "#" + rows_strings.agg(lambda x: ";".join(sorted(x))).reindex(strings.index).fillna("")
+    return _hashes(strings)
+
+
+def _fingerprints(df: DataFrame, model) -> pd.Series:
+    """Fingerprints of rows by the `uid` columns of the model, equal to ones set by ORM flushes"""
+    values = df[list(model.uid)].astype(object)
+    values = values.where(values.notna(), None)
+    return pd.Series(
+        [make_fingerprint(row) for row in values.itertuples(index=False, name=None)],
+        index=df.index,
+        dtype=object,
+    )
+
+
+def _enum_values(values: pd.Series, enum) -> tuple[pd.Series, pd.Series]:
+    """Returns enum members and errors the enum raises for invalid values"""
+    values = values.str.upper()
+    members = values.map({member.value: member for member in enum})
+
+    errors = {}
+    for value in values[members.isna()].unique():
+        try:
+            enum(value)
+        except ValueError as e:
+            errors[value] = e
+
+    return members, values.map(errors)
+
+
+def _lookup_points(names: pd.Series, point_ids: dict[str, int], errors: _RowErrors) -> pd.Series:
+    keys = names.str.lower()
+    ids = keys.map(point_ids)
+    errors.add(keys[ids.isna() & names.notna()].map(PointNotFoundException))
+    return ids
+
+
+def _currencies(values: pd.Series, default: str) -> pd.Series:
+    return values.str.strip().str.upper().fillna(default)
+
+
+def _service_prices(
+    df: DataFrame,
+    ids: ReferenceIds,
+    fc: UploaderFieldsConfig,
+    errors: _RowErrors,
+) -> list[DataFrame]:
+    columns = [(name, None) for name in fc.services] + list(fc.services_with_container.items())
+    frames = []
+
+    for service_column_name, container_descriptor in columns:
+        price_column = getattr(fc, service_column_name)
+        currency_column = getattr(fc, f"{service_column_name}_currency")
+
+        service_id = ids.services.get(price_column.split("#")[0].strip())
+        if not service_id or price_column not in df.columns:
+            continue
+
+        container_id = None
+        if container_descriptor:
+            container_id = ids.containers.get(container_descriptor)
+            if not container_id:
+                continue
+
+        raw = df[price_column]
+        prices = pd.to_numeric(raw, errors="coerce")
+
+        invalid = prices.isna() & raw.notna() & raw.ne("")
+        errors.add(raw[invalid].map(lambda x: ValueError(f"could not convert string to float: '{x}'")))
+
+        # currencies of services are written as they are, unlike currencies of prices
+        currencies = df[currency_column]
+        currencies = currencies.mask(currencies.isna() | currencies.eq(""), "USD")
+
+        present = prices.notna() & prices.ne(0)
+        frames.append(DataFrame({
+            "route": df.index[present],
+            "service_id": service_id,
+            "container_id": container_id,
+            "currency": currencies[present].to_numpy(),
+            "price": prices[present].to_numpy(),
+        }))
+
+    return frames
+
+
+def build_routes(
+    routes_df: DataFrame,
+    ids: ReferenceIds,
+    fc: UploaderFieldsConfig,
+    warnings: list,
+) -> RoutesRows:
+    """
+    Builds rows of routes of both types indexed by (route type, row index).
+
+    Invalid rows are skipped and reported to `warnings` like (error, row index, route type).
+    """
+    df = routes_df.reset_index(drop=True)
+    route_types = pd.Series(routes_df.index.get_level_values(fc.route_type))
+    errors = _RowErrors(len(df))
+
+    # Container terms
+    terms = {}
+    for column, enum in (
+        (fc.container_transfer_terms, ContainerTransferTerms),
+        (fc.container_shipment_terms, ContainerShipmentTerms),
+        (fc.container_condition, ContainerOwner),
+    ):
+        terms[column], enum_errors = _enum_values(df[column], enum)
+        errors.add(enum_errors)
+
+    # zero prices are written, but a route must have a non-zero one
+    has_prices = pd.Series(False, index=df.index)
+    for route_type, prices in _ROUTE_PRICES.items():
+        is_type = route_types.eq(route_type)
+        for price_column, _, _ in prices:
+            values = df[getattr(fc, price_column)]
+            has_prices |= is_type & values.notna() & values.ne(0)
+    errors.add_where(~has_prices, NoPriceInRouteException)
+
+    company_ids = df[fc.company].map(ids.companies)
+    errors.add(df[fc.company][company_ids.isna()].map(KeyError))
+
+    start_point_ids = _lookup_points(df[fc.start_point], ids.points, errors)
+    end_point_ids = _lookup_points(df[fc.end_point], ids.points, errors)
+    if fc.dropp_off_point in df.columns:
+        dropp_off_point_ids = _lookup_points(df[fc.dropp_off_point], ids.points, errors)
+    else:
+        dropp_off_point_ids = pd.Series(pd.NA, index=df.index)
+
+    is_through_raw = df[fc.is_through]
+    is_through = is_through_raw.isna() | is_through_raw.eq(1.0) | is_through_raw.eq("1")
+
+    conversation_percents = pd.to_numeric(df[fc.conversation_percents], errors="coerce").fillna(0)
+
+    # Prices by containers
+    price_frames = []
+    for route_type, prices in _ROUTE_PRICES.items():
+        is_type = route_types.eq(route_type)
+        for price_column, currency_column, container_keys in prices:
+            values = df[getattr(fc, price_column)]
+            present = is_type & values.notna()
+            currencies = _currencies(df[getattr(fc, currency_column)], _DEFAULT_CURRENCY[route_type])
+            for container_key in container_keys:
+                price_frames.append(DataFrame({
+                    "route": df.index[present],
+                    "container_id": ids.containers[container_key],
+                    "value": values[present].to_numpy(),
+                    "currency": currencies[present].to_numpy(),
+                    "conversation_percents": conversation_percents[present].to_numpy(),
+                }))
+
+    service_price_frames = _service_prices(df, ids, fc, errors)
+
+    warnings.extend(errors.to_warnings(routes_df.index.get_level_values(-1), route_types))
+
+    valid = ~errors.failed
+    routes = DataFrame({
+        "type": route_types,
+        "company_id": company_ids.astype("Int64"),
+        "start_point_id": start_point_ids.astype("Int64"),
+        "end_point_id": end_point_ids.astype("Int64"),
+        "dropp_off_point_id": dropp_off_point_ids.astype("Int64"),
+        "effective_from": df[fc.effective_from],
+        "effective_to": df[fc.effective_to],
+        "comment": df[fc.comment],
+        "timetable": df[fc.timetable],
+        "container_transfer_terms": terms[fc.container_transfer_terms],
+        "container_shipment_terms": terms[fc.container_shipment_terms],
+        "container_owner": terms[fc.container_condition],
+        "is_through": is_through.astype(bool),
+    })[valid]
+
+    def valid_rows(frames: list[DataFrame]) -> DataFrame:
+        rows = pd.concat(frames, ignore_index=True) if frames else DataFrame({"route": []})
+        return rows[rows["route"].map(valid)]
+
+    prices = valid_rows(price_frames)
+    service_prices = valid_rows(service_price_frames)
+    routes["content_hash"] = _content_hashes(routes, prices, service_prices)
+    routes["fingerprint"] = _fingerprints(routes, RouteModel)
+
+    return RoutesRows(routes, prices, service_prices)
+
+
+def build_dropp(
+    dropp_df: DataFrame,
+    ids: ReferenceIds,
+    fc: UploaderFieldsConfig,
+    warnings: list,
+) -> DataFrame:
+    """Builds rows of dropp; invalid rows are skipped and reported to `warnings` like (error, row index, None)"""
+    df = dropp_df.reset_index(drop=True)
+    errors = _RowErrors(len(df))
+
+    company_ids = df[fc.company].str.upper().map(ids.companies)
+    start_point_ids = df[fc.start_point].str.lower().map(ids.points)
+    end_point_ids = df[fc.end_point].str.lower().map(ids.points)
+
+    is_invalid = (
+        company_ids.isna() | start_point_ids.isna() | end_point_ids.isna()
+        | df[fc.effective_from].isna() | df[fc.effective_to].isna()
+    )
+    errors.add_where(is_invalid, InvalidDroppRow)
+
+    warnings.extend(errors.to_warnings(dropp_df.index))
+
+    base = DataFrame({
+        "start_point_id": start_point_ids.astype("Int64"),
+        "end_point_id": end_point_ids.astype("Int64"),
+        "company_id": company_ids.astype("Int64"),
+        "effective_from": df[fc.effective_from],
+        "effective_to": df[fc.effective_to],
+        "conversation_percents": pd.to_numeric(df[fc.conversation_percents], errors="coerce").fillna(0),
+        "currency": "USD",
+    })[~errors.failed]
+
+    frames = []
+    for price_column, container_keys in ((fc.drop20, (DC20_24T, DC20_28T)), (fc.drop40, (HC40,))):
+        prices = df[price_column][~errors.failed]
+        present = prices.notna()
+        for container_key in container_keys:
+            frames.append(base[present].assign(price=prices[present], container_id=ids.containers[container_key]))
+
+    dropp = pd.concat(frames, ignore_index=True)
+    dropp["content_hash"] = _hashes(_row_strings(dropp))
+    dropp["fingerprint"] = _fingerprints(dropp, DropModel)
+    return dropp
+
+
+def build_rows(
+    routes_df: DataFrame,
+    dropp_df: DataFrame,
+    ids: ReferenceIds,
+    fc: UploaderFieldsConfig,
+    warnings: list,
+) -> tuple[RoutesRows, DataFrame, list]:
+    """Builds rows of routes and dropp in a worker process; returns them with `warnings` extended by invalid rows"""
+    routes = build_routes(routes_df, ids, fc, warnings)
+    dropp = build_dropp(dropp_df, ids, fc, warnings)
+    return routes, dropp, warnings
@@ -0,0 +1,78 @@
+import logging
+from collections.abc import Iterable, Sequence
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.dialects import mysql, sqlite
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement: keeps statements far below max_allowed_packet
+# and the SQLite limit of bound parameters
+BULK_CHUNK_SIZE = 500
+
+
+def _chunks(rows: Sequence[dict], size: int) -> Iterable[Sequence[dict]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _build_upsert(dialect_name: str, model, rows: Sequence[dict], update_columns: Sequence[str]):
+    if dialect_name in ("mysql", "mariadb"):
+        stmt = mysql.insert(model).values(rows)
+        return stmt.on_duplicate_key_update({column: stmt.inserted[column] for column in update_columns})
+
+    if dialect_name == "sqlite":
+        stmt = sqlite.insert(model).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=model.uid,
+            set_={column: stmt.excluded[column] for column in update_columns},
+        )
+
+    raise NotImplementedError(f"Bulk upsert is not supported for {dialect_name}")
+
+
+async def bulk_upsert(
+    db_session,
+    model,
+    rows: Sequence[dict],
+    update_columns: Sequence[str],
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> None:
+    """
+    Writes rows by multi-row `INSERT ... ON DUPLICATE KEY UPDATE` statements of `chunk_size` rows.
+
+    Rows conflicting with the unique constraint of the model (its `uid` columns) update `update_columns`.
+    """
+    dialect_name = db_session.get_bind().dialect.name
+    for chunk in _chunks(rows, chunk_size):
+        await db_session.execute(_build_upsert(dialect_name, model, chunk, update_columns))
+    logger.debug("Upserted %d rows into %s", len(rows), model.__tablename__)
+
+
+async def bulk_insert(db_session, model, rows: Sequence[dict], chunk_size: int = BULK_CHUNK_SIZE) -> None:
+    """Writes rows by multi-row `INSERT` statements of `chunk_size` rows"""
+    for chunk in _chunks(rows, chunk_size):
+        await db_session.execute(insert(model).values(chunk))
+    logger.debug("Inserted %d rows into %s", len(rows), model.__tablename__)
+
+
+async def bulk_update(db_session, model, rows: Sequence[dict], chunk_size: int = BULK_CHUNK_SIZE) -> None:
+    """Updates rows by their primary keys (`id` of every row) by executemany `UPDATE` statements of `chunk_size` rows"""
+    for chunk in _chunks(rows, chunk_size):
+        await db_session.execute(update(model), chunk)
+    logger.debug("Updated %d rows of %s", len(rows), model.__tablename__)
+
+
+async def bulk_delete(db_session, column, ids: Sequence[int], chunk_size: int = BULK_CHUNK_SIZE) -> None:
+    """Deletes rows by `DELETE ... WHERE column IN (...)` statements of `chunk_size` ids"""
+    for chunk in _chunks(ids, chunk_size):
+        await db_session.execute(delete(column.class_).where(column.in_(chunk)))
+    logger.debug("Deleted %d rows from %s", len(ids), column.class_.__tablename__)
+
+
+async def bulk_select(db_session, stmt, column, values: Sequence, chunk_size: int = BULK_CHUNK_SIZE) -> list:
+    """Selects rows by `stmt` filtered by `column IN (...)` statements of `chunk_size` values"""
+    rows = []
+    for chunk in _chunks(values, chunk_size):
+        rows.extend((await db_session.execute(stmt.where(column.in_(chunk)))).all())
+    return rows
@@ -1,5 +1,14 @@
+def _restore_error(cls, args: tuple, state: dict) -> "LoadingErrorException":
+    error = cls.__new__(cls)
+    error.args = args
+    error.__dict__.update(state)
+    return error
+
+
 class LoadingErrorException(Exception):
-    pass
+    def __reduce__(self):
+        # errors are sent from worker processes, and constructors of subclasses don't take their messages
+        return _restore_error, (type(self), self.args, self.__dict__)
 
 
 class InvalidRouteConditionException(LoadingErrorException):
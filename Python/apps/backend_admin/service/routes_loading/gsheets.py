@@ -0,0 +1,87 @@
+import asyncio
+import logging
+
+from pandas import DataFrame
+from pandas.io.parsers import TextParser
+
+from .sheets_cache import SheetsCache, sheets_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Like `gspread_dataframe.get_as_dataframe(worksheet, evaluate_formulas=True)`
+_VALUES_PARAMS = {
+    "valueRenderOption": "UNFORMATTED_VALUE",
+    "dateTimeRenderOption": "FORMATTED_STRING",
+}
+
+
+def _quote_title(title: str) -> str:
+    return "'{}'".format(title.replace("'", "''"))
+
+
+def values_to_dataframe(values: list[list]) -> DataFrame:
+    """Parses values of a worksheet with a header row like `gspread_dataframe.get_as_dataframe`"""
+    if not values:
+        return DataFrame()
+
+    width = max(map(len, values))
+    rows = [row + [""] * (width - len(row)) for row in values]
+    df = TextParser(rows).read().dropna(how="all", axis=0)
+
+    empty_unnamed_columns = [
+        column for column in df.columns
+        if str(column).startswith("Unnamed:") and df[column].isna().all()
+    ]
+    return df.drop(columns=empty_unnamed_columns)
+
+
+def get_revision(spreadsheet) -> str | None:
+    """Modification time of the spreadsheet, or None if Drive API is unavailable"""
+    try:
+        return spreadsheet.get_lastUpdateTime()
+    except Exception:
+        logger.warning("Failed to get modification time of the spreadsheet %s", spreadsheet.id, exc_info=True)
+        return None
+
+
+async def download_worksheets(
+    spreadsheet,
+    titles: list[str],
+    revision: str | None,
+    cache: SheetsCache | None = None,
+) -> dict[str, DataFrame]:
+    """
+    Downloads worksheets by one batched request and parses them in threads.
+
+    Worksheets of a known revision are read from the cache instead.
+    """
+    frames: dict[str, DataFrame] = {}
+    keys = {title: sheets_cache_key("worksheet", spreadsheet.id, revision, title) for title in titles}
+
+    if cache is not None and revision is not None:
+        for title in titles:
+            df = await asyncio.to_thread(cache.get, keys[title])
+            if df is not None:
+                frames[title] = df
+
+    missing = [title for title in titles if title not in frames]
+    if not missing:
+        logger.info("Worksheets of revision %s are read from the cache", revision)
+        return frames
+
+    response = await asyncio.to_thread(
+        spreadsheet.values_batch_get,
+        [_quote_title(title) for title in missing],
+        params=_VALUES_PARAMS,
+    )
+    parsed = await asyncio.gather(*(
+        asyncio.to_thread(values_to_dataframe, value_range.get("values", []))
+        for value_range in response["valueRanges"]
+    ))
+
+    for title, df in zip(missing, parsed):
+        frames[title] = df
+        if cache is not None and revision is not None:
+            await asyncio.to_thread(cache.set, keys[title], df)
+
+    return frames
@@ -1,125 +1,137 @@
 import datetime
 import logging
-import re
 
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+_EN_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4,
+    "may": 5, "jun": 6, "jul": 7, "aug": 8,
+    "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_RU_MONTHS = {
+    "янв": 1, "фев": 2, "мар": 3, "апр": 4,
+    "май": 5, "июн": 6, "июл": 7, "авг": 8,
+    "сен": 9, "окт": 10, "ноя": 11, "дек": 12,
+}
+
+# 2026-01-31, 20260131, 2026-01-31 00:00:00 (a date cell of a XLSX file)
+_ISO_DATE_PATTERN = r"^\d{4}-?\d{2}-?\d{2}(?:[T ]|$)"
+_DATE_PATTERN = (
+    # 01-Jan-26 (DD-Mon-YY); Cyrillic "а" is a common typo in english months
+    r"^(?:(?P<dmy_day>\d{1,2})-(?P<dmy_month>[A-Za-zаА]{3})-(?P<dmy_year>\d{2})"
+    # 31.01.2026 (DD.MM.YYYY)
+    r"|(?P<num_day>\d{1,2})\.(?P<num_month>\d{1,2})\.(?P<num_year>\d{4})"
+    # 18.дек (DD.Mon) (current year)
+    r"|(?P<dm_day>\d{1,2})\.(?P<dm_month>[A-Za-zа-яА-Я]{3}))$"
+)
+
+_NO_PRICE_VALUES = ("", "-", "/")
 
-def none_filter(x):
-    return x if x else None
 
+def nan_to_none_mapper(x):
+    return None if pd.isna(x) else x
 
-def price_filter(x):
-    return (
-        x if isinstance(x, (float, int))
-        else float(x.replace(" ", "").replace("$", "").replace("\xa0", ""))
-        if x and isinstance(x, str) and x not in ("-", "/")
-        else None
-    )
 
+def none_filter(series: pd.Series) -> pd.Series:
+    """Replaces falsy values with NaN"""
+    return series.where(series.astype(bool))
 
-def nan_to_none_mapper(x):
-    return None if pd.isna(x) else x
 
+def strip_strings(series: pd.Series) -> pd.Series:
+    """Strips string values; empty strings and values which are not strings become NaN"""
+    return series.str.strip().mask(series.eq(""))
+
+
+def has_strings(series: pd.Series) -> bool:
+    """Whether the `.str` accessor can be used: a column of object dtype may contain only numbers"""
+    return pd.api.types.infer_dtype(series, skipna=True) in ("string", "mixed", "mixed-integer")
+
+
+def clean_numeric_strings(series: pd.Series) -> pd.Series:
+    """Removes percent and dollar signs and spaces from string values, other values are kept"""
+    if not has_strings(series):
+        return series
+    return series.str.replace(r"[%$ ]", "", regex=True).fillna(series)
+
+
+def parse_prices(series: pd.Series) -> pd.Series:
+    """
+    Converts prices like "1 000$" to floats; empty values, "-" and "/" become NaN.
+
+    :raise ValueError: if there is a value which is not a price
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+
+    text = series.astype("string").str.replace(r"[ $\xa0]", "", regex=True)
+    prices = pd.to_numeric(text, errors="coerce")
+
+    invalid = prices.isna() & text.notna() & ~text.isin(_NO_PRICE_VALUES)
+    if invalid.any():
+        raise ValueError(f"could not convert string to float: '{series[invalid].iloc[0]}'")
+
+    return prices.astype(float)
+
+
+def _month_numbers(months: pd.Series, *maps: dict[str, int]) -> pd.Series:
+    months = months.str.lower()
+    result = pd.Series(float("nan"), index=months.index)
+    for month_map in reversed(maps):
+        result = months.map(month_map).astype(float).fillna(result)
+    return result
+
+
+def parse_dates(series: pd.Series) -> pd.Series:
+    """
+    Parses dates of ISO, DD-Mon-YY, DD.MM.YYYY and DD.Mon (current year) formats; other values become NaT
+    """
+    # a sheet has a few distinct dates, so every one of them is parsed once
+    codes, uniques = pd.factorize(series)
+    parsed = _parse_unique_dates(pd.Series(uniques, dtype=object)).to_numpy()
+    # missing values have the code -1
+    parsed = pd.api.extensions.take(parsed, codes, allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(parsed, index=series.index, dtype="datetime64[ns]")
+
+
+def _parse_unique_dates(series: pd.Series) -> pd.Series:
+    text = series.astype("string").str.strip()
+    result = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+
+    is_iso = text.str.match(_ISO_DATE_PATTERN).fillna(False).astype(bool)
+    if is_iso.any():
+        result[is_iso] = pd.to_datetime(text[is_iso], format="ISO8601", errors="coerce").dt.normalize()
+
+    rest = text[~is_iso & text.notna()].str.replace(" ", "", regex=False)
+    if rest.empty:
+        return result
+
+    parts = rest.str.extract(_DATE_PATTERN).astype(object)
+
+    dmy_year = pd.to_numeric(parts["dmy_year"])
+    dmy = pd.DataFrame({
+        "year": dmy_year + (dmy_year < 30).map({True: 2000, False: 1900}),
+        "month": _month_numbers(parts["dmy_month"].str.replace("а", "a").str.replace("А", "A"), _EN_MONTHS),
+        "day": pd.to_numeric(parts["dmy_day"]),
+    })
+    num = pd.DataFrame({
+        "year": pd.to_numeric(parts["num_year"]),
+        "month": pd.to_numeric(parts["num_month"]),
+        "day": pd.to_numeric(parts["num_day"]),
+    })
+    dm = pd.DataFrame({
+        "year": datetime.date.today().year,
+        "month": _month_numbers(parts["dm_month"], _RU_MONTHS, _EN_MONTHS),
+        "day": pd.to_numeric(parts["dm_day"]),
+    }, index=parts.index).where(parts["dm_day"].notna())
+
+    components = dmy.fillna(num).fillna(dm).astype(float)
+    parsed = pd.to_datetime(components, errors="coerce")
+    result[parsed.index] = parsed
+
+    unknown = rest[parsed.isna()]
+    if not unknown.empty:
+        logger.warning("Date parsing: %d values of unknown format, e.g. '%s'", len(unknown), unknown.iloc[0])
 
-def format_date(date_str, try_another_variants=True):  # noqa: C901
-    if pd.isna(date_str):
-        return date_str
-
-    try:
-        datetime.date.fromisoformat(date_str)
-        return date_str
-    except ValueError:
-        pass
-
-    ru_month_map = {
-        "янв": "01", "фев": "02", "мар": "03", "апр": "04",
-        "май": "05", "июн": "06", "июл": "07", "авг": "08",
-        "сен": "09", "окт": "10", "ноя": "11", "дек": "12"
-    }
-    en_month_map = {
-        "jan": "01", "feb": "02", "mar": "03", "apr": "04",
-        "may": "05", "jun": "06", "jul": "07", "aug": "08",
-        "sep": "09", "oct": "10", "nov": "11", "dec": "12"
-    }
-
-    try:
-        if not isinstance(date_str, str):
-            date_str = str(date_str)
-
-        date_str = date_str.replace(" ", "")
-
-        if not date_str or date_str in ["nan", "none", "null", ""]:
-            return None
-
-        # 01-Jan-26 (DD-Mon-YY)
-        if re.match(r"^\d{1,2}-[A-Za-z]{3}-\d{2}$", date_str, re.IGNORECASE):
-            try:
-                parts = date_str.split("-")
-                day = parts[0].zfill(2)
-                month_str = parts[1].lower()
-                year_short = parts[2]
-
-                month = en_month_map.get(month_str[:3]) or ru_month_map.get(month_str[:3])
-                if not month:
-                    raise ValueError(f"Unknown month: {month_str}")
-
-                year_int = int(year_short)
-                if year_int < 30:
-                    year = f"20{year_short}"
-                else:
-                    year = f"19{year_short}"
-
-                return f"{year}-{month}-{day}"
-
-            except Exception as e:
-                logger.warning("Date parsing: '%s' — %s", date_str, e)
-                return None
-
-        # 31.01.2026 (DD.MM.YYYY)
-        elif re.match(r"^\d{1,2}\.\d{1,2}\.\d{4}$", date_str):
-            try:
-                day, month, year = date_str.split(".")
-                return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-            except Exception as e:
-                logger.warning("Date parsing: '%s' — %s", date_str, e)
-                return None
-
-        # 18.дек (DD.Mon) (current year)
-        elif re.match(r"^\d{1,2}\.[A-Za-zа-яА-Я]{3}$", date_str, re.IGNORECASE):
-            try:
-                parts = date_str.split(".")
-                day = parts[0].zfill(2)
-                month_str = parts[1].lower()
-
-                month = ru_month_map.get(month_str[:3]) or en_month_map.get(month_str[:3])
-
-                if not month:
-                    raise ValueError(f"Unknown month in '{date_str}'")
-
-                current_year = datetime.date.today().year
-
-                return f"{current_year}-{month}-{day}"
-
-            except Exception as e:
-                logger.warning("Date parsing: '%s' — %s", date_str, e)
-                return None
-
-        else:
-            logger.warning("Date parsing: unknown format '%s'", date_str)
-            if not try_another_variants:
-                return None
-
-            # Try process date with an error
-            return (
-                # RU -> EN
-                format_date(date_str.replace("а", "a").replace("А", "A"), False)
-                # EN -> RU
-                or format_date(date_str.replace("a", "а").replace("A", "А"), False)
-            )
-
-    except Exception as e:
-        logger.error("Date parsing failed: '%s' — %s", date_str, e)
-        return None
+    return result
@@ -0,0 +1,206 @@
+import asyncio
+import datetime
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager, suppress
+from typing import Any, BinaryIO, Literal
+
+from fastapi import HTTPException
+
+from module_shared.redis_client import get_redis
+from pydantic import BaseModel, Field
+from redis.exceptions import LockError
+
+from .stages import StageTimer
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_JOBS_QUEUE = "backend_admin:upload-jobs"
+UPLOAD_JOB_PREFIX = "backend_admin:upload-job"
+# Finished jobs are kept for a day
+UPLOAD_JOB_TTL = 24 * 3600
+UPLOAD_LOCK = "backend_admin:upload-lock"
+# The lock of a process which died expires; a running upload prolongs it
+UPLOAD_LOCK_TTL = 60
+# Uploaded files of queued jobs; files older than jobs are removed, even if their jobs never ran
+UPLOAD_FILE_PREFIX = "upload-job-"
+
+UploadJobStatus = Literal["queued", "running", "done", "failed"]
+
+
+class UploadJob(BaseModel):
+    id: str  # noqa: A003
+    status: UploadJobStatus = "queued"
+    params: dict[str, Any] = Field(default_factory=dict)
+    stage: str | None = None  # the running stage, or the stage which failed
+    timings: dict[str, float] = Field(default_factory=dict)
+    result: dict[str, Any] | None = None
+    error: dict[str, Any] | None = None
+    created_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+    finished_at: datetime.datetime | None = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+UploadJobProcessor = Callable[[UploadJob, StageTimer], Awaitable[dict[str, Any]]]
+
+
+class UploadIsRunning(Exception):
+    pass
+
+
+async def _prolong_lock(lock) -> None:
+    while True:
+        await asyncio.sleep(UPLOAD_LOCK_TTL / 3)
+        try:
+            await lock.reacquire()
+        except LockError:
+            logger.error("Upload lock is lost: another upload may write the same tables")
+            return
+
+
+@asynccontextmanager
+async def upload_lock(blocking: bool = True) -> AsyncIterator[None]:
+    """
+    Holds the Redis lock of uploads, so uploads of all admin processes, queued and synchronous, run one by one.
+
+    Waits for the running upload, or raises `UploadIsRunning` if not `blocking`.
+    """
+    lock = get_redis().lock(UPLOAD_LOCK, timeout=UPLOAD_LOCK_TTL, blocking=blocking)
+    if not await lock.acquire():
+        raise UploadIsRunning()
+
+    prolong = asyncio.create_task(_prolong_lock(lock))
+    try:
+        yield
+    finally:
+        prolong.cancel()
+        with suppress(asyncio.CancelledError):
+            await prolong
+        with suppress(LockError):
+            await lock.release()
+
+
+def save_upload_file(data_file: BinaryIO) -> str:
+    """Copies an uploaded file to a temporary file by chunks"""
+    fd, path = tempfile.mkstemp(prefix=UPLOAD_FILE_PREFIX, suffix=".xlsx")
+    with os.fdopen(fd, "wb") as f:
+        shutil.copyfileobj(data_file, f)
+    return path
+
+
+def remove_expired_upload_files() -> None:
+    """Removes uploaded files of jobs which are expired: lost, or run by a process which died"""
+    expired_before = time.time() - UPLOAD_JOB_TTL
+    for entry in os.scandir(tempfile.gettempdir()):
+        if entry.name.startswith(UPLOAD_FILE_PREFIX):
+            with suppress(OSError):
+                if entry.stat().st_mtime < expired_before:
+                    os.remove(entry.path)
+
+
+def _job_key(job_id: str) -> str:
+    return f"{UPLOAD_JOB_PREFIX}:{job_id}"
+
+
+async def save_upload_job(job: UploadJob) -> None:
+    await get_redis().set(_job_key(job.id), job.model_dump_json(), ex=UPLOAD_JOB_TTL)
+
+
+async def get_upload_job(job_id: str) -> UploadJob | None:
+    raw = await get_redis().get(_job_key(job_id))
+    return UploadJob.model_validate_json(raw) if raw is not None else None
+
+
+async def create_upload_job(params: dict[str, Any]) -> UploadJob:
+    """Saves a job and puts it into the queue of the upload worker"""
+    job = UploadJob(id=uuid.uuid4().hex, params=params)
+    await save_upload_job(job)
+    await get_redis().rpush(UPLOAD_JOBS_QUEUE, job.id)
+    logger.info("Upload job queued: %s", job.id)
+    return job
+
+
+async def run_upload_job(job: UploadJob, process: UploadJobProcessor) -> UploadJob:
+    """Runs the job saving its stage and timings as they change; errors of the job are saved to the job"""
+    async def on_change():
+        job.stage = stages.current
+        job.timings = dict(stages.timings)
+        await save_upload_job(job)
+
+    stages = StageTimer(on_change)
+    job.status = "running"
+    await save_upload_job(job)
+
+    try:
+        job.result = await process(job, stages)
+        job.status = "done"
+    except HTTPException as e:
+        job.error = {"status_code": e.status_code, "detail": e.detail}
+        job.status = "failed"
+    except Exception as e:
+        logger.exception("Upload job %s failed", job.id)
+        job.error = {"type": type(e).__name__, "detail": str(e)}
+        job.status = "failed"
+
+    job.stage = stages.failed
+    job.timings = dict(stages.timings)
+    job.finished_at = datetime.datetime.now()
+    await save_upload_job(job)
+    logger.info("Upload job %s: %s in %s", job.id, job.status, job.timings)
+    return job
+
+
+async def fail_interrupted_upload_jobs() -> None:
+    """
+    Marks jobs left running by a process which died as failed.
+
+    Jobs are run under the upload lock, so while it's held no job can be running.
+    """
+    async with upload_lock():
+        async for key in get_redis().scan_iter(match=f"{UPLOAD_JOB_PREFIX}:*"):
+            job = await get_upload_job(key.removeprefix(f"{UPLOAD_JOB_PREFIX}:"))
+            if job is None or job.status != "running":
+                continue
+
+            job.status = "failed"
+            job.error = {"type": "Interrupted", "detail": "The upload was interrupted by a restart"}
+            job.finished_at = datetime.datetime.now()
+            await save_upload_job(job)
+            logger.warning("Upload job %s was interrupted", job.id)
+
+
+async def run_upload_worker(process: UploadJobProcessor, poll_timeout: int = 5) -> None:
+    """Runs queued jobs one by one under the upload lock, after jobs interrupted by restarts are failed"""
+    is_recovered = False
+    while True:
+        try:
+            if not is_recovered:
+                await fail_interrupted_upload_jobs()
+                await asyncio.to_thread(remove_expired_upload_files)
+                is_recovered = True
+
+            item = await get_redis().blpop([UPLOAD_JOBS_QUEUE], timeout=poll_timeout)
+            if item is None:
+                continue
+
+            await asyncio.to_thread(remove_expired_upload_files)
+            job = await get_upload_job(item[1])
+            if job is None:
+                logger.warning("Upload job %s is expired before it is started", item[1])
+                continue
+
+            async with upload_lock():
+                await run_upload_job(job, process)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Upload worker failed, retrying in %ss", poll_timeout)
+            await asyncio.sleep(poll_timeout)
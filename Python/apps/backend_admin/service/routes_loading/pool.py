@@ -0,0 +1,45 @@
+import asyncio
+import logging
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class LoadingPool:
+    """
+    Worker processes for CPU-bound stages of uploads, so they never block the event loop.
+
+    Arguments and results of functions are pickled: pass frames and plain values, not ORM objects.
+    Until the pool is started (in tests and scripts) functions run in threads.
+    """
+
+    _executor: ProcessPoolExecutor | None = None
+
+    def init(self, processes: int):
+        if processes <= 0:
+            logger.info("Loading pool is disabled: CPU-bound stages run in threads")
+            return
+
+        # workers are spawned: forking a process with a running event loop and DB connections is unsafe
+        self._executor = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn"))
+        logger.info("Loading pool started: %d processes", processes)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+            logger.info("Loading pool closed")
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        if self._executor is None:
+            return await asyncio.to_thread(func, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+
+@cache
+def get_loading_pool() -> LoadingPool:
+    return LoadingPool()
@@ -1,4 +1,4 @@
-import re
+import asyncio
 from collections import defaultdict
 from typing import Any
 
@@ -12,26 +12,31 @@ from module_data_internal.schemas import (
 )
 from pandas import DataFrame
 
-from .errors import InvalidRouteTypeException, LoadingErrorException, PointsWithNanException
-from .helpers import format_date, none_filter, price_filter
+from .builder import ReferenceIds, build_rows
+from .errors import InvalidRouteTypeException, PointsWithNanException
+from .helpers import (
+    clean_numeric_strings,
+    has_strings,
+    none_filter,
+    parse_dates,
+    parse_prices,
+    strip_strings,
+)
+from .pool import get_loading_pool
+from .sheets_cache import get_sheets_cache
+from .stages import StageTimer
 from .uploader import (
-    create_dropp,
-    create_route,
     load_companies,
     load_containers,
     load_dropp,
     load_points,
     load_routes,
     load_services,
+    sync_dropp,
+    sync_routes,
 )
 
 
-def remove_extra_spaces(value):
-    if isinstance(value, str):
-        return re.sub(r" {2,}", " ", value.strip())
-    return value
-
-
 def select_cols(processed_df: DataFrame, cols: list[str]):
     return processed_df[processed_df.columns.intersection(cols)]
 
@@ -43,19 +48,11 @@ def process_numeric_and_string_cols(processed_df: DataFrame, numeric_cols: set[s
     if string_cols:
         string_cols_list = list(string_cols)
         processed_df[string_cols_list] = (
-            processed_df[string_cols_list]
-            .apply(lambda x: x.str.strip() if x.dtype == "str" else x)
-            .apply(remove_extra_spaces)
+            processed_df[string_cols_list].apply(lambda x: x.str.strip() if x.dtype == "str" else x)
         )
 
-    if numeric_cols:
-        numeric_cols_list = list(numeric_cols)
-        processed_df[numeric_cols_list] = processed_df[numeric_cols_list].map(
-            lambda x: (
-                x.replace("%", "").replace("$", "").replace(" ", "")
-                if isinstance(x, str) else x
-            )
-        )
+    for col in numeric_cols:
+        processed_df[col] = clean_numeric_strings(processed_df[col])
 
     return processed_df
 
@@ -67,25 +64,17 @@ def process_points_services_effectivity(
     UploaderFieldsConfig,
     ws_name: str,
 ):
-    processed_df[fields_config.company] = (
-        processed_df[fields_config.company].apply(none_filter).str.strip().str.upper()
-    )
+    processed_df[fields_config.company] = strip_strings(processed_df[fields_config.company]).str.upper()
 
-    processed_df[fields_config.start_point] = processed_df[fields_config.start_point].apply(none_filter).str.strip()
-    processed_df[fields_config.end_point] = processed_df[fields_config.end_point].apply(none_filter).str.strip()
+    processed_df[fields_config.start_point] = strip_strings(processed_df[fields_config.start_point])
+    processed_df[fields_config.end_point] = strip_strings(processed_df[fields_config.end_point])
     processed_df[fields_config.terminal] = processed_df[fields_config.terminal].str.strip().str.upper()
 
     if fields_config.dropp_off_point in processed_df.columns:
-        processed_df[fields_config.dropp_off_point] = (
-            processed_df[fields_config.dropp_off_point].apply(none_filter).str.strip()
-        )
+        processed_df[fields_config.dropp_off_point] = strip_strings(processed_df[fields_config.dropp_off_point])
 
-    processed_df[fields_config.effective_from] = (
-        processed_df[fields_config.effective_from].apply(none_filter).apply(format_date)
-    )
-    processed_df[fields_config.effective_to] = (
-        processed_df[fields_config.effective_to].apply(none_filter).apply(format_date)
-    )
+    processed_df[fields_config.effective_from] = parse_dates(processed_df[fields_config.effective_from])
+    processed_df[fields_config.effective_to] = parse_dates(processed_df[fields_config.effective_to])
 
     # remove rows without dates
     df_dropna_subset = [
@@ -104,15 +93,20 @@ def process_points_services_effectivity(
 
 
 def process_conversion_percents(processed_df: DataFrame, fields_config: UploaderFieldsConfig):
-    processed_df[fields_config.conversation_percents] = (
-        processed_df[fields_config.conversation_percents].apply(
-            lambda x: (
-                remove_extra_spaces(x.strip()).rstrip("%").rstrip()
-                if isinstance(x, str) else
-                x * 100 if isinstance(x, float) else x
-            )
-        )
+    percents = processed_df[fields_config.conversation_percents]
+
+    if has_strings(percents):
+        strings = percents.str.strip().str.replace(r" {2,}", " ", regex=True).str.rstrip("%").str.rstrip()
+    else:
+        strings = pd.Series(None, index=percents.index, dtype=object)
+
+    numbers = pd.to_numeric(percents.where(strings.isna()), errors="coerce")
+    # cells of the percent format contain fractions, whole numbers are percents already
+    is_fraction = numbers % 1 != 0
+    processed_df[fields_config.conversation_percents] = strings.astype(object).fillna(
+        numbers.where(~is_fraction, numbers * 100)
     )
+
     return processed_df
 
 
@@ -130,13 +124,13 @@ def process_dropp_df(processed_dropp_df: DataFrame, warnings, fields_config: Upl
         },
     )
 
-    processed_dropp_df[fields_config.drop20] = processed_dropp_df[fields_config.drop20].apply(price_filter)
-    processed_dropp_df[fields_config.drop40] = processed_dropp_df[fields_config.drop40].apply(price_filter)
+    processed_dropp_df[fields_config.drop20] = parse_prices(processed_dropp_df[fields_config.drop20])
+    processed_dropp_df[fields_config.drop40] = parse_prices(processed_dropp_df[fields_config.drop40])
 
     processed_dropp_df = process_points_services_effectivity(processed_dropp_df, warnings, fields_config, "DROPP")
     processed_dropp_df = process_conversion_percents(processed_dropp_df, fields_config)
     processed_dropp_df[fields_config.container_condition] = (
-        processed_dropp_df[fields_config.container_condition].apply(none_filter)
+        none_filter(processed_dropp_df[fields_config.container_condition])
     )
 
     missing_info_about_id = defaultdict(list)
@@ -202,13 +196,13 @@ def process_routes_df(processed_routes_df, route_type: RouteType, warnings, fiel
     processed_routes_df = process_conversion_percents(processed_routes_df, fields_config)
 
     processed_routes_df[fields_config.container_condition] = (
-        processed_routes_df[fields_config.container_condition].apply(none_filter)
+        none_filter(processed_routes_df[fields_config.container_condition])
     )
     processed_routes_df[fields_config.container_transfer_terms] = (
-        processed_routes_df[fields_config.container_transfer_terms].apply(none_filter)
+        none_filter(processed_routes_df[fields_config.container_transfer_terms])
     )
     processed_routes_df[fields_config.container_shipment_terms] = (
-        processed_routes_df[fields_config.container_shipment_terms].apply(none_filter)
+        none_filter(processed_routes_df[fields_config.container_shipment_terms])
     )
 
     routes_df_dropna_subset = [
@@ -236,22 +230,12 @@ def process_routes_df(processed_routes_df, route_type: RouteType, warnings, fiel
     processed_routes_df = processed_routes_df.dropna(subset=routes_df_dropna_subset)
 
     if route_type is RouteType.SEA:
-        processed_routes_df[fields_config.sea_20dc] = (
-            processed_routes_df[fields_config.sea_20dc].apply(price_filter)
-        )
-        processed_routes_df[fields_config.sea_40hc] = (
-            processed_routes_df[fields_config.sea_40hc].apply(price_filter)
-        )
+        processed_routes_df[fields_config.sea_20dc] = parse_prices(processed_routes_df[fields_config.sea_20dc])
+        processed_routes_df[fields_config.sea_40hc] = parse_prices(processed_routes_df[fields_config.sea_40hc])
     elif route_type is RouteType.RAIL:
-        processed_routes_df[fields_config.rail_40hc] = (
-            processed_routes_df[fields_config.rail_40hc].apply(price_filter)
-        )
-        processed_routes_df[fields_config.rail_20dc24t] = (
-            processed_routes_df[fields_config.rail_20dc24t].apply(price_filter)
-        )
-        processed_routes_df[fields_config.rail_20dc28t] = (
-            processed_routes_df[fields_config.rail_20dc28t].apply(price_filter)
-        )
+        processed_routes_df[fields_config.rail_40hc] = parse_prices(processed_routes_df[fields_config.rail_40hc])
+        processed_routes_df[fields_config.rail_20dc24t] = parse_prices(processed_routes_df[fields_config.rail_20dc24t])
+        processed_routes_df[fields_config.rail_20dc28t] = parse_prices(processed_routes_df[fields_config.rail_20dc28t])
     else:
         raise InvalidRouteTypeException(route_type)
 
@@ -326,16 +310,15 @@ def points_city_concat_terminal(points_df_merged_with_terminal: DataFrame, field
     )]
 
 
-async def load_data(  # noqa: C901
-    db_session,
+def prepare_data(
     sea_routes_df: DataFrame,
     rail_routes_df: DataFrame,
     dropp_df: DataFrame,
     services_df: DataFrame,
     points_df: DataFrame,
     fields_config: UploaderFieldsConfig,
-    load_on_warnings: bool = False,
-):
+) -> tuple[DataFrame, DataFrame, DataFrame, DataFrame, list[Any]]:
+    """Cleans the sheets; returns routes, dropp, services, points and warnings"""
     warnings: list[Any] = []
     # cleanup DF points
     points_df = points_df.apply(lambda x: x.str.strip() if x.dtype == "str" else x)
@@ -432,67 +415,108 @@ async def load_data(  # noqa: C901
         dropp_df.loc[mask, fields_config.start_point] + " (" + dropp_df.loc[mask, fields_config.terminal] + ")"
     )
 
-    # load points
-    points_data = await load_points(db_session, points_df) or []
-    del points_df
-
-    # hash points
-    hashed_points = {}
-    for point in points_data:
-        hashed_points[point.city.lower()] = hashed_points[point.RU_city.lower()] = point
-    points = hashed_points
-
-    # load companies
-    companies = await load_companies(
-        db_session,
-        set(routes_df[fields_config.company].tolist()) | set(dropp_df[fields_config.company].tolist()),
-    )
-
-    # load containers
-    containers = await load_containers(db_session, [
-        {"size": 20, "weight_from": 0, "weight_to": 24, "type": "DC", "name": "20DC≤24t"},
-        {"size": 20, "weight_from": 24, "weight_to": 28, "type": "DC", "name": "20DC 24-28t"},
-        {"size": 40, "weight_from": 0, "weight_to": 28, "type": "HC", "name": "40HC≤28t"},
-    ])
-
-    # load services
-    services = await load_services(db_session, services_df, fields_config)
-    del services_df
-
-    # load routes
-    routes_lst = []
-
-    for index, row in routes_df.iterrows():
-        route_type, i = index
-        try:
-            route = create_route(containers, companies, points, services, row, fields_config, route_type)
-        except (LoadingErrorException, ValueError) as e:
-            warnings.append((e, i, route_type))
-            continue
+    return routes_df, dropp_df, services_df, points_df, warnings
 
-        if route:
-            routes_lst.append(route)
 
-    del routes_df
-
-    # load dropp
-    dropp_lst = []
-
-    for i, row in dropp_df.iterrows():
-        try:
-            drop = create_dropp(containers, companies, points, row, fields_config)
-        except (LoadingErrorException, ValueError) as e:
-            warnings.append((e, i, None))
-            continue
-
-        if drop:
-            dropp_lst.append(drop)
-
-    del dropp_df
-
-    if warnings and not load_on_warnings:
-        return False, len(routes_lst), warnings
+async def load_data(
+    db_session,
+    sea_routes_df: DataFrame,
+    rail_routes_df: DataFrame,
+    dropp_df: DataFrame,
+    services_df: DataFrame,
+    points_df: DataFrame,
+    fields_config: UploaderFieldsConfig,
+    load_on_warnings: bool = False,
+    diff: bool = False,
+    stages: StageTimer | None = None,
+    clean_cache_key: str | None = None,
+    validate_only: bool = False,
+):
+    """
+    Loads the sheets into the DB; returns whether the routes are loaded, the count of valid routes, warnings and
+    counts of inserted, changed, removed and unchanged routes and dropp.
+
+    With `diff` the DB is synchronized with the sheets: changed rows are rewritten and rows which are gone are deleted.
+    Pandas work runs in the loading pool, so the event loop keeps serving other requests; only DB work runs on it.
+    Cleaned sheets are cached by `clean_cache_key` (a revision of the sheets with the fields config).
+    With `validate_only` nothing is written: rows are resolved against snapshots of points, companies, containers
+    and services, and the routes are never loaded.
+    """
+    stages = stages or StageTimer()
+
+    async with stages.stage("clean"):
+        prepared = None
+        if clean_cache_key is not None:
+            prepared = await asyncio.to_thread(get_sheets_cache().get, clean_cache_key)
+
+        if prepared is None:
+            prepared = await get_loading_pool().run(
+                prepare_data,
+                sea_routes_df,
+                rail_routes_df,
+                dropp_df,
+                services_df,
+                points_df,
+                fields_config,
+            )
+            if clean_cache_key is not None:
+                await asyncio.to_thread(get_sheets_cache().set, clean_cache_key, prepared)
+
+        routes_df, dropp_df, services_df, points_df, warnings = prepared
+    del sea_routes_df, rail_routes_df, prepared
+
+    async with stages.stage("reference_data"):
+        # load points
+        points_data = await load_points(db_session, points_df, read_only=validate_only) or []
+        del points_df
+
+        # hash points
+        hashed_points = {}
+        for point in points_data:
+            hashed_points[point.city.lower()] = hashed_points[point.RU_city.lower()] = point
+        points = hashed_points
+
+        # load companies
+        companies = await load_companies(
+            db_session,
+            set(routes_df[fields_config.company].tolist()) | set(dropp_df[fields_config.company].tolist()),
+            read_only=validate_only,
+        )
 
-    await load_routes(db_session, routes_lst)
-    await load_dropp(db_session, dropp_lst)
-    return True, len(routes_lst), warnings
+        # load containers
+        containers = await load_containers(db_session, [
+            {"size": 20, "weight_from": 0, "weight_to": 24, "type": "DC", "name": "20DC≤24t"},
+            {"size": 20, "weight_from": 24, "weight_to": 28, "type": "DC", "name": "20DC 24-28t"},
+            {"size": 40, "weight_from": 0, "weight_to": 28, "type": "HC", "name": "40HC≤28t"},
+        ], read_only=validate_only)
+
+        # load services
+        services = await load_services(db_session, services_df, fields_config, read_only=validate_only)
+        del services_df
+
+    async with stages.stage("build"):
+        routes, dropp, warnings = await get_loading_pool().run(
+            build_rows,
+            routes_df,
+            dropp_df,
+            ReferenceIds.from_stores(points, companies, containers, services),
+            fields_config,
+            warnings,
+        )
+    del routes_df, dropp_df
+
+    if validate_only or warnings and not load_on_warnings:
+        return False, len(routes), warnings, None
+
+    async with stages.stage("write"):
+        if diff:
+            changes = {
+                "routes": await sync_routes(db_session, routes.routes, routes.prices, routes.service_prices),
+                "dropp": await sync_dropp(db_session, dropp),
+            }
+        else:
+            changes = {
+                "routes": await load_routes(db_session, routes.routes, routes.prices, routes.service_prices),
+                "dropp": await load_dropp(db_session, dropp),
+            }
+    return True, len(routes), warnings, changes
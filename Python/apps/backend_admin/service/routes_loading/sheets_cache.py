@@ -0,0 +1,93 @@
+import hashlib
+import logging
+import os
+import pickle
+import stat
+import tempfile
+import time
+from contextlib import suppress
+from functools import cache
+from typing import Any
+
+from backend_admin.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Revisions are replaced by new ones, so old entries are only removed by age
+SHEETS_CACHE_MAX_AGE = 7 * 24 * 3600
+
+
+def sheets_cache_key(*parts: Any) -> str:
+    return hashlib.sha1("\x1f".join(map(str, parts)).encode()).hexdigest()
+
+
+class SheetsCache:
+    """
+    Local cache of frames parsed from sheets, keyed by revisions of spreadsheets.
+
+    Entries are pickled, and loading a pickle runs code: the directory must be writable by the user of this process
+    only, so it's created with mode 0700 and the cache is disabled if the directory belongs to another user.
+    """
+
+    def __init__(self, directory: str, max_age: int = SHEETS_CACHE_MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _is_private(self) -> bool:
+        """Creates the directory, or makes an existing one of this user private; False for directories of others"""
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            directory_stat = os.lstat(self.directory)
+            if stat.S_ISDIR(directory_stat.st_mode) and directory_stat.st_uid == os.getuid():
+                if stat.S_IMODE(directory_stat.st_mode) != 0o700:
+                    os.chmod(self.directory, 0o700)
+                return True
+        except OSError:
+            logger.exception("Failed to create sheets cache directory %s", self.directory)
+            return False
+
+        logger.error("Sheets cache directory %s is not a directory of this user, the cache is disabled", self.directory)
+        return False
+
+    def get(self, key: str) -> Any | None:
+        if not self._is_private():
+            return None
+
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception("Failed to read sheets cache entry %s", key)
+            return None
+
+    def set(self, key: str, value: Any) -> None:  # noqa: A003
+        if not self._is_private():
+            return
+
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            logger.exception("Failed to write sheets cache entry %s", key)
+            return
+
+        self._remove_expired()
+
+    def _remove_expired(self) -> None:
+        expired_before = time.time() - self.max_age
+        for entry in os.scandir(self.directory):
+            with suppress(OSError):
+                if entry.stat().st_mtime < expired_before:
+                    os.remove(entry.path)
+
+
+@cache
+def get_sheets_cache() -> SheetsCache:
+    return SheetsCache(get_settings().SHEETS_CACHE_DIR)
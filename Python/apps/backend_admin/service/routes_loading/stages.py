@@ -0,0 +1,39 @@
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimer:
+    """Measures stages of an upload; `on_change` is awaited when a stage starts and when it is finished"""
+
+    def __init__(self, on_change: Callable[[], Awaitable[None]] | None = None):
+        self.current: str | None = None
+        # the stage which raised an error
+        self.failed: str | None = None
+        self.timings: dict[str, float] = {}
+        self._on_change = on_change
+
+    async def _notify(self) -> None:
+        if self._on_change is not None:
+            await self._on_change()
+
+    @asynccontextmanager
+    async def stage(self, name: str) -> AsyncIterator[None]:
+        self.current = name
+        await self._notify()
+
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.failed = name
+            raise
+        finally:
+            self.timings[name] = round(time.perf_counter() - start, 3)
+            logger.info("Upload stage %s: %.3fs", name, self.timings[name])
+
+            self.current = None
+            await self._notify()
@@ -1,32 +1,27 @@
-from collections.abc import Iterable
+import asyncio
+import itertools
+from collections.abc import Iterator
+from dataclasses import dataclass
 
 import pandas as pd
 from backend_admin.models.upoader_fields_config import UploaderFieldsConfig
+from module_data_internal.route_combinations import mark_route_combinations_stale
 from module_data_internal.schemas import (
     CompanyModel,
     ContainerModel,
-    ContainerOwner,
-    ContainerShipmentTerms,
-    ContainerTransferTerms,
     ContainerType,
     DropModel,
     PointModel,
     PriceModel,
     RouteModel,
-    RouteType,
     ServiceModel,
     ServicePriceModel,
 )
+from module_shared.data_version import CONTAINERS_DATA_VERSION, bump_data_version
 from pandas import DataFrame
 from sqlalchemy import select
-from sqlalchemy.orm import joinedload
 
-from .errors import (
-    InvalidDroppRow,
-    InvalidRouteTypeException,
-    NoPriceInRouteException,
-    PointNotFoundException,
-)
+from .bulk import bulk_delete, bulk_insert, bulk_select, bulk_update, bulk_upsert
 from .helpers import nan_to_none_mapper
 
 ContainerRawType = dict[str, str | int | ContainerType]
@@ -40,9 +35,27 @@ ServicesStore = dict[str, ServiceModel]
 PointsStore = list[PointModel]
 PointsHashedStore = dict[str, PointModel]
 
+# Columns of loaded rows which are rewritten from sheets
+_ROUTE_UPDATE_COLUMNS = ("type", "comment", "timetable", "content_hash", "fingerprint")
+_DROP_UPDATE_COLUMNS = ("price", "conversation_percents", "currency", "content_hash", "fingerprint")
+
+# Rows of a frame converted to records at once
+RECORDS_CHUNK_SIZE = 2_000
+
+
+def _placeholder_ids() -> Iterator[int]:
+    """
+    Ids of rows which are not written in the read-only mode.
 
-async def load_companies(db_session, companies) -> CompaniesStore:
+    They are negative, so they never match ids of rows in the DB, but rows refer to them like to written ones.
+    """
+    return itertools.count(-1, -1)
+
+
+async def load_companies(db_session, companies, read_only: bool = False) -> CompaniesStore:
+    """Returns companies by their names; new companies are written, or only built with placeholder ids if `read_only`"""
     models = {}
+    placeholder_ids = _placeholder_ids()
     existing_models = (await db_session.execute(select(CompanyModel))).scalars().all()
 
     for company in existing_models:
@@ -50,40 +63,54 @@ async def load_companies(db_session, companies) -> CompaniesStore:
 
     for company in companies:
         if not models.get(company):
+            if read_only:
+                models[company] = CompanyModel(id=next(placeholder_ids), name=company)
+                continue
+
             models[company] = await db_session.merge(
                 CompanyModel(name=company),
                 load=True,
             )
 
-    await db_session.commit()
+    if not read_only:
+        await db_session.commit()
     return models
 
 
-async def load_points(db_session, df) -> PointsStore:
-    models: list[PointModel | None] = [None] * len(df)
+async def load_points(db_session, df, read_only: bool = False) -> PointsStore:
+    """Returns the point of every row; new points are written, or only built with placeholder ids if `read_only`"""
     existing_points = (await db_session.execute(select(PointModel))).scalars().all()
-    existing_models_lower = {point.city.lower(): point for point in existing_points}
+    known_cities = {point.city.lower() for point in existing_points}
 
-    for i, row in enumerate(df.itertuples()):
+    cities: list[str] = []
+    new_points: list[dict] = []
+    for row in df.itertuples(index=False):
         arguments = row._asdict()
-        del arguments["Index"]
+        city = arguments["city"].lower()
+        cities.append(city)
 
-        point = existing_models_lower.get(arguments["city"].lower())
-        if not point:
-            point = await db_session.merge(
-                PointModel(**arguments),
-                load=True,
-            )
-            existing_models_lower[point.city.lower()] = point
+        if city not in known_cities:
+            new_points.append(arguments)
+            known_cities.add(city)
 
-        models[i] = point
+    if read_only:
+        placeholder_ids = _placeholder_ids()
+        existing_points = [*existing_points, *(PointModel(id=next(placeholder_ids), **point) for point in new_points)]
+    elif new_points:
+        await bulk_upsert(db_session, PointModel, new_points, ("RU_city", "RU_country"))
+        existing_points = (await db_session.execute(select(PointModel))).scalars().all()
 
-    await db_session.commit()
-    return models  # type: ignore[return-value]
+    existing_models_lower = {point.city.lower(): point for point in existing_points}
+
+    if not read_only:
+        await db_session.commit()
+    return [existing_models_lower[city] for city in cities]
 
 
-async def load_services(db_session, df: DataFrame, fc: UploaderFieldsConfig) -> ServicesStore:
+async def load_services(db_session, df: DataFrame, fc: UploaderFieldsConfig, read_only: bool = False) -> ServicesStore:
+    """Returns services by their internal names; new services are written, or only built if `read_only`"""
     models = {}
+    placeholder_ids = _placeholder_ids()
     existing_models = (await db_session.execute(select(ServiceModel))).scalars().all()
 
     for service in existing_models:
@@ -102,23 +129,29 @@ async def load_services(db_session, df: DataFrame, fc: UploaderFieldsConfig) ->
             else:
                 mandatory = default = True
 
-            models[internal_name] = await db_session.merge(
-                ServiceModel(
-                    name=row[fc.service_name],
-                    internal_name=internal_name,
-                    description=nan_to_none_mapper(row[fc.description]) or "",
-                    mandatory=mandatory,
-                    default=default,
-                ),
-                load=True,
+            service = ServiceModel(
+                name=row[fc.service_name],
+                internal_name=internal_name,
+                description=nan_to_none_mapper(row[fc.description]) or "",
+                mandatory=mandatory,
+                default=default,
             )
+            if read_only:
+                service.id = next(placeholder_ids)
+                models[internal_name] = service
+            else:
+                models[internal_name] = await db_session.merge(service, load=True)
 
-    await db_session.commit()
+    if not read_only:
+        await db_session.commit()
     return models
 
 
-async def load_containers(db_session, containers: list[ContainerRawType]) -> ContainerStore:
+async def load_containers(db_session, containers: list[ContainerRawType], read_only: bool = False) -> ContainerStore:
+    """Returns containers by their sizes and weights; new containers are written, or only built if `read_only`"""
     models = {}
+    placeholder_ids = _placeholder_ids()
+    is_changed = False
     existing_models = (await db_session.execute(select(ContainerModel))).scalars().all()
 
     for container in existing_models:
@@ -135,304 +168,255 @@ async def load_containers(db_session, containers: list[ContainerRawType]) -> Con
             container["weight_to"],
         )
         if not models.get(container_complex_id):
-            container["type"] = ContainerType(container["type"])
+            container = {**container, "type": ContainerType(container["type"])}
+            if read_only:
+                models[container_complex_id] = ContainerModel(id=next(placeholder_ids), **container)
+                continue
+
             models[container_complex_id] = await db_session.merge(
                 ContainerModel(**container),
                 load=True,
             )
+            is_changed = True
+
+    if read_only:
+        return models
 
     await db_session.commit()
+    if is_changed:
+        await bump_data_version(CONTAINERS_DATA_VERSION)
     return models
 
 
-def create_route_service(
-    route: RouteModel,
-    services: ServicesStore,
-    container: ContainerModel | None,
-    service_column_name: str,
-    row,
-    fc: UploaderFieldsConfig,
-):
-    price_column = getattr(fc, service_column_name)
-    currency_column = getattr(fc, f"{service_column_name}_currency")
-
-    internal_service_name = price_column.split("#")[0].strip()
-    service = services.get(internal_service_name)
-    if not service:
-        return
-
-    currency = row[currency_column]
-    price = nan_to_none_mapper(row[price_column])
-    if not price:
-        return
-
-    return ServicePriceModel(
-        route=route,
-        service=service,
-        container=container,
-        currency=nan_to_none_mapper(currency) or "USD",
-        price=float(price),
+async def _find_by_fingerprints(db_session, model, fingerprints) -> dict[str, tuple[int, str | None]]:
+    """
+    Ids and content hashes of existing rows by their fingerprints, probed by the fingerprint index.
+
+    Of rows with the same fingerprint the latest one is returned.
+    """
+    rows = await bulk_select(
+        db_session,
+        select(model.fingerprint, model.id, model.content_hash).order_by(model.id),
+        model.fingerprint,
+        list(set(fingerprints)),
     )
+    return {fingerprint: (row_id, content_hash) for fingerprint, row_id, content_hash in rows}
 
 
-def create_route_services(
-    route: RouteModel,
-    services: ServicesStore,
-    containers: ContainerStore,
-    row,
-    fc: UploaderFieldsConfig,
-):
-    for service_column_name in fc.services:
-        create_route_service(route, services, None, service_column_name, row, fc)
-
-    for service_column_name, container_descriptor in fc.services_with_container.items():
-        container = containers.get(container_descriptor)
-        if container:
-            create_route_service(route, services, container, service_column_name, row, fc)
-
-
-def create_route(  # noqa: C901
-    containers: ContainerStore,
-    companies: CompaniesStore,
-    points: PointsHashedStore,
-    services: ServicesStore,
-    row,
-    fc: UploaderFieldsConfig,
-    route_type: RouteType,
-):
-    # Container terms
-    ctt = ContainerTransferTerms(row[fc.container_transfer_terms].upper())
-    cst = ContainerShipmentTerms(row[fc.container_shipment_terms].upper())
-    co = ContainerOwner(row[fc.container_condition].upper())
-
-    sea_prices = None, None
-    rail_prices = None, None, None
-
-    if route_type is RouteType.SEA:
-        sea_prices = tuple(map(nan_to_none_mapper, (
-            row[fc.sea_20dc],
-            row[fc.sea_40hc],
-        )))
-
-        if not any(sea_prices):
-            raise NoPriceInRouteException
-
-    elif route_type is RouteType.RAIL:
-        rail_prices = tuple(map(nan_to_none_mapper, (
-            row[fc.rail_20dc24t],
-            row[fc.rail_20dc28t],
-            row[fc.rail_40hc],
-        )))
-
-        if not any(rail_prices):
-            raise NoPriceInRouteException
-
-    else:
-        raise InvalidRouteTypeException(route_type)
-
-    company = companies[row[fc.company].upper()]
-
-    try:
-        start_point = points[row[fc.start_point].lower()]
-        end_point = points[row[fc.end_point].lower()]
-        dropp_off_point = (
-            None if fc.dropp_off_point not in set(row.index.tolist()) or pd.isna(row[fc.dropp_off_point])
-            else points[row[fc.dropp_off_point].lower()]
-        )
-    except KeyError as e:
-        raise PointNotFoundException(e.args[0]) from e
-
-    effective_from = row[fc.effective_from]
-    effective_to = row[fc.effective_to]
-
-    is_through_raw = row[fc.is_through]
-    is_through = pd.isna(is_through_raw) or is_through_raw == 1.0 or is_through_raw == "1"
-
-    route = RouteModel(
-        type=RouteType(route_type),
-        company=company,
-        start_point=start_point,
-        end_point=end_point,
-        dropp_off_point=dropp_off_point,
-        effective_from=effective_from,
-        effective_to=effective_to,
-        comment=nan_to_none_mapper(row[fc.comment]),
-        timetable=nan_to_none_mapper(row[fc.timetable]),
-        container_transfer_terms=ctt,
-        container_shipment_terms=cst,
-        container_owner=co,
-        is_through=is_through,
+async def _get_loaded_fingerprints(db_session, model) -> list[tuple[str, int]]:
+    """Fingerprints and ids of rows loaded from sheets (having a content hash)"""
+    rows = await db_session.execute(select(model.fingerprint, model.id).where(model.content_hash.is_not(None)))
+    return [tuple(row) for row in rows.all()]
+
+
+def _get_removed_ids(
+    loaded: list[tuple[str, int]],
+    seen: set[str],
+    stored: dict[str, tuple[int, str | None]],
+) -> list[int]:
+    """Ids of loaded rows which are gone from the sheets and of duplicates of the stored rows"""
+    return [row_id for row_key, row_id in loaded if row_key not in seen or row_id != stored[row_key][0]]
+
+
+async def _records(df: DataFrame) -> list[dict]:
+    """Rows of the frame with missing values replaced by None; the event loop serves requests between chunks"""
+    records = []
+    for start in range(0, len(df), RECORDS_CHUNK_SIZE):
+        chunk = df.iloc[start:start + RECORDS_CHUNK_SIZE]
+        records.extend(chunk.astype(object).where(chunk.notna(), None).to_dict("records"))
+        await asyncio.sleep(0)
+    return records
+
+
+@dataclass
+class DiffCounts:
+    inserted: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+
+async def _write_route_prices(db_session, route_ids: pd.Series, prices: DataFrame, service_prices: DataFrame):
+    """Writes prices and service prices of routes; `route_ids` are ids of routes by their positions"""
+    async def with_route_ids(rows: DataFrame) -> list[dict]:
+        rows = rows[rows["route"].isin(route_ids.index)]
+        return await _records(rows.assign(route_id=rows["route"].map(route_ids)).drop(columns="route"))
+
+    await bulk_upsert(
+        db_session, PriceModel, await with_route_ids(prices), ("value", "currency", "conversation_percents"),
     )
+    await bulk_insert(db_session, ServicePriceModel, await with_route_ids(service_prices))
+
+
+async def _write_routes(
+    db_session,
+    route_rows: list[dict],
+    route_keys: dict[int, str],
+    prices: DataFrame,
+    service_prices: DataFrame,
+) -> list[int]:
+    """
+    Upserts routes and writes their prices; `route_keys` are fingerprints of the routes by their positions.
+
+    Returns ids of the written routes.
+    """
+    await bulk_upsert(db_session, RouteModel, route_rows, _ROUTE_UPDATE_COLUMNS)
+    found = await _find_by_fingerprints(db_session, RouteModel, route_keys.values())
+    route_ids = pd.Series({position: found[route_key][0] for position, route_key in route_keys.items()})
+    await _write_route_prices(db_session, route_ids, prices, service_prices)
+    return route_ids.tolist()
+
+
+async def load_routes(db_session, routes: DataFrame, prices: DataFrame, service_prices: DataFrame) -> DiffCounts:
+    """
+    Writes new routes with their prices and service prices; routes which are already loaded are skipped.
+
+    Prices and service prices refer to routes by the index of `routes` in the column `route`.
+    """
+    existing_routes = set(await _find_by_fingerprints(db_session, RouteModel, routes["fingerprint"]))
+
+    # fingerprints of new routes by their positions
+    new_routes: dict[int, str] = {}
+    route_rows = []
+    for position, row in zip(routes.index, await _records(routes)):
+        route_key = row["fingerprint"]
+        if route_key in existing_routes:
+            continue
 
-    conversation = nan_to_none_mapper(row[fc.conversation_percents])
-
-    if route.type is RouteType.SEA:
-        dc20_24t = sea_prices[0]
-        dc20_24t_currency = "USD" if pd.isna(row[fc.sea_20dc_currency]) else row[fc.sea_20dc_currency].strip().upper()
-        dc20_28t = dc20_24t
-        dc20_28t_currency = dc20_24t_currency
-        hc40 = sea_prices[1]
-        hc40_currency = "USD" if pd.isna(row[fc.sea_40hc_currency]) else row[fc.sea_40hc_currency].strip().upper()
-    elif route.type is RouteType.RAIL:
-        dc20_24t = rail_prices[0]
-        dc20_24t_currency = (
-            "РУБ" if pd.isna(row[fc.rail_20dc24t_currency]) else row[fc.rail_20dc24t_currency].strip().upper()
-        )
-        dc20_28t = rail_prices[1]
-        dc20_28t_currency = (
-            "РУБ" if pd.isna(row[fc.rail_20dc28t_currency]) else row[fc.rail_20dc28t_currency].strip().upper()
-        )
-        hc40 = rail_prices[2]
-        hc40_currency = "РУБ" if pd.isna(row[fc.rail_40hc_currency]) else row[fc.rail_40hc_currency].strip().upper()
-    else:
-        raise InvalidRouteTypeException(route_type)
-
-    if dc20_24t is not None:
-        PriceModel(
-            container=containers[(20, 0, 24)],
-            route=route,
-            currency=dc20_24t_currency,
-            value=dc20_24t,
-            conversation_percents=conversation,
-        )
-    if dc20_28t is not None:
-        PriceModel(
-            container=containers[(20, 24, 28)],
-            route=route,
-            currency=dc20_28t_currency,
-            value=dc20_28t,
-            conversation_percents=conversation,
-        )
-    if hc40 is not None:
-        PriceModel(
-            container=containers[(40, 0, 28)],
-            route=route,
-            currency=hc40_currency,
-            value=hc40,
-            conversation_percents=conversation,
-        )
+        existing_routes.add(route_key)
+        new_routes[position] = route_key
+        route_rows.append(row)
 
-    create_route_services(route, services, containers, row, fc)
-
-    return route
-
-
-def create_dropp(
-    containers: ContainerStore,
-    companies: CompaniesStore,
-    points: PointsHashedStore,
-    row,
-    fc: UploaderFieldsConfig,
-):
-    company = companies.get(row[fc.company].upper())
-    start_point = points.get(row[fc.start_point].lower())
-    end_point = points.get(row[fc.end_point].lower())
-    effective_from = row[fc.effective_from]
-    effective_to = row[fc.effective_to]
-
-    currency = "USD"
-    price_20dc = row[fc.drop20]
-    price_40hc = row[fc.drop40]
-    conversation_percents = row[fc.conversation_percents]
-
-    if not all((company, start_point, end_point, effective_from, effective_to)):
-        raise InvalidDroppRow
-
-    base_config = {
-        "start_point": start_point,
-        "end_point": end_point,
-        "company": company,
-        "effective_from": effective_from,
-        "effective_to": effective_to,
-        "conversation_percents": conversation_percents,
-        "currency": currency,
-    }
-
-    all_dropp: list[DropModel] = []
-    if price_20dc is not None and not pd.isna(price_20dc):
-        all_dropp.extend((
-            DropModel(**base_config, price=price_20dc, container=containers[(20, 0, 24)]),
-            DropModel(**base_config, price=price_20dc, container=containers[(20, 24, 28)]),
-        ))
-    if price_40hc is not None and not pd.isna(price_40hc):
-        all_dropp.append(DropModel(**base_config, price=price_40hc, container=containers[(40, 0, 28)]))
-
-    return all_dropp
-
-
-async def load_routes(db_session, routes):
-    existing_routes = (await db_session.execute(select(RouteModel).options(
-        joinedload(RouteModel.start_point),
-        joinedload(RouteModel.end_point),
-        joinedload(RouteModel.company),
-    ))).scalars().all()
-
-    existing_routes_set = {(
-        route.company.name,
-        route.start_point.city,
-        route.end_point.city,
-        route.dropp_off_point.city if route.dropp_off_point else None,
-        route.effective_from if isinstance(route.effective_from, str) else route.effective_from.date().isoformat(),
-        route.effective_to if isinstance(route.effective_to, str) else route.effective_to.date().isoformat(),
-        route.container_shipment_terms,
-        route.container_transfer_terms,
-        route.container_owner,
-        route.is_through,
-    ) for route in existing_routes}
-
-    for route in routes:
-        route_key = (
-            route.company.name,
-            route.start_point.city,
-            route.end_point.city,
-            route.dropp_off_point.city if route.dropp_off_point else None,
-            route.effective_from if isinstance(route.effective_from, str) else route.effective_from.date().isoformat(),
-            route.effective_to if isinstance(route.effective_to, str) else route.effective_to.date().isoformat(),
-            route.container_shipment_terms,
-            route.container_transfer_terms,
-            route.container_owner,
-            route.is_through,
-        )
-        if route_key in existing_routes_set:
+    if route_rows:
+        written_ids = await _write_routes(db_session, route_rows, new_routes, prices, service_prices)
+        mark_route_combinations_stale(db_session, route_ids=written_ids)
+
+    await db_session.commit()
+    return DiffCounts(inserted=len(route_rows), unchanged=len(routes) - len(route_rows))
+
+
+async def sync_routes(db_session, routes: DataFrame, prices: DataFrame, service_prices: DataFrame) -> DiffCounts:
+    """
+    Applies the difference between the sheets and loaded routes: writes new routes, rewrites routes whose content
+    hash is changed with their prices and service prices and deletes routes loaded from sheets which are gone
+    (or duplicate other routes).
+
+    Routes without a content hash (created by hand or loaded before hashes) are never deleted.
+    """
+    stored_routes = await _find_by_fingerprints(db_session, RouteModel, routes["fingerprint"])
+
+    counts = DiffCounts()
+    seen: set[str] = set()
+    # fingerprints of new routes and ids of changed routes by their positions
+    new_routes: dict[int, str] = {}
+    changed_routes: dict[int, int] = {}
+    route_rows = []
+    changed_rows = []
+    for position, row in zip(routes.index, await _records(routes)):
+        route_key = row["fingerprint"]
+        if route_key in seen:
             continue
+        seen.add(route_key)
 
-        await db_session.merge(route)
-        existing_routes_set.add(route_key)
+        stored = stored_routes.get(route_key)
+        if stored and stored[1] == row["content_hash"]:
+            counts.unchanged += 1
+            continue
+
+        if stored:
+            counts.changed += 1
+            changed_routes[position] = stored[0]
+            changed_rows.append({**row, "id": stored[0]})
+        else:
+            counts.inserted += 1
+            new_routes[position] = route_key
+            route_rows.append(row)
+
+    loaded_routes = await _get_loaded_fingerprints(db_session, RouteModel)
+    removed_ids = _get_removed_ids(loaded_routes, seen, stored_routes)
+    counts.removed = len(removed_ids)
+
+    changed_ids = list(changed_routes.values())
+    # prices of changed routes are written again
+    await bulk_delete(db_session, ServicePriceModel.route_id, changed_ids + removed_ids)
+    await bulk_delete(db_session, PriceModel.route_id, changed_ids + removed_ids)
+    await bulk_delete(db_session, RouteModel.id, removed_ids)
+
+    # changed routes are updated by ids: their unique keys may have NULLs (no dropp-off point),
+    # which never conflict, so an upsert would insert them again
+    await bulk_update(db_session, RouteModel, changed_rows)
+    await _write_route_prices(db_session, pd.Series(changed_routes, dtype=object), prices, service_prices)
+
+    written_ids = []
+    if route_rows:
+        written_ids = await _write_routes(db_session, route_rows, new_routes, prices, service_prices)
+    mark_route_combinations_stale(db_session, route_ids=changed_ids + written_ids + removed_ids)
 
     await db_session.commit()
+    return counts
 
 
-async def load_dropp(db_session, dropp: list[Iterable[DropModel]]):
-    existing_dropp = (await db_session.execute(select(DropModel).options(
-        joinedload(DropModel.start_point),
-        joinedload(DropModel.end_point),
-        joinedload(DropModel.company),
-        joinedload(DropModel.container),
-    ))).scalars().all()
-
-    existing_dropp_set = {(
-        item.start_point.city,
-        item.end_point.city,
-        item.company.name,
-        (item.container.size, item.container.weight_from, item.container.weight_to),
-        item.effective_from if isinstance(item.effective_from, str) else item.effective_from.date().isoformat(),
-        item.effective_to if isinstance(item.effective_to, str) else item.effective_to.date().isoformat(),
-    ) for item in existing_dropp}
-
-    for items_group in dropp:
-        for item in items_group:
-            dropp_key = (
-                item.start_point.city,
-                item.end_point.city,
-                item.company.name,
-                (item.container.size, item.container.weight_from, item.container.weight_to),
-                item.effective_from if isinstance(item.effective_from, str) else item.effective_from.date().isoformat(),
-                item.effective_to if isinstance(item.effective_to, str) else item.effective_to.date().isoformat(),
-            )
-            if dropp_key in existing_dropp_set:
-                continue
+async def _get_dropp_ids(db_session, dropp_rows: list[dict]) -> list[int]:
+    """Ids of written dropp"""
+    found = await _find_by_fingerprints(db_session, DropModel, [row["fingerprint"] for row in dropp_rows])
+    return [drop_id for drop_id, _ in found.values()]
+
+
+async def load_dropp(db_session, dropp: DataFrame) -> DiffCounts:
+    existing_dropp = set(await _find_by_fingerprints(db_session, DropModel, dropp["fingerprint"]))
+
+    new_dropp: set[str] = set()
+    dropp_rows = []
+    for row in await _records(dropp):
+        dropp_key = row["fingerprint"]
+        if dropp_key in existing_dropp or dropp_key in new_dropp:
+            continue
+
+        new_dropp.add(dropp_key)
+        dropp_rows.append(row)
+
+    await bulk_upsert(db_session, DropModel, dropp_rows, _DROP_UPDATE_COLUMNS)
+    mark_route_combinations_stale(db_session, drop_ids=await _get_dropp_ids(db_session, dropp_rows))
+    await db_session.commit()
+    return DiffCounts(inserted=len(dropp_rows), unchanged=len(dropp) - len(dropp_rows))
+
 
-            await db_session.merge(item)
-            existing_dropp_set.add(dropp_key)
+async def sync_dropp(db_session, dropp: DataFrame) -> DiffCounts:
+    """Applies the difference between the sheet and loaded dropp like `sync_routes`"""
+    stored_dropp = await _find_by_fingerprints(db_session, DropModel, dropp["fingerprint"])
+
+    counts = DiffCounts()
+    seen: set[str] = set()
+    dropp_rows = []
+    changed_rows = []
+    for row in await _records(dropp):
+        dropp_key = row["fingerprint"]
+        if dropp_key in seen:
+            continue
+        seen.add(dropp_key)
 
+        stored = stored_dropp.get(dropp_key)
+        if stored and stored[1] == row["content_hash"]:
+            counts.unchanged += 1
+            continue
+
+        if stored:
+            counts.changed += 1
+            changed_rows.append({**row, "id": stored[0]})
+        else:
+            counts.inserted += 1
+            dropp_rows.append(row)
+
+    loaded_dropp = await _get_loaded_fingerprints(db_session, DropModel)
+    removed_ids = _get_removed_ids(loaded_dropp, seen, stored_dropp)
+    counts.removed = len(removed_ids)
+
+    await bulk_delete(db_session, DropModel.id, removed_ids)
+    await bulk_update(db_session, DropModel, changed_rows)
+    await bulk_upsert(db_session, DropModel, dropp_rows, _DROP_UPDATE_COLUMNS)
+    changed_ids = [row["id"] for row in changed_rows]
+    mark_route_combinations_stale(
+        db_session, drop_ids=changed_ids + await _get_dropp_ids(db_session, dropp_rows) + removed_ids,
+    )
     await db_session.commit()
+    return counts
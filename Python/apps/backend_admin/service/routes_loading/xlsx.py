@@ -0,0 +1,87 @@
+import logging
+from typing import BinaryIO
+
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas import DataFrame
+from pandas.io.parsers import TextParser
+
+logger = logging.getLogger(__name__)
+
+
+def _convert_cell(cell):
+    """Converts a cell like `pandas.read_excel` does"""
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return float("nan")
+    if cell.data_type == TYPE_NUMERIC:
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+
+def _convert_row(row) -> list:
+    values = [_convert_cell(cell) for cell in row]
+    # trailing empty cells are trimmed like `pandas.read_excel` does
+    while values and values[-1] == "":
+        values.pop()
+    return values
+
+
+def read_sheet(sheet) -> DataFrame:
+    """
+    Reads a worksheet with a header row into a frame.
+
+    Trailing blank rows are trimmed, like `pandas.read_excel` does; types of columns are inferred from all rows.
+    """
+    # dimensions written by some editors are wrong, so rows are read up to the last one
+    sheet.reset_dimensions()
+    rows = sheet.iter_rows()
+    header = None
+    for row in rows:
+        header = _convert_row(row)
+        if header:
+            break
+    if not header:
+        return DataFrame()
+
+    values_rows = [header]
+    blank_rows = 0
+    for row in rows:
+        values = _convert_row(row)
+        if not values:
+            # blank rows are kept only if some data follow them
+            blank_rows += 1
+            continue
+
+        values_rows.extend([[]] * blank_rows)
+        values_rows.append(values)
+        blank_rows = 0
+
+    width = max(map(len, values_rows))
+    for i, values in enumerate(values_rows):
+        values_rows[i] = values + [""] * (width - len(values))
+    return TextParser(values_rows).read()
+
+
+def read_workbook(file: str | BinaryIO, titles: list[str]) -> dict[str, DataFrame]:
+    """
+    Reads worksheets of a XLSX file parsing the workbook once, in the read-only mode of openpyxl.
+
+    Every worksheet is read whole: cleaning and building of rows work with whole worksheets.
+    """
+    workbook = load_workbook(file, read_only=True, data_only=True, keep_links=False)
+    try:
+        frames = {}
+        for title in titles:
+            if title in frames:
+                continue
+            if title not in workbook.sheetnames:
+                raise ValueError(f"Worksheet named '{title}' not found")
+
+            frames[title] = read_sheet(workbook[title])
+            logger.debug("Worksheet %s: %d rows", title, len(frames[title]))
+        return frames
+    finally:
+        workbook.close()
@@ -1,16 +1,23 @@
 import asyncio
 import datetime
+import json
 from collections.abc import Iterator
 from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from fastapi.params import Depends, Query
 from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
 
 from backend_user.dependencies.auth_context import AuthContext, get_auth_context
 from backend_user.schemas.errors import RouteError
 from backend_user.schemas.get_points_responses import PointsDataResponse
-from backend_user.utils.group_points import group_companies, group_transfers, raw_point_from_dict
+from backend_user.services.points_catalogue import get_points_catalogue, serialize_points_response
+from backend_user.utils.group_points import (
+    GroupedPointWithPort,
+    group_companies,
+    group_transfers,
+    raw_point_from_dict,
+)
 from module_data_fesco_api_adapter import api_client
 from module_data_fesco_api_adapter.api_client.transformers.points import (
     transform_points as map_fesco,
@@ -24,17 +31,27 @@ from module_shared.database import get_database
 router = APIRouter(prefix="/v2/points", tags=["v2", "points"])
 
 
-def _strip_demo_fields_from_points(data: list, auth: AuthContext, excluded_fields: list[str] | None = None) -> None:
-    if not auth.is_demo:
-        return
-
-    if excluded_fields is None or "company" not in excluded_fields:
+def _strip_demo_fields_from_points(data: list[dict[str, Any]], excluded_fields: list[str]) -> None:
+    if "company" not in excluded_fields:
         return
 
     for point in data:
-        point.companies = []
-        for port in point.ports:
-            port.companies = []
+        point["companies"] = []
+        for port in point["ports"]:
+            port["companies"] = []
+
+
+async def _points_response(errors: list[RouteError], data: bytes, auth: AuthContext) -> Response:
+    if auth.is_demo:
+        async with get_database().session_context() as session:
+            setting = await get_setting_cached(session, "feature-flag", "demo-excluded-fields")
+            excluded_fields = setting.value if setting and isinstance(setting.value, list) else []
+        if "company" in excluded_fields:
+            points = json.loads(data)
+            _strip_demo_fields_from_points(points, excluded_fields)
+            data = json.dumps(points, ensure_ascii=False, separators=(",", ":")).encode()
+
+    return Response(serialize_points_response(errors, data), media_type="application/json")
 
 
 def _parse_point_ids(departure_point_ids: Annotated[str, Query]) -> tuple[list[int], list[str]]:
@@ -52,40 +69,43 @@ def _parse_point_ids(departure_point_ids: Annotated[str, Query]) -> tuple[list[i
     return internal_point_ids, external_point_ids
 
 
+def _group_points(data: list[dict[str, Any]]) -> list[GroupedPointWithPort]:
+    return group_transfers(group_companies([raw_point_from_dict(point) for point in data], {"FESCO"}), {"FESCO"})
+
+
 @router.get("/departures", response_model=PointsDataResponse)
 async def all_departure_by_date(date: datetime.date, auth: Annotated[AuthContext, Depends(get_auth_context)]):
-    fesco_points: Iterator[dict[str, Any]]
-    custom_points: list[tuple[PointModel, CompanyModel]]
+    async def build():
+        fesco_points: Iterator[dict[str, Any]]
+        custom_points: list[tuple[PointModel, CompanyModel]]
 
-    fesco_points, custom_points = await asyncio.gather(
-        api_client.get_departure_points_by_date(date),
-        aggregators.get_departure_points(),
-        return_exceptions=True,
-    )
+        fesco_points, custom_points = await asyncio.gather(
+            api_client.get_departure_points_by_date(date),
+            aggregators.get_departure_points(),
+            return_exceptions=True,
+        )
 
-    errors = []
-    data: list[dict[str, Any]] = []
+        errors = []
+        data: list[dict[str, Any]] = []
 
-    if isinstance(fesco_points, BaseException):
-        errors.append(RouteError(error_type=str(type(fesco_points)), error_text=str(fesco_points), source="external"))
-    else:
-        data.extend(map_fesco(fesco_points))
+        if isinstance(fesco_points, BaseException):
+            errors.append(
+                RouteError(error_type=str(type(fesco_points)), error_text=str(fesco_points), source="external")
+            )
+        else:
+            data.extend(map_fesco(fesco_points))
 
-    if isinstance(custom_points, BaseException):
-        errors.append(RouteError(error_type=str(type(custom_points)), error_text=str(custom_points), source="internal"))
-    else:
-        data.extend(map_custom(custom_points))
+        if isinstance(custom_points, BaseException):
+            errors.append(
+                RouteError(error_type=str(type(custom_points)), error_text=str(custom_points), source="internal")
+            )
+        else:
+            data.extend(map_custom(custom_points))
 
-    result = group_transfers(group_companies([raw_point_from_dict(point) for point in data], {"FESCO"}), {"FESCO"})
-    async with get_database().session_context() as session:
-        setting = await get_setting_cached(session, "feature-flag", "demo-excluded-fields")
-        excluded_fields = setting.value if setting and isinstance(setting.value, list) else []
-    _strip_demo_fields_from_points(result, auth, excluded_fields)
+        return errors, _group_points(data)
 
-    return {
-        "errors": errors,
-        "data": result,
-    }
+    errors, data = await get_points_catalogue("departures", date, [], build)
+    return await _points_response(errors, data, auth)
 
 
 @router.get("/destinations", response_model=PointsDataResponse)
@@ -94,46 +114,43 @@ async def all_destination_by_date(
     departure_point_ids: Annotated[tuple[list[int], list[str]], Depends(_parse_point_ids)],
     auth: Annotated[AuthContext, Depends(get_auth_context)],
 ):
-    coros = [aggregators.get_destination_points()]
-
     _, external_point_ids = departure_point_ids
 
-    for point_id in external_point_ids:
-        coros.append(api_client.get_destination_points_by_date(date, point_id))
+    async def build():
+        coros = [aggregators.get_destination_points()]
 
-    results = await asyncio.gather(
-        *coros,
-        return_exceptions=True,
-    )
+        for point_id in external_point_ids:
+            coros.append(api_client.get_destination_points_by_date(date, point_id))
 
-    errors = []
-    data: list[dict[str, Any]] = []
+        results = await asyncio.gather(
+            *coros,
+            return_exceptions=True,
+        )
 
-    if not results:
-        raise HTTPException(HTTP_500_INTERNAL_SERVER_ERROR, detail="Unknown error: no results")
+        errors = []
+        data: list[dict[str, Any]] = []
 
-    fesco_points_array: list[Iterator[dict[str, Any]] | BaseException]
-    custom_points, *fesco_points_array = results
-    if isinstance(custom_points, BaseException):
-        errors.append(RouteError(error_type=str(type(custom_points)), error_text=str(custom_points), source="internal"))
-    else:
-        data.extend(map_custom(custom_points))
+        if not results:
+            raise HTTPException(HTTP_500_INTERNAL_SERVER_ERROR, detail="Unknown error: no results")
 
-    for fesco_points in fesco_points_array:
-        if isinstance(fesco_points, BaseException):
+        fesco_points_array: list[Iterator[dict[str, Any]] | BaseException]
+        custom_points, *fesco_points_array = results
+        if isinstance(custom_points, BaseException):
             errors.append(
-                RouteError(error_type=str(type(fesco_points)), error_text=str(fesco_points), source="external")
+                RouteError(error_type=str(type(custom_points)), error_text=str(custom_points), source="internal")
             )
         else:
-            data.extend(map_fesco(fesco_points))
+            data.extend(map_custom(custom_points))
+
+        for fesco_points in fesco_points_array:
+            if isinstance(fesco_points, BaseException):
+                errors.append(
+                    RouteError(error_type=str(type(fesco_points)), error_text=str(fesco_points), source="external")
+                )
+            else:
+                data.extend(map_fesco(fesco_points))
 
-    result = group_transfers(group_companies([raw_point_from_dict(point) for point in data], {"FESCO"}), {"FESCO"})
-    async with get_database().session_context() as session:
-        setting = await get_setting_cached(session, "feature-flag", "demo-excluded-fields")
-        excluded_fields = setting.value if setting and isinstance(setting.value, list) else []
-    _strip_demo_fields_from_points(result, auth, excluded_fields)
+        return errors, _group_points(data)
 
-    return {
-        "errors": errors,
-        "data": result,
-    }
+    errors, data = await get_points_catalogue("destinations", date, external_point_ids, build)
+    return await _points_response(errors, data, auth)
@@ -1,5 +1,6 @@
 from collections.abc import AsyncGenerator
 from contextlib import suppress
+from dataclasses import dataclass
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Header, Response
@@ -7,7 +8,7 @@ from fastapi.sse import EventSourceResponse, ServerSentEvent
 
 from backend_user.dependencies.auth_context import AuthContext, get_auth_context
 from backend_user.schemas.form_requests import CalculateFormRequest
-from backend_user.services.profit import apply_demo_profit_to_route
+from backend_user.services.profit import DemoProfit, get_demo_profit
 from backend_user.services.route_calculation import calculate_routes_stream
 from module_shared.cache_settings import get_setting_cached
 from module_shared.database import get_database
@@ -16,23 +17,36 @@ from module_shared.models.route import RouteResult
 router = APIRouter(prefix="/v3/routes", tags=["v3", "routes"])
 
 
-async def _apply_demo_transforms_to_route(route: RouteResult, auth: AuthContext) -> None:
-    if auth.sea_profit or auth.rail_profit:
-        await apply_demo_profit_to_route(
-            route,
-            auth.sea_profit,
-            auth.sea_profit_currency,
-            auth.rail_profit,
-            auth.rail_profit_currency,
-        )
+@dataclass
+class _DemoTransforms:
+    """Demo transforms of a stream: resolved once, then applied to every route as pure CPU work"""
+
+    profit: DemoProfit | None
+    excluded_fields: list[str]
+
+    def apply(self, route: RouteResult) -> None:
+        if self.profit is not None:
+            self.profit.apply(route)
+
+        for segment in route.segments:
+            for field in self.excluded_fields:
+                with suppress(ValueError):
+                    setattr(segment, field, None)
+
+
+async def _get_demo_transforms(auth: AuthContext) -> _DemoTransforms:
+    profit = await get_demo_profit(
+        auth.sea_profit,
+        auth.sea_profit_currency,
+        auth.rail_profit,
+        auth.rail_profit_currency,
+    )
 
     async with get_database().session_context() as session:
         setting = await get_setting_cached(session, "feature-flag", "demo-excluded-fields")
         excluded_fields = setting.value if setting and isinstance(setting.value, list) else []
-    for segment in route.segments:
-        for field in excluded_fields:
-            with suppress(ValueError):
-                setattr(segment, field, None)
+
+    return _DemoTransforms(profit, excluded_fields)
 
 
 async def _sse_generator(
@@ -41,10 +55,11 @@ async def _sse_generator(
     last_event_id: int | None = None,
 ) -> AsyncGenerator[ServerSentEvent]:
     current_id = last_event_id + 1 if last_event_id is not None else 0
+    demo_transforms = await _get_demo_transforms(auth) if auth.is_demo else None
 
     async for item in calculate_routes_stream(request):
-        if isinstance(item, RouteResult) and auth.is_demo:
-            await _apply_demo_transforms_to_route(item, auth)
+        if isinstance(item, RouteResult) and demo_transforms is not None:
+            demo_transforms.apply(item)
 
         event_type = "route" if isinstance(item, RouteResult) else "error"
         yield ServerSentEvent(data=item, event=event_type, id=str(current_id))
@@ -1,10 +1,13 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from importlib.util import find_spec
 
 from fastapi import FastAPI
 
 from fastapi_another_jwt_auth import AuthJWT
 from fastapi_another_jwt_auth.exceptions import AuthJWTException
+from module_data_fesco_api_adapter.http_client import get_fesco_http_client
+from module_data_internal.aggregators.routes_index import get_routes_index
 from module_shared.cache_settings import ensure_settings
 from module_shared.config import get_settings as get_shared_settings
 from module_shared.database import get_database
@@ -14,6 +17,7 @@ from module_shared.redis_client import get_redis_client
 
 from .autodiscover import api_discover
 from .config import get_settings
+from .services.get_rates import run_rates_refresher
 
 if find_spec("dotenv") is not None:
     from dotenv import load_dotenv
@@ -35,10 +39,18 @@ openapi_url = "/openapi.json" if settings.ENVIRONMENT != "prod" else None
 async def lifespan(_: FastAPI):
     await get_database().init()
     await get_redis_client().init()
+    await get_fesco_http_client().init()
     await ensure_settings()
+    if settings.ROUTES_INDEX_ENABLED:
+        await get_routes_index().get()
+    rates_refresher = asyncio.create_task(run_rates_refresher())
     yield
+    rates_refresher.cancel()
+    with suppress(asyncio.CancelledError):
+        await rates_refresher
     await get_database().close()
     await get_redis_client().close()
+    await get_fesco_http_client().close()
 
 
 app = FastAPI(
@@ -2,6 +2,7 @@ import asyncio
 import datetime
 import json
 import logging
+from functools import cache
 
 from module_shared.redis_client import get_redis
 from pycbrf.toolbox import ExchangeRates
@@ -9,48 +10,114 @@ from pycbrf.toolbox import ExchangeRates
 logger = logging.getLogger(__name__)
 
 RATES_CACHE_KEY = "backend_user:rates:latest"
+RATES_DATE_CACHE_KEY = "backend_user:rates:{date}"
 RATES_CACHE_TTL = 86400  # 24 hours
+RATES_REFRESH_INTERVAL = 3600  # 1 hour
+
+Rates = tuple[dict[str, float], datetime.date]
+
+
+async def _fetch_rates(dt_now: datetime.datetime) -> Rates:
+    rates_obj = await asyncio.to_thread(ExchangeRates, dt_now)
+    rates = {currency.code: float(currency.value) for currency in rates_obj.rates}
+    rates["RUB"] = 1
+    rates["RUR"] = 1
+    rates["РУБ"] = 1
+    return rates, dt_now.date()
 
 
 async def _set_rates_cache(rates: dict[str, float], dt: datetime.date) -> None:
     try:
         redis = get_redis()
         payload = json.dumps({"rates": rates, "date": dt.isoformat()})
+        await redis.set(RATES_DATE_CACHE_KEY.format(date=dt.isoformat()), payload, ex=RATES_CACHE_TTL)
         await redis.set(RATES_CACHE_KEY, payload, ex=RATES_CACHE_TTL)
         logger.info("Rates cached in Redis for %s", dt)
     except Exception:
         logger.exception("Failed to cache rates in Redis")
 
 
-async def get_rates(dt_now: datetime.datetime | None = None) -> tuple[dict[str, float], datetime.date]:
-    if dt_now is None:
-        dt_now = datetime.datetime.now()
-
-    today = dt_now.date()
-
-    try:
-        rates_obj = await asyncio.to_thread(ExchangeRates, dt_now)
-        rates = {currency.code: float(currency.value) for currency in rates_obj.rates}
-        rates["RUB"] = 1
-        rates["RUR"] = 1
-        rates["РУБ"] = 1
-
-        asyncio.create_task(_set_rates_cache(rates, today))
-        return rates, today
-    except Exception:
-        logger.warning("Failed to fetch rates from CBR API, trying Redis fallback", exc_info=True)
-
+async def _get_rates_cache(key: str) -> Rates | None:
     try:
         redis = get_redis()
-        raw = await redis.get(RATES_CACHE_KEY)
+        raw = await redis.get(key)
         if raw is not None:
             payload = json.loads(raw)
-            cached_date = datetime.date.fromisoformat(payload["date"])
-            logger.info("Returning cached rates from %s", cached_date)
-            return payload["rates"], cached_date
+            return payload["rates"], datetime.date.fromisoformat(payload["date"])
     except Exception:
-        logger.exception("Failed to read rates from Redis fallback")
+        logger.exception("Failed to read rates from Redis")
+    return None
+
+
+class RatesStore:
+    """
+    Exchange rates of the process, memoized by date.
+
+    Rates are fetched from the CBR API by `refresh` (see `run_rates_refresher`) and shared through Redis;
+    requests are served from the memo or Redis, and fall back to the latest known rates when there are
+    no rates of the day yet. The API is awaited by a request only if there are no rates at all.
+    """
+
+    def __init__(self):
+        self._memo: dict[datetime.date, Rates] = {}
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, dt_now: datetime.datetime | None = None, force: bool = True) -> Rates:
+        if dt_now is None:
+            dt_now = datetime.datetime.now()
+
+        async with self._lock:
+            # rates could have been fetched while we were waiting for the lock
+            if not force and dt_now.date() in self._memo:
+                return self._memo[dt_now.date()]
+
+            rates, dt = await _fetch_rates(dt_now)
+            self._memo[dt] = (rates, dt)
+            await _set_rates_cache(rates, dt)
+            return rates, dt
+
+    async def get(self, dt_now: datetime.datetime | None = None) -> Rates:
+        if dt_now is None:
+            dt_now = datetime.datetime.now()
+
+        today = dt_now.date()
+        if today in self._memo:
+            return self._memo[today]
+
+        cached = await _get_rates_cache(RATES_DATE_CACHE_KEY.format(date=today.isoformat()))
+        if cached is not None and cached[1] == today:
+            self._memo[today] = cached
+            return cached
+
+        latest = cached or await _get_rates_cache(RATES_CACHE_KEY)
+        if latest is not None:
+            logger.info("No rates for %s yet, returning cached rates from %s", today, latest[1])
+            return latest
+
+        try:
+            return await self.refresh(dt_now, force=False)
+        except Exception:
+            logger.warning("Failed to fetch rates from CBR API", exc_info=True)
+
+        msg = "No rates available from CBR API or Redis cache"
+        logger.error(msg)
+        raise RuntimeError(msg)
+
+
+@cache
+def get_rates_store() -> RatesStore:
+    return RatesStore()
+
+
+async def get_rates(dt_now: datetime.datetime | None = None) -> Rates:
+    return await get_rates_store().get(dt_now)
+
 
-    msg = "No rates available from CBR API or Redis cache"
-    logger.error(msg)
-    raise RuntimeError(msg)
+async def run_rates_refresher(interval: float = RATES_REFRESH_INTERVAL) -> None:
+    """Keeps rates of the day in the cache; runs for the application lifetime"""
+    while True:
+        try:
+            await get_rates_store().refresh()
+        except Exception:
+            logger.warning("Scheduled rates refresh failed", exc_info=True)
+        await asyncio.sleep(interval)
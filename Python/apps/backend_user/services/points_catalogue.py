@@ -0,0 +1,86 @@
+import asyncio
+import datetime
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+
+from backend_user.schemas.errors import RouteError
+from backend_user.schemas.get_points_responses import GroupedPointWithPortResponse
+from backend_user.utils.group_points import GroupedPointWithPort
+from module_data_fesco_api_adapter.cache import single_flight
+from module_shared.data_version import ROUTES_DATA_VERSION, get_data_version
+from module_shared.redis_client import get_redis
+from pydantic import TypeAdapter
+
+logger = logging.getLogger(__name__)
+
+# Keys contain the routes data version, so internal points are never stale;
+# the TTL bounds staleness of FESCO points merged into the catalogue
+POINTS_CATALOGUE_TTL = 3600
+
+_points_adapter = TypeAdapter(list[GroupedPointWithPortResponse])
+_errors_adapter = TypeAdapter(list[RouteError])
+
+PointsCatalogue = tuple[list[RouteError], bytes]
+
+
+def _catalogue_key(version: int, kind: str, date: datetime.date, external_point_ids: Iterable[str]) -> str:
+    key = f"backend_user:points:{kind}:v{version}:{date}"
+    external_point_ids = sorted(external_point_ids)
+    if external_point_ids:
+        key += ":" + ",".join(external_point_ids)
+    return key
+
+
+def serialize_points(points: list[GroupedPointWithPort]) -> bytes:
+    return _points_adapter.dump_json(_points_adapter.validate_python(points, from_attributes=True))
+
+
+def serialize_points_response(errors: list[RouteError], data: bytes) -> bytes:
+    """Wraps serialized points into `PointsDataResponse` JSON without decoding them"""
+    return b'{"errors":' + _errors_adapter.dump_json(errors) + b',"data":' + data + b"}"
+
+
+async def get_points_catalogue(
+    kind: str,
+    date: datetime.date,
+    external_point_ids: Iterable[str],
+    build: Callable[[], Awaitable[tuple[list[RouteError], list[GroupedPointWithPort]]]],
+) -> PointsCatalogue:
+    """
+    Returns errors and serialized grouped points, building them only if they are not cached.
+
+    Points are cached per routes data version and FESCO date; results with errors are not cached.
+    """
+    version = await get_data_version(ROUTES_DATA_VERSION)
+
+    async def build_and_serialize() -> PointsCatalogue:
+        errors, points = await build()
+        return errors, serialize_points(points)
+
+    if version is None:
+        return await build_and_serialize()
+
+    key = _catalogue_key(version, kind, date, external_point_ids)
+    try:
+        redis = get_redis()
+        cached = await redis.get(key)
+        if cached is not None:
+            return [], cached.encode()
+    except Exception:
+        logger.warning("Redis unavailable for points catalogue, building it")
+
+    async def build_and_store() -> PointsCatalogue:
+        errors, data = await build_and_serialize()
+        if not errors:
+            asyncio.create_task(_set_async(key, data))
+        return errors, data
+
+    return await single_flight(key, build_and_store)
+
+
+async def _set_async(key: str, data: bytes) -> None:
+    try:
+        redis = get_redis()
+        await redis.set(key, data.decode(), ex=POINTS_CATALOGUE_TTL)
+    except Exception:
+        logger.exception("Failed to set cache for %s", key)
@@ -1,4 +1,5 @@
 import logging
+from dataclasses import dataclass
 
 from backend_user.schemas.routes import NormalizedRoutes
 from backend_user.services.get_rates import get_rates
@@ -70,22 +71,40 @@ async def apply_demo_profit_to_routes(
         _apply_profit_to_segments(route[0], sea_profit, sea_profit_currency, rail_profit, rail_profit_currency, rates)
 
 
-async def apply_demo_profit_to_route(
-    route: RouteResult,
+@dataclass
+class DemoProfit:
+    """Demo profit with rates resolved once, so it can be applied to any number of routes without I/O"""
+
+    sea_profit: float
+    sea_profit_currency: str
+    rail_profit: float
+    rail_profit_currency: str
+    rates: dict[str, float]
+
+    def apply(self, route: RouteResult) -> None:
+        _apply_profit_to_segments(
+            route.segments,
+            self.sea_profit,
+            self.sea_profit_currency,
+            self.rail_profit,
+            self.rail_profit_currency,
+            self.rates,
+        )
+
+
+async def get_demo_profit(
     sea_profit: float,
     sea_profit_currency: str,
     rail_profit: float,
     rail_profit_currency: str,
-) -> None:
+) -> DemoProfit | None:
     if not sea_profit and not rail_profit:
-        return
+        return None
 
     logger.info(
-        "Applying profit to route: sea=%.2f %s, rail=%.2f %s",
+        "Applying profit to routes: sea=%.2f %s, rail=%.2f %s",
         sea_profit, sea_profit_currency, rail_profit, rail_profit_currency,
     )
     rates, _ = await get_rates()
 
-    _apply_profit_to_segments(
-        route.segments, sea_profit, sea_profit_currency, rail_profit, rail_profit_currency, rates
-    )
+    return DemoProfit(sea_profit, sea_profit_currency, rail_profit, rail_profit_currency, rates)
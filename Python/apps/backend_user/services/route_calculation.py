@@ -44,19 +44,41 @@ async def _get_routes(
     return await modul.find_all_paths(date, departure, destination, container_ids)
 
 
+async def _get_internal_routes(
+    date: datetime.date,
+    pairs: list[tuple[int, int]],
+    container_weight: float,
+    container_type: int,
+) -> Iterable[RouteResult]:
+    # Internal containers don't depend on points, and all pairs are searched by the same set of queries
+    containers = await aggregators.get_containers(date)
+    container_ids = aggregators.search_container_ids(
+        containers,
+        container_weight,
+        container_type,
+    )
+    if not container_ids:
+        logger.warning("No matching containers for %d internal pairs", len(pairs))
+        return []
+
+    routes_by_pairs = await aggregators.find_all_paths_many(date, pairs, container_ids)
+    return [route for pair in pairs for route in routes_by_pairs.get(pair, [])]
+
+
 def _build_calculation_coros(request: CalculateFormRequest):
+    internal_pairs = [
+        (departure_id, destination_id)
+        for destination_id in request.destinationInternalIds
+        for departure_id in request.departureInternalIds
+    ]
     internal_coros = [
-        _get_routes(
-            aggregators,
+        _get_internal_routes(
             request.dispatchDate,
-            departure_id,
-            destination_id,
+            internal_pairs,
             request.cargoWeight,
             request.containerType,
-        )
-        for destination_id in request.destinationInternalIds
-        for departure_id in request.departureInternalIds
-    ]
+        ),
+    ] if internal_pairs else []
     external_coros = [
         _get_routes(
             api_client,
@@ -77,7 +99,7 @@ async def calculate_routes(request: CalculateFormRequest) -> tuple[list[RouteRes
 
     logger.info(
         "Calculating routes: %d internal / %d external pairs",
-        len(internal_coros),
+        len(request.departureInternalIds) * len(request.destinationInternalIds),
         len(external_coros),
     )
 
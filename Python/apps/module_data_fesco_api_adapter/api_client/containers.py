@@ -3,12 +3,12 @@ import datetime
 import json
 import logging
 
-import aiohttp
 from module_shared.config import get_settings
 from module_shared.models.route import ContainerItem
 from module_shared.redis_client import get_redis
 
-from ..cache import FESCO_CONTAINERS_TTL, _set_json_async
+from ..cache import FESCO_CONTAINERS_TTL, _set_json_async, single_flight
+from ..http_client import MY_FESCO_HOST, get_fesco_session
 from .transformers.containers import transform_containers
 
 logger = logging.getLogger(__name__)
@@ -25,33 +25,36 @@ async def get_containers(date: datetime.date, departure_id: str, destination_id:
     except Exception:
         logger.warning("Redis unavailable for containers, falling back to API")
 
-    containers = await _fetch_containers(date, departure_id, destination_id)
-    asyncio.create_task(_set_json_async(
-        cache_key,
-        [c.model_dump(mode="json") for c in containers],
-        FESCO_CONTAINERS_TTL,
-    ))
-    return containers
+    async def fetch_and_store():
+        containers = await _fetch_containers(date, departure_id, destination_id)
+        asyncio.create_task(_set_json_async(
+            cache_key,
+            [c.model_dump(mode="json") for c in containers],
+            FESCO_CONTAINERS_TTL,
+        ))
+        return containers
+
+    return await single_flight(cache_key, fetch_and_store)
 
 
 async def _fetch_containers(date: datetime.date, departure_id: str, destination_id: str):
-    async with aiohttp.ClientSession() as session:
-        resp = await session.get(
-            "https://my.fesco.com/api/v2/lk/offers/fit/wte?date={}&from={}&to={}".format(
-                date.isoformat(),
-                departure_id,
-                destination_id,
-            ),
-            headers={
-                "Accept": "application/json",
-                "Authorization": f"Bearer {get_settings().FESCO_API_KEY}",
-                "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-                              "(KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
-                "X-Lk-Lang": "RU",
-            },
-        )
-        resp.raise_for_status()
-        data_to = await resp.json()
+    session = get_fesco_session(MY_FESCO_HOST)
+    resp = await session.get(
+        "https://my.fesco.com/api/v2/lk/offers/fit/wte?date={}&from={}&to={}".format(
+            date.isoformat(),
+            departure_id,
+            destination_id,
+        ),
+        headers={
+            "Accept": "application/json",
+            "Authorization": f"Bearer {get_settings().FESCO_API_KEY}",
+            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                          "(KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
+            "X-Lk-Lang": "RU",
+        },
+    )
+    resp.raise_for_status()
+    data_to = await resp.json()
 
     return transform_containers(data_to.get("data"))
 
@@ -1,9 +1,9 @@
 import datetime
 
-import aiohttp
 from module_shared.config import get_settings
 
 from ..cache import get_fesco_points_cached
+from ..http_client import API_FESCO_HOST, get_fesco_session
 
 
 async def get_departure_points_by_date(date: datetime.date):
@@ -16,16 +16,16 @@ async def get_departure_points_by_date(date: datetime.date):
 
 
 async def _fetch_departure_points_by_date(date: datetime.date):
-    async with aiohttp.ClientSession() as session:
-        resp = await session.get(
-            f"https://api.fesco.com/api/v1/lk/calc/fit/from?date={date.isoformat()}",
-            headers={
-                "Authorization": f"Bearer {get_settings().FESCO_API_KEY}",
-                "X-Lk-Lang": "RU",
-            },
-        )
-        resp.raise_for_status()
-        data_from = await resp.json()
+    session = get_fesco_session(API_FESCO_HOST)
+    resp = await session.get(
+        f"https://api.fesco.com/api/v1/lk/calc/fit/from?date={date.isoformat()}",
+        headers={
+            "Authorization": f"Bearer {get_settings().FESCO_API_KEY}",
+            "X-Lk-Lang": "RU",
+        },
+    )
+    resp.raise_for_status()
+    data_from = await resp.json()
     return data_from.get("data")
 
 
@@ -39,15 +39,15 @@ async def get_destination_points_by_date(date: datetime.date, departure_point_id
 
 
 async def _fetch_destination_points_by_date(date: datetime.date, departure_point_id: str):
-    async with aiohttp.ClientSession() as session:
-        resp = await session.get(
-            f"https://api.fesco.com/api/v1/lk/calc/fit/to"
-            f"?date={date.isoformat()}&from={departure_point_id}",
-            headers={
-                "Authorization": f"Bearer {get_settings().FESCO_API_KEY}",
-                "X-Lk-Lang": "RU",
-            },
-        )
-        resp.raise_for_status()
-        data_to = await resp.json()
+    session = get_fesco_session(API_FESCO_HOST)
+    resp = await session.get(
+        f"https://api.fesco.com/api/v1/lk/calc/fit/to"
+        f"?date={date.isoformat()}&from={departure_point_id}",
+        headers={
+            "Authorization": f"Bearer {get_settings().FESCO_API_KEY}",
+            "X-Lk-Lang": "RU",
+        },
+    )
+    resp.raise_for_status()
+    data_to = await resp.json()
     return data_to.get("data")
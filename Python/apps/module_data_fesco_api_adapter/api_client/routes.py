@@ -3,11 +3,11 @@ import datetime
 import json
 from collections.abc import Iterable
 
-import aiohttp
 from module_shared.config import get_settings
 from module_shared.models.route import RouteResult
 
 from ..cache import get_fesco_routes_cached
+from ..http_client import MY_FESCO_HOST, get_fesco_session
 from .transformers.routes import transform_routes
 
 
@@ -32,12 +32,12 @@ async def _fetch_all_paths(
     destination_id: str,
     wte_ids: list[str],
 ) -> Iterable[RouteResult]:
-    async with aiohttp.ClientSession() as session:
-        coroutines = [
-            _get_routes(date, departure_id, destination_id, wte_id, session)
-            for wte_id in wte_ids
-        ]
-        res = await asyncio.gather(*coroutines, return_exceptions=True)
+    session = get_fesco_session(MY_FESCO_HOST)
+    coroutines = [
+        _get_routes(date, departure_id, destination_id, wte_id, session)
+        for wte_id in wte_ids
+    ]
+    res = await asyncio.gather(*coroutines, return_exceptions=True)
 
     routes = []
     for routes_group in res:
@@ -1,62 +1,147 @@
 import asyncio
+import copy
 import datetime
 import json
 import logging
+import time
+from collections.abc import Awaitable, Callable
 
 from module_shared.models.route import RouteResult
 from module_shared.redis_client import get_redis
 
 logger = logging.getLogger(__name__)
 
+# Hard expiries: entries are removed from Redis and a user has to wait for the API
 FESCO_POINTS_TODAY_TTL = 86400
 FESCO_POINTS_OTHER_TTL = 43200
 FESCO_ROUTES_TTL = 43200
 FESCO_CONTAINERS_TTL = 86400
 
+# Soft expiries: older entries are still served, but refreshed in the background
+FESCO_POINTS_TODAY_SOFT_TTL = 43200
+FESCO_POINTS_OTHER_SOFT_TTL = 21600
+FESCO_ROUTES_SOFT_TTL = 21600
 
-def _points_ttl(date: datetime.date) -> int:
-    return FESCO_POINTS_TODAY_TTL if date == datetime.date.today() else FESCO_POINTS_OTHER_TTL
+# Upstream fetches in progress, by cache key: concurrent misses of the same key await the first one
+_in_flight: dict[str, asyncio.Future] = {}
+# Background refreshes in progress, by cache key
+_refresh_tasks: dict[str, asyncio.Task] = {}
+
+
+def _points_ttl(date: datetime.date) -> tuple[int, int]:
+    if date == datetime.date.today():
+        return FESCO_POINTS_TODAY_SOFT_TTL, FESCO_POINTS_TODAY_TTL
+    return FESCO_POINTS_OTHER_SOFT_TTL, FESCO_POINTS_OTHER_TTL
+
+
+def _envelope(data, soft_ttl: int) -> dict:
+    return {"soft_expires_at": time.time() + soft_ttl, "data": data}
+
+
+def _open_envelope(payload) -> tuple[object, bool]:
+    """Returns cached data and whether it is past its soft expiry"""
+    if isinstance(payload, dict) and "soft_expires_at" in payload and "data" in payload:
+        return payload["data"], time.time() >= payload["soft_expires_at"]
+    # written before soft expiries were introduced: fresh until the hard expiry
+    return payload, False
+
+
+def _refresh_in_background(cache_key: str, fetch_and_store: Callable[[], Awaitable]) -> None:
+    if cache_key in _in_flight or cache_key in _refresh_tasks:
+        return
+
+    async def refresh():
+        try:
+            await single_flight(cache_key, fetch_and_store)
+        except Exception:
+            logger.warning("Background refresh failed for %s", cache_key, exc_info=True)
+
+    _refresh_tasks[cache_key] = asyncio.create_task(refresh())
+    _refresh_tasks[cache_key].add_done_callback(lambda _: _refresh_tasks.pop(cache_key, None))
 
 
 async def get_fesco_points_cached(cache_key: str, date: datetime.date, fetch_and_transform):
+    soft_ttl, ttl = _points_ttl(date)
+
+    async def fetch_and_store():
+        data = await fetch_and_transform()
+        asyncio.create_task(_set_json_async(cache_key, _envelope(data, soft_ttl), ttl))
+        return data
+
     try:
         redis = get_redis()
         cached = await redis.get(cache_key)
         if cached is not None:
-            return json.loads(cached)
+            data, is_stale = _open_envelope(json.loads(cached))
+            if is_stale:
+                _refresh_in_background(cache_key, fetch_and_store)
+            return data
     except Exception:
         logger.warning("Redis unavailable for points, falling back to API")
 
-    data = await fetch_and_transform()
-
-    ttl = _points_ttl(date)
-    asyncio.create_task(_set_json_async(cache_key, data, ttl))
-
-    return data
+    return await single_flight(cache_key, fetch_and_store, copy.deepcopy)
 
 
 async def get_fesco_routes_cached(cache_key: str, fetch):
+    async def fetch_and_store():
+        data = list(await fetch())
+        asyncio.create_task(_set_json_async(
+            cache_key,
+            _envelope([r.model_dump(mode="json") for r in data], FESCO_ROUTES_SOFT_TTL),
+            FESCO_ROUTES_TTL,
+        ))
+        return data
+
     try:
         redis = get_redis()
         cached = await redis.get(cache_key)
         if cached is not None:
             try:
-                return [RouteResult.model_validate(r) for r in json.loads(cached)]
+                data, is_stale = _open_envelope(json.loads(cached))
+                routes = [RouteResult.model_validate(r) for r in data]
             except Exception:
                 logger.warning("Corrupt cache data for %s, re-fetching", cache_key)
+            else:
+                if is_stale:
+                    _refresh_in_background(cache_key, fetch_and_store)
+                return routes
     except Exception:
         logger.warning("Redis unavailable for routes, falling back to API")
 
-    data = await fetch()
-    data = list(data)
-
-    asyncio.create_task(_set_json_async(
+    # routes are modified by callers (profit, demo fields), so every caller gets its own copy
+    return await single_flight(
         cache_key,
-        [r.model_dump(mode="json") for r in data],
-        FESCO_ROUTES_TTL,
-    ))
-
-    return data
+        fetch_and_store,
+        lambda routes: [r.model_copy(deep=True) for r in routes],
+    )
+
+
+async def single_flight(key: str, fetch: Callable[[], Awaitable], copy_result: Callable | None = None):
+    """
+    Runs `fetch` once for all concurrent callers with the same key.
+
+    The first caller fetches; the others await its result or its exception.
+    Every caller gets its own `copy_result` of the result, if it is given.
+    """
+    future = _in_flight.get(key)
+    if future is None:
+        future = asyncio.get_running_loop().create_future()
+        _in_flight[key] = future
+        try:
+            future.set_result(await fetch())
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # mark it as retrieved, there may be no waiters
+            future.exception()
+            raise
+        finally:
+            del _in_flight[key]
+
+    result = await asyncio.shield(future)
+    return copy_result(result) if copy_result is not None else result
 
 
 async def _set_json_async(key: str, data, ttl: int) -> None:
@@ -0,0 +1,61 @@
+import logging
+from functools import cache
+
+import aiohttp
+from module_shared.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+MY_FESCO_HOST = "my.fesco.com"
+API_FESCO_HOST = "api.fesco.com"
+FESCO_HOSTS = (MY_FESCO_HOST, API_FESCO_HOST)
+
+
+class FescoHttpClient:
+    """Keeps one pooled aiohttp session per FESCO host, so keep-alive connections are reused between calls"""
+
+    def __init__(self):
+        self._sessions: dict[str, aiohttp.ClientSession] = {}
+
+    async def init(self):
+        settings = get_settings()
+        for host in FESCO_HOSTS:
+            connector = aiohttp.TCPConnector(
+                limit=settings.FESCO_HTTP_POOL_LIMIT,
+                keepalive_timeout=settings.FESCO_HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=settings.FESCO_HTTP_DNS_CACHE_TTL,
+            )
+            self._sessions[host] = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(
+                    total=settings.FESCO_HTTP_TIMEOUT,
+                    connect=settings.FESCO_HTTP_CONNECT_TIMEOUT,
+                ),
+            )
+        logger.info(
+            "FESCO HTTP sessions created: %s (pool limit %d)",
+            ", ".join(FESCO_HOSTS),
+            settings.FESCO_HTTP_POOL_LIMIT,
+        )
+
+    async def close(self):
+        for session in self._sessions.values():
+            await session.close()
+        if self._sessions:
+            self._sessions.clear()
+            logger.info("FESCO HTTP sessions closed")
+
+    def session(self, host: str) -> aiohttp.ClientSession:
+        session = self._sessions.get(host)
+        if session is None:
+            raise RuntimeError("FESCO HTTP client not initialized. Call init() first.")
+        return session
+
+
+@cache
+def get_fesco_http_client() -> FescoHttpClient:
+    return FescoHttpClient()
+
+
+def get_fesco_session(host: str) -> aiohttp.ClientSession:
+    return get_fesco_http_client().session(host)
@@ -0,0 +1,2 @@
+# registers events of sessions keeping route combinations up to date
+from . import route_combinations  # noqa: F401
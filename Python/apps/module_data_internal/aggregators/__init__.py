@@ -1,3 +1,3 @@
 from .containers import get_containers, search_container_ids  # noqa: F401
 from .points import get_departure_points, get_destination_points  # noqa: F401
-from .routes import find_all_paths  # noqa: F401
+from .routes import find_all_paths, find_all_paths_many  # noqa: F401
@@ -1,22 +1,115 @@
+import asyncio
 import datetime
+import time
+from bisect import bisect_left
+from functools import cache
 
 from module_data_internal.schemas import ContainerModel
+from module_shared.data_version import CONTAINERS_DATA_VERSION, get_data_version
 from module_shared.database import get_database
+from module_shared.models.route import ContainerItem
 from sqlalchemy import select
 
 from .transformers.containers import transform_containers
 
+CONTAINERS_VERSION_CHECK_INTERVAL = 5  # seconds
 
-async def get_containers(date: datetime.date, departure_id: str, destination_id: str):
+
+class ContainerCatalogue(list[ContainerItem]):
+    """
+    Containers ordered by size with a (size -> weight intervals) index.
+
+    Weight bounds of every size split the weight axis into points and gaps between them;
+    matching containers are precomputed for each of them, so a search is a binary search.
+    """
+
+    def __init__(self, containers: list[ContainerItem], version: int | None = None):
+        super().__init__(containers)
+        self.version = version
+        self._index: dict[int, tuple[list[float], list[tuple[int | str, ...]]]] = {}
+
+        by_size: dict[int, list[ContainerItem]] = {}
+        for container in containers:
+            by_size.setdefault(container.size, []).append(container)
+
+        for size, sized in by_size.items():
+            bounds = sorted({c.weight_from for c in sized} | {c.weight_to for c in sized})
+            # regions: gap before bounds[0], bounds[0], gap, bounds[1], ..., bounds[-1], gap after bounds[-1]
+            probes = [bounds[0] - 1]
+            for left, right in zip(bounds, bounds[1:], strict=False):
+                probes += [left, (left + right) / 2]
+            probes += [bounds[-1], bounds[-1] + 1]
+
+            self._index[size] = (bounds, [
+                tuple(c.id for c in sized if c.weight_from <= probe <= c.weight_to)
+                for probe in probes
+            ])
+
+    def search_ids(self, weight: float, size: int) -> list[int | str]:
+        if size not in self._index:
+            return []
+
+        bounds, regions = self._index[size]
+        i = bisect_left(bounds, weight)
+        region = 2 * i + 1 if i < len(bounds) and bounds[i] == weight else 2 * i
+        return list(regions[region])
+
+
+async def _load_catalogue(version: int | None) -> ContainerCatalogue:
     async with get_database().session_context() as session:
         res = await session.execute(
             select(ContainerModel).order_by(ContainerModel.size)
         )
     orm_containers = res.scalars().all()
-    return transform_containers(orm_containers)
+    return ContainerCatalogue(transform_containers(orm_containers), version)
+
+
+class ContainerCatalogueCache:
+    """
+    Process-local copy of the containers table.
+
+    Reloaded when the containers data version (bumped by the admin backend) changes;
+    the version is checked at most once per `CONTAINERS_VERSION_CHECK_INTERVAL` seconds.
+    """
+
+    def __init__(self):
+        self._catalogue: ContainerCatalogue | None = None
+        self._lock = asyncio.Lock()
+        self._checked_at = 0.0
+
+    async def get(self) -> ContainerCatalogue:
+        now = time.monotonic()
+        if self._catalogue is not None and now - self._checked_at < CONTAINERS_VERSION_CHECK_INTERVAL:
+            return self._catalogue
+
+        version = await get_data_version(CONTAINERS_DATA_VERSION)
+        self._checked_at = now
+        if self._catalogue is not None and (version is None or version == self._catalogue.version):
+            return self._catalogue
+
+        async with self._lock:
+            if self._catalogue is None or (version is not None and version != self._catalogue.version):
+                self._catalogue = await _load_catalogue(version)
+            return self._catalogue
+
+
+@cache
+def get_container_catalogue_cache() -> ContainerCatalogueCache:
+    return ContainerCatalogueCache()
+
+
+async def get_containers(
+    date: datetime.date,
+    departure_id: str | None = None,
+    destination_id: str | None = None,
+) -> ContainerCatalogue:
+    return await get_container_catalogue_cache().get()
 
 
 def search_container_ids(containers: list, weight: int, size: int):
+    if isinstance(containers, ContainerCatalogue):
+        return containers.search_ids(weight, size)
+
     return [
         c.id
         for c in containers
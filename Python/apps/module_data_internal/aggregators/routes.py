@@ -1,47 +1,91 @@
 import asyncio
 import datetime
 import logging
+from collections import defaultdict
+from collections.abc import Collection, Iterable
+from functools import cache
 
 from module_data_internal.schemas import (
+    CompanyModel,
+    ContainerModel,
     ContainerOwner,
     DropModel,
+    PointModel,
     PriceModel,
+    RouteCombinationModel,
     RouteModel,
     RouteType,
+    ServiceModel,
     ServicePriceModel,
 )
 from module_shared.cache_settings import get_setting_cached
+from module_shared.config import get_settings
 from module_shared.database import Base, get_database
 from module_shared.models.route import RouteResult
-from sqlalchemy import and_, desc, or_, select
-from sqlalchemy.orm import aliased, contains_eager, joinedload, selectinload
-
-from .transformers.routes import transform_routes
+from sqlalchemy import and_, bindparam, desc, or_, select
+from sqlalchemy.orm import aliased, contains_eager, joinedload
+
+from ..cache import get_internal_routes_cached
+from .routes_index import get_routes_index
+from .transformers.routes import (
+    RouteRows,
+    drop_columns,
+    segment_columns,
+    service_columns,
+    transform_routes,
+)
 
 logger = logging.getLogger(__name__)
 
+# Routes per query of services of found routes: one query per search, except for huge results,
+# far below limits of bound parameters
+SERVICES_CHUNK_SIZE = 10_000
 
-async def _execute_query(q):
-    async with get_database().session_context() as session:
-        result = (await session.execute(q)).unique()
-    return result.all()
+
+# Parameters of search statements. The statements are built once per variant and compiled once per engine:
+# values are passed on execution (see `search_params`), lists of ids are expanded into `IN (...)` by SQLAlchemy.
+DATE = bindparam("date")
+START_POINT_IDS = bindparam("start_point_ids", expanding=True)
+END_POINT_IDS = bindparam("end_point_ids", expanding=True)
+CONTAINER_IDS = bindparam("container_ids", expanding=True)
+ROUTE_IDS = bindparam("route_ids", expanding=True)
 
 
-def build_usual_query(
-    route_type: RouteType,
+def search_params(
     date: datetime.date,
-    start_point_id: int,
-    end_point_id: int,
+    start_point_ids: Collection[int],
+    end_point_ids: Collection[int],
     container_ids: list[int],
-):
-    where_clause = and_(
-        RouteModel.effective_from <= date,
-        RouteModel.effective_to >= date,
-        RouteModel.start_point_id == start_point_id,
-        RouteModel.end_point_id == end_point_id,
-        RouteModel.type == route_type,
-        RouteModel.dropp_off_point_id.is_(None),
-    )
+) -> dict:
+    """Values of parameters of route statements"""
+    return {
+        DATE.key: date,
+        START_POINT_IDS.key: list(start_point_ids),
+        END_POINT_IDS.key: list(end_point_ids),
+        CONTAINER_IDS.key: list(container_ids),
+    }
+
+
+async def _execute_query(q, params: dict):
+    async with get_database().session_context() as session:
+        result = (await session.execute(q, params)).unique()
+    return result.all()
+
+
+def _usual_conditions(route, route_type: RouteType) -> list:
+    return [
+        route.effective_from <= DATE,
+        route.effective_to >= DATE,
+        route.start_point_id.in_(START_POINT_IDS),
+        route.end_point_id.in_(END_POINT_IDS),
+        route.type == route_type,
+        route.dropp_off_point_id.is_(None),
+    ]
+
+
+@cache
+def build_usual_query(route_type: RouteType):
+    where_clause = and_(*_usual_conditions(RouteModel, route_type))
 
     return (
         select(RouteModel)
@@ -50,17 +94,7 @@ def build_usual_query(
             PriceModel,
             and_(
                 RouteModel.id == PriceModel.route_id,
-                PriceModel.container_id.in_(container_ids)
-            ),
-        )
-        .outerjoin(
-            ServicePriceModel,
-            and_(
-                RouteModel.id == ServicePriceModel.route_id,
-                or_(
-                    ServicePriceModel.container_id.is_(None),
-                    ServicePriceModel.container_id.in_(container_ids),
-                ),
+                PriceModel.container_id.in_(CONTAINER_IDS)
             ),
         )
         .order_by(desc(RouteModel.effective_to))
@@ -69,7 +103,6 @@ def build_usual_query(
             joinedload(RouteModel.start_point),
             joinedload(RouteModel.end_point),
             joinedload(RouteModel.company),
-            contains_eager(RouteModel.services).joinedload(ServicePriceModel.service),
             contains_eager(RouteModel.prices).joinedload(PriceModel.container),
         )
     )
@@ -80,83 +113,62 @@ def _create_aliases():
     RailRoute = aliased(RouteModel, name="rail_route")
     SeaPrice = aliased(PriceModel, name="sea_price")
     RailPrice = aliased(PriceModel, name="rail_price")
-    SeaServicePrice = aliased(ServicePriceModel, name="sea_service_price")
-    RailServicePrice = aliased(ServicePriceModel, name="rail_service_price")
-    return SeaRoute, RailRoute, SeaPrice, RailPrice, SeaServicePrice, RailServicePrice
+    return SeaRoute, RailRoute, SeaPrice, RailPrice
 
 
-def build_base_sea_rail_query(
-    date: datetime.date,
-    start_point_id: int,
-    end_point_id: int,
-    container_ids: list[int],
-    hide_sea_soc: bool = False,
-) -> tuple:
-    SeaRoute, RailRoute, SeaPrice, RailPrice, SeaServicePrice, RailServicePrice = _create_aliases()
-    where_conditions = [
-        # Types
-        SeaRoute.type == RouteType.SEA,
-        RailRoute.type == RouteType.RAIL,
-        # Dates
-        SeaRoute.effective_from <= date,
-        RailRoute.effective_from <= date,
-        SeaRoute.effective_to >= date,
-        RailRoute.effective_to >= date,
+def _sea_rail_conditions(sea_route, hide_sea_soc: bool) -> list:
+    conditions = [
         # Points
-        SeaRoute.start_point_id == start_point_id,
-        RailRoute.end_point_id == end_point_id,
+        RouteCombinationModel.start_point_id.in_(START_POINT_IDS),
+        RouteCombinationModel.end_point_id.in_(END_POINT_IDS),
+        # Dates: the routes and the drop are valid on it
+        RouteCombinationModel.effective_from <= DATE,
+        RouteCombinationModel.effective_to >= DATE,
         # Containers
-        SeaPrice.container_id.in_(container_ids),
-        RailPrice.container_id.in_(container_ids),
-        # COC/SOC logic
-        or_(
-            RailRoute.container_owner == ContainerOwner.SOC,
-            and_(
-                SeaRoute.company_id == RailRoute.company_id,
-                RailRoute.container_owner == ContainerOwner.COC,
-            ),
-        ),
-        # Through routes logic
-        or_(
-            ~RailRoute.is_through & ~SeaRoute.is_through,
-            SeaRoute.company_id == RailRoute.company_id,
-        ),
-        # Drop-off must exist: either via dropp_off_point_id or via DROPS table
         or_(
-            SeaRoute.dropp_off_point_id.isnot(None),
-            DropModel.id.isnot(None),
+            RouteCombinationModel.container_id.is_(None),
+            RouteCombinationModel.container_id.in_(CONTAINER_IDS),
         ),
     ]
     if hide_sea_soc:
-        where_conditions.append(SeaRoute.container_owner != ContainerOwner.SOC)
+        conditions.append(sea_route.container_owner != ContainerOwner.SOC)
+    return conditions
 
-    drop_join_clause = and_(
-        SeaRoute.dropp_off_point_id.is_(None),  # if not, drop is already included!
-        # Points
-        RailRoute.start_point_id == DropModel.start_point_id,
-        RailRoute.end_point_id == DropModel.end_point_id,
-        # Container
-        RailPrice.container_id == DropModel.container_id,
-        # Company
-        SeaRoute.company_id == DropModel.company_id,
-        # Drop-off must be valid on the shipping date
-        DropModel.effective_from <= date,
-        DropModel.effective_to >= date,
+
+def _sea_price_clause(sea_route, sea_price):
+    return and_(sea_route.id == sea_price.route_id, sea_price.container_id.in_(CONTAINER_IDS))
+
+
+def _rail_price_clause(rail_route, rail_price):
+    return and_(
+        rail_route.id == rail_price.route_id,
+        rail_price.container_id.in_(CONTAINER_IDS),
+        # the drop is of the container of the price
+        or_(
+            RouteCombinationModel.container_id.is_(None),
+            RouteCombinationModel.container_id == rail_price.container_id,
+        ),
     )
 
+
+@cache
+def build_base_sea_rail_query(hide_sea_soc: bool = False) -> tuple:
+    """
+    Sea+rail routes valid on the date, looked up in precomputed combinations: COC/SOC, through routes
+    and drop-off rules are already checked by `module_data_internal.route_combinations`
+    """
+    SeaRoute, RailRoute, SeaPrice, RailPrice = _create_aliases()
+    where_conditions = _sea_rail_conditions(SeaRoute, hide_sea_soc)
+
     return (
         select(SeaRoute, RailRoute, DropModel)
+        .select_from(RouteCombinationModel)
         .where(and_(*where_conditions))
-        .join(SeaPrice, SeaRoute.id == SeaPrice.route_id)
-        .join(RailRoute, and_(
-            SeaRoute.end_point_id == RailRoute.start_point_id,
-            or_(
-                SeaRoute.dropp_off_point_id.is_(None),
-                SeaRoute.dropp_off_point_id == RailRoute.end_point_id,
-            ),
-        ))
-        .join(RailPrice, RailRoute.id == RailPrice.route_id)
-        .outerjoin(DropModel, drop_join_clause)
+        .join(SeaRoute, SeaRoute.id == RouteCombinationModel.sea_route_id)
+        .join(SeaPrice, _sea_price_clause(SeaRoute, SeaPrice))
+        .join(RailRoute, RailRoute.id == RouteCombinationModel.rail_route_id)
+        .join(RailPrice, _rail_price_clause(RailRoute, RailPrice))
+        .outerjoin(DropModel, DropModel.id == RouteCombinationModel.drop_id)
         .order_by(desc(SeaRoute.effective_to), desc(RailRoute.effective_to))
         # note: I tried using 'group by' statement, but it cuts off prices
         # here could be 'group_by', but it doesn't work correctly with 'joinedload'
@@ -166,34 +178,100 @@ def build_base_sea_rail_query(
             joinedload(SeaRoute.end_point),
             joinedload(SeaRoute.company),
             contains_eager(SeaRoute.prices, alias=SeaPrice).joinedload(PriceModel.container),
-            selectinload(SeaRoute.services.of_type(SeaServicePrice)).joinedload(SeaServicePrice.service),
-            # note: with_loader_criteria does not work properly with cache (first start - ok, next - ignored)
-            # so we need filter it after we've got a response
-            # the code:
-            # `with_loader_criteria(SeaServicePrice, or_(`
-            #     `SeaServicePrice.container_id.is_(None),`
-            #     `SeaServicePrice.container_id.in_(container_ids),`
-            # `)),`
             joinedload(RailRoute.start_point),
             joinedload(RailRoute.end_point),
             joinedload(RailRoute.company),
             contains_eager(RailRoute.prices, alias=RailPrice).joinedload(PriceModel.container),
-            selectinload(RailRoute.services.of_type(RailServicePrice)).joinedload(RailServicePrice.service),
-            # note: with_loader_criteria does not work properly with cache (first start - ok, next - ignored)
-            # so we need filter it after we've got a response
-            # the code:
-            # `with_loader_criteria(RailServicePrice, or_(`
-            #     `RailServicePrice.container_id.is_(None),`
-            #     `RailServicePrice.container_id.in_(container_ids),`
-            # `)),`
         )
     )
 
 
+def _projected_segment(name: str) -> tuple:
+    """Aliases of a segment of projected queries: its route, company, start and end points, price and container"""
+    return (
+        aliased(RouteModel, name=f"{name}_route"),
+        aliased(CompanyModel, name=f"{name}_company"),
+        aliased(PointModel, name=f"{name}_start_point"),
+        aliased(PointModel, name=f"{name}_end_point"),
+        aliased(PriceModel, name=f"{name}_price"),
+        aliased(ContainerModel, name=f"{name}_container"),
+    )
+
+
+def _join_projected_segment(stmt, segment: tuple, price_clause):
+    route, company, start_point, end_point, price, container = segment
+    return (
+        stmt
+        .join(company, company.id == route.company_id)
+        .join(start_point, start_point.id == route.start_point_id)
+        .join(end_point, end_point.id == route.end_point_id)
+        .join(price, price_clause)
+        .join(container, container.id == price.container_id)
+    )
+
+
+@cache
+def build_usual_rows_query(route_type: RouteType):
+    """`build_usual_query` selecting `segment_columns` instead of entities; services are selected separately"""
+    segment = _projected_segment(route_type.value.lower())
+    route, price = segment[0], segment[4]
+
+    stmt = select(*segment_columns(*segment)).select_from(route)
+    return (
+        _join_projected_segment(stmt, segment, and_(route.id == price.route_id, price.container_id.in_(CONTAINER_IDS)))
+        .where(*_usual_conditions(route, route_type))
+        .order_by(desc(route.effective_to))
+    )
+
+
+@cache
+def build_sea_rail_rows_query(hide_sea_soc: bool = False):
+    """`build_base_sea_rail_query` selecting `segment_columns` of both routes and `drop_columns` instead of entities"""
+    sea, rail = _projected_segment("sea"), _projected_segment("rail")
+    sea_route, rail_route = sea[0], rail[0]
+
+    stmt = (
+        select(*segment_columns(*sea), *segment_columns(*rail), *drop_columns(DropModel))
+        .select_from(RouteCombinationModel)
+        .join(sea_route, sea_route.id == RouteCombinationModel.sea_route_id)
+    )
+    stmt = _join_projected_segment(stmt, sea, _sea_price_clause(sea_route, sea[4]))
+    stmt = stmt.join(rail_route, rail_route.id == RouteCombinationModel.rail_route_id)
+    stmt = _join_projected_segment(stmt, rail, _rail_price_clause(rail_route, rail[4]))
+    return (
+        stmt
+        .outerjoin(DropModel, DropModel.id == RouteCombinationModel.drop_id)
+        .where(*_sea_rail_conditions(sea_route, hide_sea_soc))
+        .order_by(desc(sea_route.effective_to), desc(rail_route.effective_to))
+    )
+
+
+@cache
+def build_services_rows_query():
+    """
+    `service_columns` of services of the routes (`ROUTE_IDS`), common or of the containers.
+
+    Services are loaded by this query for routes found by both ORM and projected queries:
+    `with_loader_criteria` filters of relationship loaders are lost by the statement cache (applied only on the
+    first run), so filtering them in SQL this way doesn't need to reassign `services` of identity-mapped routes.
+    """
+    return (
+        select(*service_columns(ServicePriceModel, ServiceModel))
+        .join(ServiceModel, ServiceModel.id == ServicePriceModel.service_id)
+        .where(
+            ServicePriceModel.route_id.in_(ROUTE_IDS),
+            or_(
+                ServicePriceModel.container_id.is_(None),
+                ServicePriceModel.container_id.in_(CONTAINER_IDS),
+            ),
+        )
+        .order_by(ServicePriceModel.id)
+    )
+
+
 def process_results(
     results: list[list[list[Base]] | BaseException],
     date: datetime.date,
-    container_ids: list[int],
 ) -> list[tuple[list[Base], bool]]:
     flat_result: list = []
     seen_ids: set[tuple[int, ...]] = set()
@@ -215,17 +293,7 @@ def process_results(
             if ids in seen_ids:
                 continue
 
-            may_route_be_invalid = False
-            for segment in routes:
-                # TODO: find another way...
-                segment.services = [
-                    service for service in segment.services
-                    if service.container_id is None or service.container_id in container_ids
-                ]
-
-                if segment.effective_to.date() < date:
-                    may_route_be_invalid = True
-                    break
+            may_route_be_invalid = any(segment.effective_to.date() < date for segment in routes)
 
             seen_ids.add(ids)
             flat_result.append((row, may_route_be_invalid))
@@ -233,51 +301,173 @@ def process_results(
     return flat_result
 
 
-async def find_all_paths(
-    date: datetime.date,
-    start_point_id: int,
-    end_point_id: int,
-    container_ids: list[int],
-) -> list[RouteResult]:
-    hide_sea_soc = False
+async def _get_hide_sea_soc() -> bool:
     try:
         async with get_database().session_context() as session:
             setting = await get_setting_cached(session, "feature-flag", "hide-sea-soc")
             if setting is not None:
-                hide_sea_soc = bool(setting.value)
+                return bool(setting.value)
     except Exception:
         logger.warning("Failed to read hide-sea-soc setting, defaulting to False")
+    return False
 
-    query_rail = build_usual_query(
-        RouteType.RAIL,
-        date,
-        start_point_id,
-        end_point_id,
-        container_ids,
-    )
-    query_sea = build_usual_query(
-        RouteType.SEA,
-        date,
-        start_point_id,
-        end_point_id,
-        container_ids,
-    )
 
-    sea_rail_query = build_base_sea_rail_query(
-        date,
-        start_point_id,
-        end_point_id,
-        container_ids,
-        hide_sea_soc=hide_sea_soc,
-    )
+def group_by_pairs(
+    routes_and_drops: list[tuple[list[Base], bool]],
+    pairs: Iterable[tuple[int, int]],
+) -> dict[tuple[int, int], list[tuple[list[Base], bool]]]:
+    """Demultiplexes rows of the set-based queries back to the requested (start, end) pairs"""
+    grouped: dict[tuple[int, int], list[tuple[list[Base], bool]]] = {pair: [] for pair in pairs}
+
+    for row, may_route_be_invalid in routes_and_drops:
+        routes = row[:-1] if not row[-1] or isinstance(row[-1], DropModel) else row
+        # the queries select the cross product of starts and ends, so some rows may belong to no pair
+        group = grouped.get((routes[0].start_point_id, routes[-1].end_point_id))
+        if group is not None:
+            group.append((row, may_route_be_invalid))
+
+    return grouped
+
+
+async def _get_services_rows(route_ids: Collection[int], container_ids: list[int]) -> dict[int, list[tuple]]:
+    services: dict[int, list[tuple]] = defaultdict(list)
+    route_ids = sorted(route_ids)
+    async with get_database().session_context() as session:
+        for i in range(0, len(route_ids), SERVICES_CHUNK_SIZE):
+            params = {ROUTE_IDS.key: route_ids[i:i + SERVICES_CHUNK_SIZE], CONTAINER_IDS.key: container_ids}
+            for row in await session.execute(build_services_rows_query(), params):
+                services[row[0]].append(row)
+    return services
+
+
+def _pairs_params(date: datetime.date, pairs: list[tuple[int, int]], container_ids: list[int]) -> dict:
+    start_point_ids = {start_point_id for start_point_id, _ in pairs}
+    end_point_ids = {end_point_id for _, end_point_id in pairs}
+    return search_params(date, start_point_ids, end_point_ids, container_ids)
+
+
+async def _search_paths(
+    date: datetime.date,
+    pairs: list[tuple[int, int]],
+    container_ids: list[int],
+    hide_sea_soc: bool,
+) -> tuple[dict[tuple[int, int], list[RouteResult]], bool]:
+    params = _pairs_params(date, pairs, container_ids)
+
+    all_queries = [
+        build_usual_query(RouteType.RAIL),
+        build_usual_query(RouteType.SEA),
+        build_base_sea_rail_query(hide_sea_soc=hide_sea_soc),
+    ]
+
+    coroutines = [_execute_query(query, params) for query in all_queries]
+    results = await asyncio.gather(*coroutines, return_exceptions=True)
+    is_complete = not any(isinstance(result, BaseException) for result in results)
+
+    routes_and_drops = process_results(results, date)
+    route_ids = {segment.id for row, _ in routes_and_drops for segment in row if isinstance(segment, RouteModel)}
+    try:
+        services = await _get_services_rows(route_ids, container_ids)
+    except Exception:
+        # mandatory services change prices: routes are not returned without them
+        logger.exception("Services query failed")
+        return {pair: [] for pair in pairs}, False
+
+    grouped = group_by_pairs(routes_and_drops, pairs)
+    return {pair: transform_routes(rows, services) for pair, rows in grouped.items()}, is_complete
+
+
+async def _stream_rows(stmt, params: dict, rows: RouteRows) -> RouteRows:
+    async with get_database().session_context() as session:
+        async for row in await session.stream(stmt, params):
+            rows.add(row)
+    return rows
+
+
+async def _search_paths_projected(
+    date: datetime.date,
+    pairs: list[tuple[int, int]],
+    container_ids: list[int],
+    hide_sea_soc: bool,
+) -> tuple[dict[tuple[int, int], list[RouteResult]], bool]:
+    """`_search_paths` assembling results from selected columns, without ORM entities"""
+    params = _pairs_params(date, pairs, container_ids)
 
     all_queries = [
-        query_rail,
-        query_sea,
-        sea_rail_query,
+        (build_usual_rows_query(RouteType.RAIL), 1),
+        (build_usual_rows_query(RouteType.SEA), 1),
+        (build_sea_rail_rows_query(hide_sea_soc), 2),
     ]
 
-    coroutines = [_execute_query(query) for query in all_queries]
+    coroutines = [_stream_rows(query, params, RouteRows(segments_count)) for query, segments_count in all_queries]
     results = await asyncio.gather(*coroutines, return_exceptions=True)
+    grouped: dict[tuple[int, int], list[RouteResult]] = {pair: [] for pair in pairs}
+
+    found: list[RouteRows] = []
+    for result in results:
+        if isinstance(result, BaseException):
+            logger.error("Route query failed", exc_info=result)
+        else:
+            found.append(result)
+
+    try:
+        services = await _get_services_rows(set().union(*(rows.route_ids for rows in found)), container_ids)
+    except Exception:
+        # mandatory services change prices: routes are not returned without them
+        logger.exception("Services query failed")
+        return grouped, False
 
-    return transform_routes(process_results(results, date, container_ids))
+    for rows in found:
+        for pair, route in rows.results(date, services):
+            # the queries select the cross product of starts and ends, so some rows may belong to no pair
+            group = grouped.get(pair)
+            if group is not None:
+                group.append(route)
+
+    return grouped, len(found) == len(results)
+
+
+async def find_all_paths_many(
+    date: datetime.date,
+    pairs: Iterable[tuple[int, int]],
+    container_ids: list[int],
+) -> dict[tuple[int, int], list[RouteResult]]:
+    """
+    Finds routes for several (start, end) pairs at once.
+
+    The number of queries doesn't depend on the number of pairs: there is one query per route type.
+    Results are cached in Redis per pair until the routes data version changes.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return {}
+
+    hide_sea_soc = await _get_hide_sea_soc()
+
+    if get_settings().ROUTES_INDEX_ENABLED:
+        index = await get_routes_index().get()
+        return {
+            (start_point_id, end_point_id): index.find_all_paths(
+                date, start_point_id, end_point_id, container_ids, hide_sea_soc,
+            )
+            for start_point_id, end_point_id in pairs
+        }
+
+    search_paths = _search_paths_projected if get_settings().ROUTES_QUERY_PROJECTION_ENABLED else _search_paths
+    return await get_internal_routes_cached(
+        date,
+        pairs,
+        container_ids,
+        hide_sea_soc,
+        lambda missed: search_paths(date, missed, container_ids, hide_sea_soc),
+    )
+
+
+async def find_all_paths(
+    date: datetime.date,
+    start_point_id: int,
+    end_point_id: int,
+    container_ids: list[int],
+) -> list[RouteResult]:
+    pair = (start_point_id, end_point_id)
+    return (await find_all_paths_many(date, [pair], container_ids))[pair]
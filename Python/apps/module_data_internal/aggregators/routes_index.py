@@ -0,0 +1,334 @@
+import asyncio
+import datetime
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import cache
+
+from module_data_internal.schemas import (
+    ContainerOwner,
+    DropModel,
+    PriceModel,
+    RouteModel,
+    RouteType,
+    ServicePriceModel,
+)
+from module_shared.config import get_settings
+from module_shared.data_version import ROUTES_DATA_VERSION, get_data_version
+from module_shared.database import get_database
+from module_shared.models.route import DropItem, RouteResult, RouteSegment, ServiceItem
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+
+from .transformers.routes import _segment_from_orm, _services_from_segment
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class IndexedRoute:
+    id: int  # noqa: A003
+    type: RouteType  # noqa: A003
+    company_id: int
+    start_point_id: int
+    end_point_id: int
+    dropp_off_point_id: int | None
+    effective_from: datetime.datetime
+    effective_to: datetime.datetime
+    container_owner: ContainerOwner
+    is_through: bool
+    container_ids: frozenset[int]
+    # Templates: never returned as-is, copied per query (callers mutate prices and segments)
+    segment: RouteSegment
+    services: tuple[tuple[int | None, ServiceItem], ...]
+
+    def is_effective(self, moment: datetime.datetime) -> bool:
+        return self.effective_from <= moment <= self.effective_to
+
+    def has_any_container(self, container_ids: set[int]) -> bool:
+        return not self.container_ids.isdisjoint(container_ids)
+
+    def to_segment(self, container_ids: set[int]) -> RouteSegment:
+        prices = [
+            price.model_copy(deep=True)
+            for price in self.segment.prices
+            if price.container is not None and price.container.id in container_ids
+        ]
+        return self.segment.model_copy(update={"prices": prices})
+
+    def to_services(self, container_ids: set[int]) -> list[ServiceItem]:
+        return [
+            service.model_copy()
+            for container_id, service in self.services
+            if container_id is None or container_id in container_ids
+        ]
+
+
+@dataclass(frozen=True, slots=True)
+class IndexedDrop:
+    container_id: int
+    effective_from: datetime.datetime
+    effective_to: datetime.datetime
+    price: float
+    conversation_percents: float
+    currency: str
+
+    def is_effective(self, moment: datetime.datetime) -> bool:
+        return self.effective_from <= moment <= self.effective_to
+
+    def to_item(self) -> DropItem:
+        return DropItem(
+            price=self.price,
+            conversation_percents=self.conversation_percents,
+            currency=self.currency,
+        )
+
+
+def _by_effective_to(items: list) -> None:
+    # The same ordering as `ORDER BY effective_to DESC` of the SQL path
+    items.sort(key=lambda item: item.effective_to, reverse=True)
+
+
+class RoutesIndex:
+    """
+    Read-only adjacency index over all routes, prices, services and drops.
+
+    Answers the same questions as the SQL queries in `routes.py`
+    (see ROUTES-CALCULATION-LOGIC.md) with dictionary lookups.
+    """
+
+    def __init__(self, routes: list[IndexedRoute], drops: dict[tuple, list[IndexedDrop]], version: int | None):
+        self.version = version
+        self.routes_count = len(routes)
+
+        self._direct: dict[tuple[RouteType, int, int], list[IndexedRoute]] = defaultdict(list)
+        self._sea_by_start: dict[int, list[IndexedRoute]] = defaultdict(list)
+        self._rail_by_points: dict[tuple[int, int], list[IndexedRoute]] = defaultdict(list)
+        self._drops = drops
+
+        for route in routes:
+            if route.dropp_off_point_id is None:
+                self._direct[(route.type, route.start_point_id, route.end_point_id)].append(route)
+            if route.type == RouteType.SEA:
+                self._sea_by_start[route.start_point_id].append(route)
+            elif route.type == RouteType.RAIL:
+                self._rail_by_points[(route.start_point_id, route.end_point_id)].append(route)
+
+        for group in (self._direct, self._sea_by_start, self._rail_by_points, self._drops):
+            for items in group.values():
+                _by_effective_to(items)
+
+    def _find_direct(
+        self,
+        route_type: RouteType,
+        moment: datetime.datetime,
+        start_point_id: int,
+        end_point_id: int,
+        container_ids: set[int],
+    ) -> list[tuple[tuple[IndexedRoute, ...], IndexedDrop | None]]:
+        return [
+            ((route,), None)
+            for route in self._direct.get((route_type, start_point_id, end_point_id), ())
+            if route.is_effective(moment) and route.has_any_container(container_ids)
+        ]
+
+    def _find_drop(
+        self,
+        sea: IndexedRoute,
+        rail: IndexedRoute,
+        moment: datetime.datetime,
+        container_ids: set[int],
+    ) -> IndexedDrop | None:
+        drops = self._drops.get((rail.start_point_id, rail.end_point_id, sea.company_id), ())
+        for drop in drops:
+            if (
+                drop.container_id in container_ids
+                and drop.container_id in rail.container_ids
+                and drop.is_effective(moment)
+            ):
+                return drop
+        return None
+
+    def _find_sea_rail(  # noqa: C901
+        self,
+        moment: datetime.datetime,
+        start_point_id: int,
+        end_point_id: int,
+        container_ids: set[int],
+        hide_sea_soc: bool,
+    ) -> list[tuple[tuple[IndexedRoute, ...], IndexedDrop | None]]:
+        found = []
+        for sea in self._sea_by_start.get(start_point_id, ()):
+            if not sea.is_effective(moment) or not sea.has_any_container(container_ids):
+                continue
+            if hide_sea_soc and sea.container_owner == ContainerOwner.SOC:
+                continue
+            if sea.dropp_off_point_id is not None and sea.dropp_off_point_id != end_point_id:
+                continue
+
+            for rail in self._rail_by_points.get((sea.end_point_id, end_point_id), ()):
+                if not rail.is_effective(moment) or not rail.has_any_container(container_ids):
+                    continue
+
+                same_company = sea.company_id == rail.company_id
+                # COC/SOC logic
+                if (
+                    rail.container_owner != ContainerOwner.SOC
+                    and not (same_company and rail.container_owner == ContainerOwner.COC)
+                ):
+                    continue
+                # Through routes logic
+                if (sea.is_through or rail.is_through) and not same_company:
+                    continue
+
+                drop = None
+                if sea.dropp_off_point_id is None:
+                    # Drop-off must exist: either via dropp_off_point_id or via DROPS table
+                    drop = self._find_drop(sea, rail, moment, container_ids)
+                    if drop is None:
+                        continue
+
+                found.append(((sea, rail), drop))
+        return found
+
+    def find_all_paths(
+        self,
+        date: datetime.date,
+        start_point_id: int,
+        end_point_id: int,
+        container_ids: list[int],
+        hide_sea_soc: bool = False,
+    ) -> list[RouteResult]:
+        moment = datetime.datetime.combine(date, datetime.time.min)
+        ids = set(container_ids)
+
+        found = [
+            *self._find_direct(RouteType.RAIL, moment, start_point_id, end_point_id, ids),
+            *self._find_direct(RouteType.SEA, moment, start_point_id, end_point_id, ids),
+            *self._find_sea_rail(moment, start_point_id, end_point_id, ids, hide_sea_soc),
+        ]
+
+        results = []
+        for routes, drop in found:
+            services: list[ServiceItem] = []
+            for route in routes:
+                services.extend(route.to_services(ids))
+
+            results.append(RouteResult(
+                segments=[route.to_segment(ids) for route in routes],
+                drop=drop.to_item() if drop is not None else None,
+                may_be_invalid=False,
+                services=services,
+            ))
+        return results
+
+
+def _index_route(route: RouteModel) -> IndexedRoute:
+    segment = _segment_from_orm(route)
+    services = _services_from_segment(route, segment.id)
+
+    return IndexedRoute(
+        id=route.id,
+        type=route.type,
+        company_id=route.company_id,
+        start_point_id=route.start_point_id,
+        end_point_id=route.end_point_id,
+        dropp_off_point_id=route.dropp_off_point_id,
+        effective_from=route.effective_from,
+        effective_to=route.effective_to,
+        container_owner=route.container_owner,
+        is_through=route.is_through,
+        container_ids=frozenset(price.container_id for price in route.prices),
+        segment=segment,
+        services=tuple(
+            (service_price.container_id, service)
+            for service_price, service in zip(route.services, services, strict=True)
+        ),
+    )
+
+
+def _index_drop(drop: DropModel) -> IndexedDrop:
+    return IndexedDrop(
+        container_id=drop.container_id,
+        effective_from=drop.effective_from,
+        effective_to=drop.effective_to,
+        price=drop.price,
+        conversation_percents=drop.conversation_percents,
+        currency=drop.currency,
+    )
+
+
+async def build_routes_index(version: int | None = None) -> RoutesIndex:
+    routes_query = select(RouteModel).options(
+        joinedload(RouteModel.start_point),
+        joinedload(RouteModel.end_point),
+        joinedload(RouteModel.company),
+        selectinload(RouteModel.prices).joinedload(PriceModel.container),
+        selectinload(RouteModel.services).joinedload(ServicePriceModel.service),
+    )
+
+    async with get_database().session_context() as session:
+        routes = (await session.scalars(routes_query)).unique().all()
+        drops = (await session.scalars(select(DropModel))).all()
+
+        indexed_routes = [_index_route(route) for route in routes]
+        indexed_drops: dict[tuple, list[IndexedDrop]] = defaultdict(list)
+        for drop in drops:
+            indexed_drops[(drop.start_point_id, drop.end_point_id, drop.company_id)].append(_index_drop(drop))
+
+    return RoutesIndex(indexed_routes, indexed_drops, version)
+
+
+class RoutesIndexHolder:
+    """
+    Keeps the current `RoutesIndex` of the process.
+
+    The index is rebuilt when the routes data version (bumped by the admin backend on every change)
+    differs from the version it was built from. The version is checked at most once per
+    `ROUTES_INDEX_VERSION_CHECK_INTERVAL` seconds; requests keep using the previous index during a rebuild.
+    """
+
+    def __init__(self):
+        self._index: RoutesIndex | None = None
+        self._lock = asyncio.Lock()
+        self._checked_at = 0.0
+
+    @property
+    def index(self) -> RoutesIndex | None:
+        return self._index
+
+    async def refresh(self, version: int | None = None) -> RoutesIndex:
+        async with self._lock:
+            if self._index is not None and version is not None and self._index.version == version:
+                return self._index
+
+            started_at = time.perf_counter()
+            index = await build_routes_index(version)
+            self._index = index
+            logger.info(
+                "Routes index built: version=%s, routes=%s, took %.3fs",
+                version, index.routes_count, time.perf_counter() - started_at,
+            )
+            return index
+
+    async def get(self) -> RoutesIndex:
+        now = time.monotonic()
+        if self._index is not None and now - self._checked_at < get_settings().ROUTES_INDEX_VERSION_CHECK_INTERVAL:
+            return self._index
+        self._checked_at = now
+
+        version = await get_data_version(ROUTES_DATA_VERSION)
+        if self._index is None:
+            return await self.refresh(version)
+        if version is None or version == self._index.version:
+            return self._index
+        if self._lock.locked():
+            # Somebody is already rebuilding it
+            return self._index
+        return await self.refresh(version)
+
+
+@cache
+def get_routes_index() -> RoutesIndexHolder:
+    return RoutesIndexHolder()
@@ -1,3 +1,6 @@
+import datetime
+from collections.abc import Iterable
+
 from module_data_internal.schemas import DropModel, PriceModel, RouteModel
 from module_shared.database import Base
 from module_shared.models.route import (
@@ -68,8 +71,26 @@ def _services_from_segment(route: RouteModel, segment_id: int | str) -> list[Ser
     ]
 
 
+def services_from_rows(rows: Iterable[tuple], segment_id: int | str) -> list[ServiceItem]:
+    """`ServiceItem`s of a segment from `service_columns` rows of its route"""
+    return [
+        ServiceItem(
+            segment_id=segment_id,
+            name=name,
+            description=description,
+            hint=hint,
+            currency=currency,
+            price=price,
+            checked=default,
+            mandatory=mandatory,
+        )
+        for _, name, description, hint, currency, price, default, mandatory in rows
+    ]
+
+
 def _route_from_orm(
     route_and_drop: tuple[list[Base], bool],
+    services: dict[int, list[tuple]],
 ) -> RouteResult:
     segments_raw, may_route_be_invalid = route_and_drop
     drop_model: DropModel | None = None
@@ -84,7 +105,7 @@ def _route_from_orm(
     for segment in segments_raw:
         seg = _segment_from_orm(segment)
         mapped_segments.append(seg)
-        all_services.extend(_services_from_segment(segment, seg.id))
+        all_services.extend(services_from_rows(services.get(segment.id, ()), seg.id))
 
     drop: DropItem | None = None
     if drop_model is not None:
@@ -104,5 +125,192 @@ def _route_from_orm(
 
 def transform_routes(
     routes_and_drops: list[tuple[list[Base], bool]],
+    services: dict[int, list[tuple]],
 ) -> list[RouteResult]:
-    return [_route_from_orm(r) for r in routes_and_drops]
+    """`services` are `service_columns` rows by route ids, loaded separately from the routes"""
+    return [_route_from_orm(r, services) for r in routes_and_drops]
+
+
+def segment_columns(route, company, start_point, end_point, price, container) -> tuple:
+    """
+    Columns of a segment and one of its prices in rows of projected queries, read by `RouteRows`.
+
+    Arguments are (aliases of) `RouteModel`, `CompanyModel`, `PointModel` of start and end, `PriceModel`
+    and `ContainerModel`.
+    """
+    return (
+        route.id,
+        route.type,
+        route.effective_from,
+        route.effective_to,
+        route.comment,
+        route.timetable,
+        route.container_transfer_terms,
+        route.container_shipment_terms,
+        route.container_owner,
+        route.start_point_id,
+        route.end_point_id,
+        company.name,
+        start_point.RU_country,
+        start_point.RU_city,
+        end_point.RU_country,
+        end_point.RU_city,
+        price.id,
+        price.value,
+        price.currency,
+        price.conversation_percents,
+        container.id,
+        container.type,
+        container.size,
+        container.weight_from,
+        container.weight_to,
+        container.name,
+    )
+
+
+def service_columns(service_price, service) -> tuple:
+    """Columns of a service price in rows of projected queries, read by `RouteRows`"""
+    return (
+        service_price.route_id,
+        service.name,
+        service.description,
+        service.hint,
+        service_price.currency,
+        service_price.price,
+        service.default,
+        service.mandatory,
+    )
+
+
+def drop_columns(drop) -> tuple:
+    """Columns of a drop in rows of projected queries, after columns of segments"""
+    return drop.id, drop.price, drop.conversation_percents, drop.currency
+
+
+# columns of the route in `segment_columns`, then of the price
+_ROUTE_WIDTH = 16
+_SEGMENT_WIDTH = 26
+
+
+class _ProjectedSegment:
+    """A route read from rows, with its prices collected from all of them"""
+
+    __slots__ = ("values", "prices")
+
+    def __init__(self, values: tuple):
+        self.values = values[:_ROUTE_WIDTH]
+        self.prices: dict[int, tuple] = {}
+
+    @property
+    def start_point_id(self) -> int:
+        return self.values[9]
+
+    @property
+    def end_point_id(self) -> int:
+        return self.values[10]
+
+    @property
+    def effective_to(self):
+        return self.values[3]
+
+    def add_price(self, values: tuple) -> None:
+        self.prices.setdefault(values[_ROUTE_WIDTH], values[_ROUTE_WIDTH + 1:])
+
+    def to_segment(self) -> RouteSegment:
+        (
+            route_id, route_type, effective_from, effective_to, comment, timetable,
+            transfer_terms, shipment_terms, container_owner, _, _,
+            company, start_country, start_city, end_country, end_city,
+        ) = self.values
+
+        return RouteSegment(
+            id=route_id,
+            company=company,
+            type=route_type.name,
+            effectiveFrom=effective_from,
+            effectiveTo=effective_to,
+            startPointCountry=start_country,
+            startPointName=start_city,
+            endPointCountry=end_country,
+            endPointName=end_city,
+            comment=comment,
+            timetable=timetable,
+            container_transfer_terms=transfer_terms,
+            container_shipment_terms=shipment_terms,
+            container_owner=container_owner,
+            prices=[
+                PriceItem(
+                    container=ContainerItem(
+                        id=container_id,
+                        type=container_type.value,
+                        size=size,
+                        weight_from=weight_from,
+                        weight_to=weight_to,
+                        name=name,
+                    ),
+                    value=value,
+                    currency=currency,
+                    conversation_percents=conversation_percents,
+                )
+                for (
+                    value, currency, conversation_percents,
+                    container_id, container_type, size, weight_from, weight_to, name,
+                ) in self.prices.values()
+            ],
+        )
+
+
+class RouteRows:
+    """
+    Assembles `RouteResult`s from rows of a projected query without hydrating ORM entities.
+
+    Rows consist of `segment_columns` of `segments_count` segments, optionally followed by `drop_columns`.
+    Like ORM results: segments get prices of all rows they appear in
+    and only the first row (with its drop) of the same routes is kept.
+    """
+
+    def __init__(self, segments_count: int):
+        self.segments_count = segments_count
+        self._segments: dict[int, _ProjectedSegment] = {}
+        # drops of paths (ids of their routes) by the first rows of them
+        self._paths: dict[tuple[int, ...], tuple | None] = {}
+
+    def add(self, row) -> None:
+        ids = []
+        for offset in range(0, self.segments_count * _SEGMENT_WIDTH, _SEGMENT_WIDTH):
+            values = row[offset:offset + _SEGMENT_WIDTH]
+            segment = self._segments.get(values[0])
+            if segment is None:
+                segment = self._segments[values[0]] = _ProjectedSegment(values)
+            segment.add_price(values)
+            ids.append(values[0])
+
+        drop = row[self.segments_count * _SEGMENT_WIDTH:]
+        self._paths.setdefault(tuple(ids), drop[1:] if drop and drop[0] is not None else None)
+
+    @property
+    def route_ids(self) -> set[int]:
+        return set(self._segments)
+
+    def results(
+        self,
+        date: datetime.date,
+        services: dict[int, list[tuple]],
+    ) -> list[tuple[tuple[int, int], RouteResult]]:
+        """Results with the (start, end) pairs of them; `services` are `service_columns` rows by route ids"""
+        results = []
+        for ids, drop in self._paths.items():
+            segments = [self._segments[route_id] for route_id in ids]
+            pair = (segments[0].start_point_id, segments[-1].end_point_id)
+
+            results.append((pair, RouteResult(
+                segments=[segment.to_segment() for segment in segments],
+                drop=DropItem(price=drop[0], conversation_percents=drop[1], currency=drop[2]) if drop else None,
+                may_be_invalid=any(segment.effective_to.date() < date for segment in segments),
+                services=[
+                    service
+                    for route_id in ids
+                    for service in services_from_rows(services.get(route_id, ()), route_id)
+                ],
+            )))
+        return results
@@ -0,0 +1,93 @@
+import asyncio
+import datetime
+import json
+import logging
+from collections.abc import Awaitable, Callable
+
+from module_shared.data_version import ROUTES_DATA_VERSION, get_data_version
+from module_shared.models.route import RouteResult
+from module_shared.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Keys contain the routes data version, so entries of old versions are never read again:
+# the TTL only frees memory
+INTERNAL_ROUTES_TTL = 86400
+
+Pair = tuple[int, int]
+RoutesByPairs = dict[Pair, list[RouteResult]]
+
+
+def _routes_key(
+    version: int,
+    date: datetime.date,
+    pair: Pair,
+    container_ids: list[int],
+    hide_sea_soc: bool,
+) -> str:
+    start_point_id, end_point_id = pair
+    ids = ",".join(str(i) for i in sorted(container_ids))
+    return (
+        f"backend_user:internal:routes:v{version}:{date}:{start_point_id}:{end_point_id}:{ids}:{int(hide_sea_soc)}"
+    )
+
+
+async def get_internal_routes_cached(
+    date: datetime.date,
+    pairs: list[Pair],
+    container_ids: list[int],
+    hide_sea_soc: bool,
+    fetch: Callable[[list[Pair]], Awaitable[tuple[RoutesByPairs, bool]]],
+) -> RoutesByPairs:
+    """
+    Returns cached routes of the pairs, fetching only missed ones.
+
+    `fetch` returns routes of the given pairs and whether they are complete (i.e. no query failed);
+    incomplete results are not cached.
+    """
+    version = await get_data_version(ROUTES_DATA_VERSION)
+    if version is None:
+        routes, _ = await fetch(pairs)
+        return routes
+
+    keys = {pair: _routes_key(version, date, pair, container_ids, hide_sea_soc) for pair in pairs}
+    found: RoutesByPairs = {}
+
+    try:
+        redis = get_redis()
+        cached = await redis.mget(list(keys.values()))
+        for pair, raw in zip(pairs, cached, strict=True):
+            if raw is None:
+                continue
+            try:
+                found[pair] = [RouteResult.model_validate(r) for r in json.loads(raw)]
+            except Exception:
+                logger.warning("Corrupt cache data for %s, re-fetching", keys[pair])
+    except Exception:
+        logger.warning("Redis unavailable for internal routes, falling back to DB")
+
+    missed = [pair for pair in pairs if pair not in found]
+    if not missed:
+        return found
+
+    routes, is_complete = await fetch(missed)
+    found.update(routes)
+
+    if is_complete:
+        asyncio.create_task(_set_many_json_async(
+            {keys[pair]: [r.model_dump(mode="json") for r in routes[pair]] for pair in missed},
+            INTERNAL_ROUTES_TTL,
+        ))
+
+    return found
+
+
+async def _set_many_json_async(data: dict[str, object], ttl: int) -> None:
+    try:
+        redis = get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for key, value in data.items():
+                pipe.set(key, json.dumps(value, default=str), ex=ttl)
+            await pipe.execute()
+    except Exception:
+        logger.exception("Failed to set cache for %d keys", len(data))
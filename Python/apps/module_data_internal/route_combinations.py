@@ -0,0 +1,241 @@
+"""
+Maintenance of `route_combinations`: compatible sea and rail routes with their drops, precomputed from tariffs.
+
+Compatibility of routes depends only on tariff data, so it's checked once per change of routes, prices or drops,
+not on every search (see ROUTES-CALCULATION-LOGIC.md). Changes made through an ORM session are tracked by its events
+and combinations of changed routes and drops are rebuilt right before the commit, in the same transaction.
+"""
+import itertools
+import logging
+from collections.abc import Collection, Iterable, Sequence
+from dataclasses import dataclass, field
+
+from sqlalchemy import and_, delete, event, exists, insert, inspect, or_, select
+from sqlalchemy.orm import Session, aliased
+
+from .schemas import (
+    ContainerOwner,
+    DropModel,
+    PriceModel,
+    RouteCombinationModel,
+    RouteModel,
+    RouteType,
+)
+
+logger = logging.getLogger(__name__)
+
+# Ids per `IN (...)` and rows per `INSERT`: far below the SQLite limit of bound parameters
+CHUNK_SIZE = 500
+# Changed routes and drops over which all combinations are rebuilt: every chunk of ids costs indexed lookups,
+# a rebuild costs one join of all sea and rail routes
+REFRESH_LIMIT = 10 * CHUNK_SIZE
+
+_STALE_KEY = "stale_route_combinations"
+
+
+@dataclass
+class _Stale:
+    route_ids: set[int] = field(default_factory=set)
+    drop_ids: set[int] = field(default_factory=set)
+    everything: bool = False
+
+
+def _chunks(values: Sequence, size: int = CHUNK_SIZE) -> Iterable[Sequence]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _combinations_query():
+    """Compatible sea and rail routes with their drops; the query and its aliases of sea and rail routes"""
+    SeaRoute = aliased(RouteModel, name="sea_route")
+    RailRoute = aliased(RouteModel, name="rail_route")
+    RailPrice = aliased(PriceModel, name="rail_price")
+
+    drop_join_clause = and_(
+        SeaRoute.dropp_off_point_id.is_(None),  # if not, drop is already included!
+        # Points
+        RailRoute.start_point_id == DropModel.start_point_id,
+        RailRoute.end_point_id == DropModel.end_point_id,
+        # Company
+        SeaRoute.company_id == DropModel.company_id,
+        # Container: the rail route must have a price of it
+        exists().where(RailPrice.route_id == RailRoute.id, RailPrice.container_id == DropModel.container_id),
+        # Dates: the drop must be valid together with both routes
+        DropModel.effective_from <= SeaRoute.effective_to,
+        DropModel.effective_from <= RailRoute.effective_to,
+        DropModel.effective_to >= SeaRoute.effective_from,
+        DropModel.effective_to >= RailRoute.effective_from,
+    )
+
+    stmt = (
+        select(
+            SeaRoute.id.label("sea_route_id"),
+            RailRoute.id.label("rail_route_id"),
+            DropModel.id.label("drop_id"),
+            DropModel.container_id.label("container_id"),
+            SeaRoute.start_point_id.label("start_point_id"),
+            RailRoute.end_point_id.label("end_point_id"),
+            SeaRoute.effective_from.label("sea_effective_from"),
+            SeaRoute.effective_to.label("sea_effective_to"),
+            RailRoute.effective_from.label("rail_effective_from"),
+            RailRoute.effective_to.label("rail_effective_to"),
+            DropModel.effective_from.label("drop_effective_from"),
+            DropModel.effective_to.label("drop_effective_to"),
+        )
+        .select_from(SeaRoute)
+        .join(RailRoute, and_(
+            SeaRoute.end_point_id == RailRoute.start_point_id,
+            or_(
+                SeaRoute.dropp_off_point_id.is_(None),
+                SeaRoute.dropp_off_point_id == RailRoute.end_point_id,
+            ),
+            # Dates: the routes must be valid together
+            SeaRoute.effective_from <= RailRoute.effective_to,
+            SeaRoute.effective_to >= RailRoute.effective_from,
+        ))
+        .outerjoin(DropModel, drop_join_clause)
+        .where(
+            # Types
+            SeaRoute.type == RouteType.SEA,
+            RailRoute.type == RouteType.RAIL,
+            # COC/SOC logic
+            or_(
+                RailRoute.container_owner == ContainerOwner.SOC,
+                and_(
+                    SeaRoute.company_id == RailRoute.company_id,
+                    RailRoute.container_owner == ContainerOwner.COC,
+                ),
+            ),
+            # Through routes logic
+            or_(
+                ~RailRoute.is_through & ~SeaRoute.is_through,
+                SeaRoute.company_id == RailRoute.company_id,
+            ),
+            # Drop-off must exist: either via dropp_off_point_id or via DROPS table
+            or_(
+                SeaRoute.dropp_off_point_id.isnot(None),
+                DropModel.id.isnot(None),
+            ),
+        )
+    )
+    return stmt, SeaRoute, RailRoute
+
+
+def _combination(row) -> dict:
+    effective_from = [row.sea_effective_from, row.rail_effective_from]
+    effective_to = [row.sea_effective_to, row.rail_effective_to]
+    if row.drop_id is not None:
+        effective_from.append(row.drop_effective_from)
+        effective_to.append(row.drop_effective_to)
+
+    return {
+        "sea_route_id": row.sea_route_id,
+        "rail_route_id": row.rail_route_id,
+        "drop_id": row.drop_id,
+        "container_id": row.container_id,
+        "start_point_id": row.start_point_id,
+        "end_point_id": row.end_point_id,
+        "effective_from": max(effective_from),
+        "effective_to": min(effective_to),
+    }
+
+
+def _insert(session: Session, rows: Iterable) -> None:
+    # a combination of a route and a drop which are both refreshed is selected twice
+    combinations = list({
+        (row.sea_route_id, row.rail_route_id, row.drop_id): _combination(row) for row in rows
+    }.values())
+    for chunk in _chunks(combinations):
+        session.execute(insert(RouteCombinationModel), chunk)
+    logger.debug("Written %d route combinations", len(combinations))
+
+
+def rebuild_route_combinations(session: Session) -> None:
+    """Rebuilds all combinations"""
+    stmt, _, _ = _combinations_query()
+    session.execute(delete(RouteCombinationModel))
+    _insert(session, session.execute(stmt).all())
+
+
+def refresh_route_combinations(session: Session, route_ids: Collection[int], drop_ids: Collection[int]) -> None:
+    """Rebuilds combinations of the routes (as sea or rail ones) and of the drops; other combinations don't change"""
+    stmt, SeaRoute, RailRoute = _combinations_query()
+    rows = []
+
+    for chunk in _chunks(sorted(route_ids)):
+        # a query per side: an id index can't be used for an OR of both sides
+        for route_id, combination_route_id in [
+            (SeaRoute.id, RouteCombinationModel.sea_route_id),
+            (RailRoute.id, RouteCombinationModel.rail_route_id),
+        ]:
+            session.execute(delete(RouteCombinationModel).where(combination_route_id.in_(chunk)))
+            rows.extend(session.execute(stmt.where(route_id.in_(chunk))).all())
+
+    for chunk in _chunks(sorted(drop_ids)):
+        session.execute(delete(RouteCombinationModel).where(RouteCombinationModel.drop_id.in_(chunk)))
+        rows.extend(session.execute(stmt.where(DropModel.id.in_(chunk))).all())
+
+    _insert(session, rows)
+
+
+def mark_route_combinations_stale(
+    session,
+    route_ids: Iterable[int] = (),
+    drop_ids: Iterable[int] = (),
+    everything: bool = False,
+) -> None:
+    """
+    Marks combinations of routes and drops to be rebuilt on the commit of the session (sync or async).
+
+    Needed only for rows written by Core statements or raw SQL:
+    routes, prices and drops changed through the session itself are marked by its events.
+    """
+    stale = session.info.setdefault(_STALE_KEY, _Stale())
+    stale.route_ids.update(route_ids)
+    stale.drop_ids.update(drop_ids)
+    stale.everything |= everything
+
+
+def _values(instance, key: str) -> set:
+    """Current and previous values of an attribute of a flushed instance, without loading it"""
+    return {value for value in inspect(instance).attrs[key].history.sum() if value is not None}
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed(session: Session, _) -> None:
+    route_ids: set[int] = set()
+    drop_ids: set[int] = set()
+    for instance in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, RouteModel):
+            route_ids |= _values(instance, "id")
+        elif isinstance(instance, PriceModel):
+            # drops are matched by containers of rail prices
+            route_ids |= _values(instance, "route_id")
+        elif isinstance(instance, DropModel):
+            drop_ids |= _values(instance, "id")
+
+    if route_ids or drop_ids:
+        mark_route_combinations_stale(session, route_ids, drop_ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_stale(session: Session) -> None:
+    # commits of all sessions are listened: ones without changes are not flushed
+    if _STALE_KEY not in session.info and not (session.new or session.dirty or session.deleted):
+        return
+
+    # changes are tracked on flush: the last one must happen before combinations are rebuilt
+    session.flush()
+    stale: _Stale | None = session.info.pop(_STALE_KEY, None)
+    if stale is None:
+        return
+
+    if stale.everything or len(stale.route_ids) + len(stale.drop_ids) > REFRESH_LIMIT:
+        rebuild_route_combinations(session)
+    else:
+        refresh_route_combinations(session, stale.route_ids, stale.drop_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale(session: Session) -> None:
+    session.info.pop(_STALE_KEY, None)
@@ -15,3 +15,4 @@ from .route import (  # isort:skip  # noqa: F401
     RouteType,
     ServicePriceModel,
 )
+from .route_combination import RouteCombinationModel  # isort:skip  # noqa: F401
@@ -5,9 +5,11 @@ from sqlalchemy import DateTime, ForeignKey, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import CompanyModel, ContainerModel
+from .fingerprint import track_fingerprint
 from .point import PointModel
 
 
+@track_fingerprint
 class DropModel(Base):
     uid = (
         "start_point_id",
@@ -35,6 +37,10 @@ class DropModel(Base):
     price: Mapped[float] = mapped_column(default=0)
     conversation_percents: Mapped[float] = mapped_column(default=0)
     currency: Mapped[str] = mapped_column(String(25))
+    # hash of the `uid` columns: existence of rows is checked by it
+    fingerprint: Mapped[str | None] = mapped_column(String(40), nullable=True, default=None, index=True)
+    # hash of the sheet row the drop is loaded from
+    content_hash: Mapped[str | None] = mapped_column(String(40), nullable=True, default=None, index=True)
 
     start_point: Mapped[PointModel | None] = relationship(
         PointModel, foreign_keys=[start_point_id]
@@ -0,0 +1,46 @@
+import datetime
+import enum
+import hashlib
+from collections.abc import Iterable
+
+from sqlalchemy import event
+
+
+def _fingerprint_part(value) -> str:
+    if value is None or value != value:  # NaN
+        return ""
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def join_values(values: Iterable) -> str:
+    """Values joined into a string which doesn't depend on their types: 2, 2.0 and numpy 2.0 give "2" """
+    return "|".join(map(_fingerprint_part, values))
+
+
+def make_fingerprint(values: Iterable) -> str:
+    """
+    Hash of values of the unique constraint of a row, with dates compared by day.
+
+    Values read from the database (enum names, 0/1 booleans) give the same hash as the mapped ones.
+    """
+    return hashlib.sha1(join_values(values).encode()).hexdigest()
+
+
+def track_fingerprint(model):
+    """Keeps the `fingerprint` column of the model up to date with its `uid` columns on ORM flushes"""
+    def set_fingerprint(mapper, connection, target):
+        target.fingerprint = make_fingerprint(getattr(target, column) for column in model.uid)
+
+    event.listen(model, "before_insert", set_fingerprint)
+    event.listen(model, "before_update", set_fingerprint)
+    return model
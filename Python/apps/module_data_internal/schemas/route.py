@@ -2,10 +2,11 @@ import datetime
 import enum
 
 from module_shared.database import Base
-from sqlalchemy import DateTime, Enum, ForeignKey, String, UniqueConstraint
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import CompanyModel, ContainerModel, ServiceModel
+from .fingerprint import track_fingerprint
 from .point import PointModel
 
 
@@ -54,6 +55,7 @@ class PriceModel(Base):
     route: Mapped[RouteModel] = relationship("RouteModel", back_populates="prices")
 
 
+@track_fingerprint
 class RouteModel(Base):
     uid = (
         "company_id",
@@ -69,7 +71,15 @@ class RouteModel(Base):
     )
 
     __tablename__ = "routes"
-    __table_args__ = (UniqueConstraint(*uid, name="uk__fingerprint"),)
+    __table_args__ = (
+        UniqueConstraint(*uid, name="uk__fingerprint"),
+        # Route search: routes by start points (sea routes, rail routes joined to sea ones) and by end points,
+        # valid on a date
+        Index(
+            "ix_routes__type_start_point", "type", "start_point_id", "end_point_id", "effective_to", "effective_from",
+        ),
+        Index("ix_routes__type_end_point", "type", "end_point_id", "effective_to", "effective_from"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)  # noqa: A003
 
@@ -88,6 +98,10 @@ class RouteModel(Base):
     timetable: Mapped[str | None] = mapped_column(String(255), nullable=True, default=None)
 
     is_through: Mapped[bool] = mapped_column(default=True)
+    # hash of the `uid` columns: existence of rows is checked by it
+    fingerprint: Mapped[str | None] = mapped_column(String(40), nullable=True, default=None, index=True)
+    # hash of the sheet row the route is loaded from, with its prices and service prices
+    content_hash: Mapped[str | None] = mapped_column(String(40), nullable=True, default=None, index=True)
 
     type: Mapped[RouteType] = mapped_column(  # noqa: A003
         Enum(
@@ -134,6 +148,7 @@ class ServicePriceModel(Base):
     uid = ("route_id", "service_id", "container_id")
 
     __tablename__ = "service_prices"
+    __table_args__ = (Index("ix_service_prices__route", "route_id", "container_id"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)  # noqa: A003
 
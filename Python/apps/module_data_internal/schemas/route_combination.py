@@ -0,0 +1,47 @@
+import datetime
+
+from module_shared.database import Base
+from sqlalchemy import DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .route import RouteModel
+
+
+class RouteCombinationModel(Base):
+    """
+    Compatible sea and rail routes with the drop matched to them, valid while all of them are valid.
+
+    Rows are derived from routes, prices and drops (see `module_data_internal.route_combinations`)
+    and rebuilt on every change of them: never write them by hand.
+    """
+
+    __tablename__ = "route_combinations"
+    # route search: sea+rail routes from start points to end points valid on a date
+    __table_args__ = (
+        Index("ix_route_combinations__points", "start_point_id", "end_point_id", "effective_to", "effective_from"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)  # noqa: A003
+
+    sea_route_id: Mapped[int] = mapped_column(
+        ForeignKey(f"{RouteModel.__tablename__}.id", name="fk__route_combination_route__sea", ondelete="CASCADE"),
+        index=True,
+    )
+    rail_route_id: Mapped[int] = mapped_column(
+        ForeignKey(f"{RouteModel.__tablename__}.id", name="fk__route_combination_route__rail", ondelete="CASCADE"),
+        index=True,
+    )
+    # None if the drop is included into the sea route (it has a dropp-off point)
+    drop_id: Mapped[int | None] = mapped_column(
+        ForeignKey("drop.id", name="fk__route_combination_drop", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+    # container of the drop: the rail price must be of it
+    container_id: Mapped[int | None] = mapped_column(nullable=True)
+    # start of the sea route and end of the rail route
+    start_point_id: Mapped[int]
+    end_point_id: Mapped[int]
+    # intersection of validity of the routes and the drop
+    effective_from: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=False))
+    effective_to: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=False))
@@ -44,8 +44,20 @@ class Settings(BaseSettings):
     REDIS_DB: int = 0
     REDIS_PASSWORD: str | None = None
 
+    # ROUTES INDEX (in-memory route graph of the user backend)
+    ROUTES_INDEX_ENABLED: bool = False
+    ROUTES_INDEX_VERSION_CHECK_INTERVAL: float = 5.0
+
+    # ROUTES SEARCH (SQL path): results are assembled from selected columns instead of ORM entities
+    ROUTES_QUERY_PROJECTION_ENABLED: bool = True
+
     # FESCO API
     FESCO_API_KEY: str
+    FESCO_HTTP_POOL_LIMIT: int = 100
+    FESCO_HTTP_KEEPALIVE_TIMEOUT: float = 30.0
+    FESCO_HTTP_DNS_CACHE_TTL: int = 300
+    FESCO_HTTP_TIMEOUT: float = 30.0
+    FESCO_HTTP_CONNECT_TIMEOUT: float = 5.0
 
 
 @cache
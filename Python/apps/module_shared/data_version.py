@@ -0,0 +1,36 @@
+import logging
+
+from module_shared.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_PREFIX = "shared:data-version"
+
+ROUTES_DATA_VERSION = "routes"
+CONTAINERS_DATA_VERSION = "containers"
+
+
+def _data_version_key(name: str) -> str:
+    return f"{DATA_VERSION_PREFIX}:{name}"
+
+
+async def get_data_version(name: str) -> int | None:
+    """Returns the current version of a data set, 0 if it was never bumped, or None if Redis is unavailable."""
+    key = _data_version_key(name)
+    try:
+        raw = await get_redis().get(key)
+    except Exception:
+        logger.warning("Redis unavailable for data version: %s", key)
+        return None
+    return int(raw) if raw is not None else 0
+
+
+async def bump_data_version(name: str) -> int | None:
+    key = _data_version_key(name)
+    try:
+        version = await get_redis().incr(key)
+    except Exception:
+        logger.exception("Failed to bump data version: %s", key)
+        return None
+    logger.info("Data version bumped: %s = %s", key, version)
+    return version
@@ -1,8 +1,11 @@
+import weakref
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from functools import cache
 from typing import Any
 
+from sqlalchemy import Engine, event
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -10,6 +13,7 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.sql.compiler import SQLCompiler
 
 from .config import get_settings
 
@@ -77,3 +81,41 @@ class Database:
 @cache
 def get_database():
     return Database()
+
+
+@dataclass
+class StatementCacheStats:
+    """
+    Lookups of compiled statements in the cache of an engine, counted by `track_statement_cache`.
+
+    A miss compiles a statement; hits reuse compiled statements of the same structure with other parameters.
+    Statements executed by the driver (`exec_driver_sql`) and DDL are not counted.
+    """
+
+    hits: int = 0
+    misses: int = 0
+
+
+def track_statement_cache(engine: Engine) -> StatementCacheStats:
+    """
+    Counts lookups of compiled statements of a sync engine (`AsyncEngine.sync_engine` of async ones).
+
+    The cache returns the same compiled object for statements of the same structure, so a statement compiled
+    before is a hit. Lookups are counted for benchmarks and tests only: engines of the apps don't track them.
+    """
+    stats = StatementCacheStats()
+    compiled_statements = weakref.WeakSet()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement_cache(conn, cursor, statement, parameters, context, executemany) -> None:
+        compiled = context.compiled if context is not None else None
+        if not isinstance(compiled, SQLCompiler):
+            return
+
+        if compiled in compiled_statements:
+            stats.hits += 1
+        else:
+            stats.misses += 1
+            compiled_statements.add(compiled)
+
+    return stats
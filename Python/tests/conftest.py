@@ -1,6 +1,7 @@
 import os
 from collections.abc import AsyncGenerator
 
+import pytest
 import pytest_asyncio
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
@@ -20,9 +21,18 @@ os.environ["ACCESS_TOKEN_EXPIRE_MINUTES"] = "30"
 os.environ["REFRESH_TOKEN_EXPIRE_MINUTES"] = "4320"
 os.environ["FESCO_API_KEY"] = "test-key"
 
+from backend_user.services.get_rates import get_rates_store  # noqa: E402
+from module_data_internal.aggregators.containers import get_container_catalogue_cache  # noqa: E402
 from module_shared.database import Base, Database  # noqa: E402
 
 
+@pytest.fixture(autouse=True)
+def _reset_process_caches():
+    yield
+    get_container_catalogue_cache.cache_clear()
+    get_rates_store.cache_clear()
+
+
 @pytest_asyncio.fixture
 async def sqlite_db() -> AsyncGenerator[Database]:
     engine = create_async_engine("sqlite+aiosqlite://", echo=False)
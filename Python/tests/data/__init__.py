@@ -1 +1,2 @@
 from .factories import *  # noqa: F401,F403
+from .sheets import *  # noqa: F401,F403
@@ -0,0 +1,72 @@
+import pandas as pd
+from backend_admin.models.upoader_fields_config import UploaderFieldsConfig
+
+__all__ = (
+    "uploader_fields_config",
+    "uploader_sheets",
+)
+
+
+def uploader_fields_config() -> UploaderFieldsConfig:
+    fields = {
+        name: name
+        for name, field in UploaderFieldsConfig.model_fields.items()
+        if field.annotation is str and field.is_required()
+    }
+    fields["dthc"] = "DTHC # terminal handling"
+    fields["guard20_24"] = "GUARD # guard"
+    return UploaderFieldsConfig(**fields)
+
+
+def uploader_sheets():
+    """Sea, rail, dropp, services and points sheets: valid rows and rows with errors"""
+    points = pd.DataFrame([
+        {"city": "Shanghai", "country": "CN", "RU_city": "Шанхай", "RU_country": "Китай"},
+        {"city": "Vladivostok", "country": "RU", "RU_city": "Владивосток", "RU_country": "Россия"},
+        {"city": "Moscow", "country": "RU", "RU_city": "Москва", "RU_country": "Россия"},
+    ])
+    services = pd.DataFrame([
+        {"column_name": "DTHC", "service_name": "DTHC", "description": None, "including": None},
+        {"column_name": "GUARD", "service_name": "Guard", "description": None, "including": 1},
+    ])
+    route = {
+        "start_point": "Shanghai",
+        "end_point": "Vladivostok",
+        "dropp_off_point": None,
+        "terminal": None,
+        "effective_from": "01.01.2026",
+        "effective_to": "31.12.2026",
+        "container_transfer_terms": None,
+        "container_shipment_terms": None,
+        "container_condition": None,
+        "company": "SeaCo",
+        "comment": None,
+        "timetable": "weekly",
+        "is_through": None,
+        "conversation_percents": "2",
+    }
+    sea = pd.DataFrame([
+        {**route, "terminal": "VMTP", "sea_20dc": "1 000", "sea_20dc_currency": None, "sea_40hc": 2000,
+         "sea_40hc_currency": "eur", "DTHC # terminal handling": 50, "dthc_currency": None},
+        # no prices
+        {**route, "end_point": "Moscow", "sea_20dc": None, "sea_20dc_currency": None, "sea_40hc": None,
+         "sea_40hc_currency": None, "DTHC # terminal handling": 50, "dthc_currency": None},
+        # unknown point
+        {**route, "end_point": "Atlantis", "sea_20dc": 100, "sea_20dc_currency": None, "sea_40hc": None,
+         "sea_40hc_currency": None, "DTHC # terminal handling": None, "dthc_currency": None},
+    ])
+    rail = pd.DataFrame([
+        {**route, "start_point": "Владивосток", "end_point": "Moscow", "terminal": "VMTP", "company": "RailCo",
+         "container_shipment_terms": "fob", "rail_20dc24t": 300, "rail_20dc24t_currency": None,
+         "rail_20dc28t": None, "rail_20dc28t_currency": None, "rail_40hc": 500, "rail_40hc_currency": None,
+         "GUARD # guard": 10, "guard20_24_currency": "руб"},
+    ])
+    dropp = pd.DataFrame([
+        {"start_point": "Moscow", "end_point": "Moscow", "terminal": None, "company": "RailCo",
+         "effective_from": "01.01.2026", "effective_to": "31.12.2026", "container_condition": None,
+         "conversation_percents": None, "drop20": 70, "drop40": None},
+        {"start_point": "Moscow", "end_point": "Atlantis", "terminal": None, "company": "RailCo",
+         "effective_from": "01.01.2026", "effective_to": "31.12.2026", "container_condition": None,
+         "conversation_percents": None, "drop20": 70, "drop40": 90},
+    ])
+    return sea, rail, dropp, services, points
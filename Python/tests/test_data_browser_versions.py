@@ -0,0 +1,37 @@
+from unittest.mock import AsyncMock, patch
+
+from fastapi import FastAPI
+
+import httpx
+import pytest
+from backend_admin.api import data_browser
+from backend_admin.dependencies.auth import request_auth
+from module_shared.data_version import CONTAINERS_DATA_VERSION, ROUTES_DATA_VERSION
+from module_shared.database import Database, get_database
+
+
+@pytest.mark.asyncio
+async def test_write_endpoints_bump_data_versions(sqlite_db: Database):
+    app = FastAPI()
+    app.include_router(data_browser.router)
+    app.dependency_overrides[request_auth] = lambda: None
+    app.dependency_overrides[get_database] = lambda: sqlite_db
+
+    with (
+        patch.object(data_browser, "bump_data_version", AsyncMock()) as bump,
+        patch.object(data_browser, "set_settings_cache", AsyncMock()),
+    ):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            company = (await client.post("/db/companies", json={"name": "SeaCo"})).json()
+            assert [call.args for call in bump.await_args_list] == [(ROUTES_DATA_VERSION,)]
+
+            bump.reset_mock()
+            await client.get(f"/db/companies/{company['id']}")
+            assert (await client.delete("/db/companies/0")).status_code == 404
+            assert bump.await_args_list == []
+
+            container = {"size": 20, "weight_from": 0, "weight_to": 24, "name": "20DC", "type": "DC"}
+            assert (await client.post("/db/containers", json=container)).status_code == 201
+            setting = {"group": "rates", "name": "margin", "value_type": "INT", "value": "1"}
+            assert (await client.post("/db/settings", json=setting)).status_code == 201
+            assert [call.args for call in bump.await_args_list] == [(ROUTES_DATA_VERSION,), (CONTAINERS_DATA_VERSION,)]
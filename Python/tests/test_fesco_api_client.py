@@ -1,5 +1,7 @@
+import asyncio
 import datetime
 import json
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -22,6 +24,12 @@ from module_data_fesco_api_adapter.api_client.transformers.routes import (
     transform_routes,
     transform_service,
 )
+from module_data_fesco_api_adapter.cache import (
+    get_fesco_points_cached,
+    get_fesco_routes_cached,
+    single_flight,
+)
+from module_data_fesco_api_adapter.http_client import API_FESCO_HOST, MY_FESCO_HOST, FescoHttpClient
 from module_shared.models.route import ContainerItem
 
 
@@ -561,7 +569,7 @@ class TestGetContainers:
 
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.containers.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.containers.get_fesco_session",
                 return_value=mock_session,
             ),
             patch("module_data_fesco_api_adapter.api_client.containers.get_redis", return_value=mock_redis),
@@ -581,7 +589,7 @@ class TestGetContainers:
 
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.containers.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.containers.get_fesco_session",
                 return_value=mock_session,
             ),
             patch("module_data_fesco_api_adapter.api_client.containers.get_redis", return_value=mock_redis),
@@ -599,7 +607,7 @@ class TestGetContainers:
 
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.containers.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.containers.get_fesco_session",
                 return_value=mock_session,
             ),
             patch("module_data_fesco_api_adapter.api_client.containers.get_redis", return_value=mock_redis),
@@ -633,7 +641,7 @@ class TestGetContainers:
         mock_session = _mock_aiohttp_session({"data": []})
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.containers.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.containers.get_fesco_session",
                 return_value=mock_session,
             ),
             patch(
@@ -687,7 +695,7 @@ class TestGetDeparturePoints:
 
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.points.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.points.get_fesco_session",
                 return_value=mock_session,
             ),
             patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis),
@@ -704,7 +712,7 @@ class TestGetDeparturePoints:
 
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.points.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.points.get_fesco_session",
                 return_value=mock_session,
             ),
             patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis),
@@ -724,7 +732,7 @@ class TestGetDestinationPoints:
 
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.points.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.points.get_fesco_session",
                 return_value=mock_session,
             ),
             patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis),
@@ -743,7 +751,7 @@ class TestGetDestinationPoints:
 
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.points.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.points.get_fesco_session",
                 return_value=mock_session,
             ),
             patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis),
@@ -783,7 +791,7 @@ class TestFindAllPaths:
         mock_redis = _mock_redis()
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.routes.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.routes.get_fesco_session",
                 return_value=mock_session,
             ),
             patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis),
@@ -827,7 +835,7 @@ class TestFindAllPaths:
         mock_redis = _mock_redis()
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.routes.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.routes.get_fesco_session",
                 return_value=mock_session,
             ),
             patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis),
@@ -880,7 +888,7 @@ class TestFindAllPaths:
         mock_redis = _mock_redis()
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.routes.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.routes.get_fesco_session",
                 return_value=mock_session,
             ),
             patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis),
@@ -902,7 +910,7 @@ class TestFindAllPaths:
         mock_redis = _mock_redis()
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.routes.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.routes.get_fesco_session",
                 return_value=mock_session,
             ),
             patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis),
@@ -930,7 +938,7 @@ class TestFindAllPaths:
         mock_redis = _mock_redis()
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.routes.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.routes.get_fesco_session",
                 return_value=mock_session,
             ),
             patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis),
@@ -995,7 +1003,7 @@ class TestFindAllPaths:
         mock_session = _mock_aiohttp_session({"data": []})
         with (
             patch(
-                "module_data_fesco_api_adapter.api_client.routes.aiohttp.ClientSession",
+                "module_data_fesco_api_adapter.api_client.routes.get_fesco_session",
                 return_value=mock_session,
             ),
             patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis),
@@ -1006,3 +1014,151 @@ class TestFindAllPaths:
 
         result_list = list(result)
         assert len(result_list) == 0
+
+
+# ============================================================
+# Shared HTTP sessions
+# ============================================================
+
+
+class TestFescoHttpClient:
+    @pytest.mark.asyncio
+    async def test_session_per_host_is_reused(self):
+        client = FescoHttpClient()
+        await client.init()
+        try:
+            my_session = client.session(MY_FESCO_HOST)
+            assert client.session(MY_FESCO_HOST) is my_session
+            assert client.session(API_FESCO_HOST) is not my_session
+            assert not my_session.closed
+        finally:
+            await client.close()
+
+        assert my_session.closed
+
+    def test_session_before_init_raises(self):
+        with pytest.raises(RuntimeError):
+            FescoHttpClient().session(MY_FESCO_HOST)
+
+
+# ============================================================
+# Single-flight
+# ============================================================
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_fetch_once(self):
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"value": 1}
+
+        results = await asyncio.gather(*(single_flight("key", fetch, dict) for _ in range(5)))
+
+        assert calls == 1
+        assert all(r == {"value": 1} for r in results)
+        assert len({id(r) for r in results}) == 5
+
+    @pytest.mark.asyncio
+    async def test_error_is_shared_and_not_cached(self):
+        fetch = AsyncMock(side_effect=[Exception("HTTP 500"), {"value": 2}])
+
+        async def slow_fetch():
+            await asyncio.sleep(0.01)
+            return await fetch()
+
+        results = await asyncio.gather(
+            single_flight("key", slow_fetch),
+            single_flight("key", slow_fetch),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, Exception) for r in results)
+
+        assert await single_flight("key", slow_fetch) == {"value": 2}
+        assert fetch.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_route_misses_call_api_once(self):
+        mock_session = _mock_aiohttp_session({"data": []})
+        mock_redis = _mock_redis()
+
+        with (
+            patch(
+                "module_data_fesco_api_adapter.api_client.routes.get_fesco_session",
+                return_value=mock_session,
+            ),
+            patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis),
+        ):
+            await asyncio.gather(*(
+                find_all_paths(datetime.date(2024, 6, 15), "dep1", "dest1", ["wte1"])
+                for _ in range(3)
+            ))
+
+        assert mock_session.get.await_count == 1
+
+
+# ============================================================
+# Stale-while-revalidate
+# ============================================================
+
+
+class TestStaleWhileRevalidate:
+    @pytest.mark.asyncio
+    async def test_fresh_points_are_served_without_refresh(self):
+        payload = {"soft_expires_at": time.time() + 60, "data": [{"id": "p1"}]}
+        mock_redis = _mock_redis(get_return=json.dumps(payload))
+        fetch = AsyncMock(return_value=[{"id": "p2"}])
+
+        with patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis):
+            result = await get_fesco_points_cached("key:fresh", datetime.date(2024, 6, 15), fetch)
+            await asyncio.sleep(0.01)
+
+        assert result == [{"id": "p1"}]
+        fetch.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_stale_points_are_served_and_refreshed(self):
+        payload = {"soft_expires_at": time.time() - 1, "data": [{"id": "p1"}]}
+        mock_redis = _mock_redis(get_return=json.dumps(payload))
+        fetch = AsyncMock(return_value=[{"id": "p2"}])
+
+        with patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis):
+            result = await get_fesco_points_cached("key:stale", datetime.date(2024, 6, 15), fetch)
+            await asyncio.sleep(0.01)
+
+        assert result == [{"id": "p1"}]
+        fetch.assert_awaited_once()
+        key, stored = mock_redis.set.call_args.args
+        assert key == "key:stale"
+        stored = json.loads(stored)
+        assert stored["data"] == [{"id": "p2"}]
+        assert stored["soft_expires_at"] > time.time()
+
+    @pytest.mark.asyncio
+    async def test_stale_routes_refresh_once(self):
+        payload = {"soft_expires_at": time.time() - 1, "data": []}
+        mock_redis = _mock_redis(get_return=json.dumps(payload))
+        fetch = AsyncMock(return_value=[])
+
+        with patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis):
+            results = await asyncio.gather(*(get_fesco_routes_cached("key:routes", fetch) for _ in range(3)))
+            await asyncio.sleep(0.01)
+
+        assert all(r == [] for r in results)
+        fetch.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_legacy_payload_is_served_as_fresh(self):
+        mock_redis = _mock_redis(get_return=json.dumps([{"id": "p1"}]))
+        fetch = AsyncMock(return_value=[])
+
+        with patch("module_data_fesco_api_adapter.cache.get_redis", return_value=mock_redis):
+            result = await get_fesco_points_cached("key:legacy", datetime.date(2024, 6, 15), fetch)
+            await asyncio.sleep(0.01)
+
+        assert result == [{"id": "p1"}]
+        fetch.assert_not_awaited()
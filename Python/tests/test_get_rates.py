@@ -3,7 +3,7 @@ import json
 from unittest.mock import AsyncMock, patch
 
 import pytest
-from backend_user.services.get_rates import get_rates
+from backend_user.services.get_rates import RATES_CACHE_KEY, get_rates, get_rates_store
 
 
 class MockCurrency:
@@ -82,3 +82,57 @@ async def test_get_rates_api_failure_no_cache_raises():
         pytest.raises(RuntimeError, match="No rates available"),
     ):
         await get_rates(datetime.datetime(2020, 1, 1))
+
+
+@pytest.mark.asyncio
+async def test_get_rates_memoized_for_the_day():
+    dt = datetime.datetime(2024, 6, 15, 12, 0, 0)
+    redis = _mock_redis()
+    with (
+        patch("backend_user.services.get_rates.ExchangeRates", return_value=MockExchangeRates(None)) as api,
+        patch("backend_user.services.get_rates.get_redis", return_value=redis),
+    ):
+        await get_rates(dt)
+        redis.get.reset_mock()
+        rates, updated_at = await get_rates(dt)
+
+    api.assert_called_once()
+    redis.get.assert_not_called()
+    assert updated_at == datetime.date(2024, 6, 15)
+
+
+@pytest.mark.asyncio
+async def test_get_rates_from_redis_does_not_call_api():
+    cached = json.dumps({"rates": {"USD": 85.0}, "date": "2024-06-15"})
+    redis = _mock_redis(get_return=cached)
+    with (
+        patch("backend_user.services.get_rates.ExchangeRates") as api,
+        patch("backend_user.services.get_rates.get_redis", return_value=redis),
+    ):
+        rates, updated_at = await get_rates(datetime.datetime(2024, 6, 15, 12, 0, 0))
+
+    api.assert_not_called()
+    assert rates["USD"] == 85.0
+    assert updated_at == datetime.date(2024, 6, 15)
+
+
+@pytest.mark.asyncio
+async def test_get_rates_serves_latest_until_refreshed():
+    latest = json.dumps({"rates": {"USD": 85.0}, "date": "2024-06-14"})
+    redis = _mock_redis()
+    redis.get = AsyncMock(side_effect=lambda key: latest if key == RATES_CACHE_KEY else None)
+    dt = datetime.datetime(2024, 6, 15, 12, 0, 0)
+    with (
+        patch("backend_user.services.get_rates.ExchangeRates", return_value=MockExchangeRates(None)) as api,
+        patch("backend_user.services.get_rates.get_redis", return_value=redis),
+    ):
+        _, stale_date = await get_rates(dt)
+        api.assert_not_called()
+
+        await get_rates_store().refresh(dt)
+        rates, updated_at = await get_rates(dt)
+
+    assert stale_date == datetime.date(2024, 6, 14)
+    assert rates["USD"] == 90.0
+    assert updated_at == datetime.date(2024, 6, 15)
+    assert {c.args[0] for c in redis.set.call_args_list} == {"backend_user:rates:2024-06-15", RATES_CACHE_KEY}
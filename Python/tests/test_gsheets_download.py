@@ -0,0 +1,104 @@
+import os
+import stat
+from unittest.mock import patch
+
+import pytest
+from backend_admin.service.routes_loading import processor
+from backend_admin.service.routes_loading.gsheets import download_worksheets, values_to_dataframe
+from backend_admin.service.routes_loading.processor import load_data
+from backend_admin.service.routes_loading.sheets_cache import SheetsCache
+from module_shared.database import Database
+
+from .data import uploader_fields_config, uploader_sheets
+
+
+class _FakeSpreadsheet:
+    id = "spreadsheet-id"  # noqa: A003
+
+    def __init__(self, worksheets: dict[str, list[list]]):
+        self.worksheets = worksheets
+        self.batch_requests = []
+
+    def values_batch_get(self, ranges, params=None):
+        self.batch_requests.append(ranges)
+        return {"valueRanges": [
+            {"range": title, "values": self.worksheets[title.strip("'")]}
+            for title in ranges
+        ]}
+
+
+def test_values_to_dataframe():
+    df = values_to_dataframe([
+        ["city", "country", ""],
+        ["Moscow", "RU"],
+        ["", "", ""],
+        ["Beijing", "CN", ""],
+    ])
+
+    assert df.columns.tolist() == ["city", "country"]
+    assert df.index.tolist() == [0, 2]
+    assert df["city"].tolist() == ["Moscow", "Beijing"]
+
+
+@pytest.mark.asyncio
+async def test_download_worksheets_by_revision(tmp_path):
+    spreadsheet = _FakeSpreadsheet({
+        "SEA": [["company"], ["SeaCo"]],
+        "RAIL": [["company"], ["RailCo"]],
+    })
+    cache = SheetsCache(str(tmp_path))
+
+    frames = await download_worksheets(spreadsheet, ["SEA", "RAIL"], "rev-1", cache)
+    assert frames["SEA"]["company"].tolist() == ["SeaCo"]
+    assert frames["RAIL"]["company"].tolist() == ["RailCo"]
+    assert spreadsheet.batch_requests == [["'SEA'", "'RAIL'"]]
+
+    spreadsheet.worksheets["SEA"] = [["company"], ["OtherCo"]]
+    frames = await download_worksheets(spreadsheet, ["SEA", "RAIL"], "rev-1", cache)
+    assert frames["SEA"]["company"].tolist() == ["SeaCo"]
+    assert len(spreadsheet.batch_requests) == 1
+
+    frames = await download_worksheets(spreadsheet, ["SEA", "RAIL"], "rev-2", cache)
+    assert frames["SEA"]["company"].tolist() == ["OtherCo"]
+    assert len(spreadsheet.batch_requests) == 2
+
+    await download_worksheets(spreadsheet, ["SEA"], None, cache)
+    assert len(spreadsheet.batch_requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_load_data_reuses_cleaned_sheets(sqlite_db: Database, tmp_path):
+    cache = SheetsCache(str(tmp_path))
+
+    with (
+        patch.object(processor, "get_sheets_cache", return_value=cache),
+        patch.object(processor, "prepare_data", wraps=processor.prepare_data) as prepare_data,
+    ):
+        async with sqlite_db.session_context() as session:
+            first = await load_data(session, *uploader_sheets(), uploader_fields_config(), clean_cache_key="rev-1")
+            second = await load_data(session, *uploader_sheets(), uploader_fields_config(), clean_cache_key="rev-1")
+
+    assert prepare_data.call_count == 1
+    assert [type(error) for error, *_ in first[2]] == [type(error) for error, *_ in second[2]]
+
+
+def test_sheets_cache_directory_is_private(tmp_path):
+    directory = tmp_path / "sheets"
+    directory.mkdir(mode=0o755)
+    cache = SheetsCache(str(directory))
+
+    cache.set("key", {"rows": 1})
+
+    assert cache.get("key") == {"rows": 1}
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+
+def test_sheets_cache_ignores_directories_of_others(tmp_path):
+    (tmp_path / "elsewhere").mkdir()
+    os.symlink(tmp_path / "elsewhere", tmp_path / "sheets")
+    cache = SheetsCache(str(tmp_path / "sheets"))
+
+    cache.set("key", {"rows": 1})
+
+    assert cache.get("key") is None
+    assert os.listdir(tmp_path / "elsewhere") == []
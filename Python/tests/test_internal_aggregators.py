@@ -1,11 +1,21 @@
 import datetime
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 import pytest
-from module_data_internal.aggregators.containers import get_containers, search_container_ids
-from module_data_internal.aggregators.routes import find_all_paths, process_results
+from module_data_internal.aggregators import routes as routes_aggregator
+from module_data_internal.aggregators.containers import (
+    ContainerCatalogue,
+    ContainerCatalogueCache,
+    get_containers,
+    search_container_ids,
+)
+from module_data_internal.aggregators.routes import (
+    find_all_paths,
+    find_all_paths_many,
+    process_results,
+)
 from module_data_internal.schemas import ContainerOwner, ContainerType, RouteType
-from module_shared.database import Database
+from module_shared.database import Database, track_statement_cache
 from module_shared.models.route import ContainerItem
 from module_shared.models.setting import SettingItem
 from module_shared.schemas.setting import SettingType
@@ -103,6 +113,48 @@ def test_search_container_ids():
     assert search_container_ids(containers, weight=100000, size=20) == []
 
 
+def test_container_catalogue_search_matches_linear_scan():
+    containers = [
+        ContainerItem(id=1, size=20, weight_from=0, weight_to=24000, name="20DC", type=ContainerType.DC),
+        ContainerItem(id=2, size=20, weight_from=24000, weight_to=28000, name="20DC", type=ContainerType.DC),
+        ContainerItem(id=3, size=20, weight_from=10000, weight_to=12000, name="20HC", type=ContainerType.HC),
+        ContainerItem(id=4, size=40, weight_from=0, weight_to=28000, name="40DC", type=ContainerType.DC),
+    ]
+    catalogue = ContainerCatalogue(containers)
+
+    for size in (20, 30, 40):
+        for weight in (-1, 0, 5000, 10000, 11000, 12000, 12000.5, 24000, 26000, 28000, 28001):
+            assert search_container_ids(catalogue, weight, size) == search_container_ids(containers, weight, size)
+
+
+@pytest.mark.asyncio
+async def test_container_catalogue_reloads_on_version_change(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        session.add(ContainerFactory(size=20, name="20DC"))
+        await session.commit()
+
+    cache = ContainerCatalogueCache()
+    version = AsyncMock(side_effect=[1, 1, 2])
+
+    with (
+        patch("module_data_internal.aggregators.containers.get_database", return_value=sqlite_db),
+        patch("module_data_internal.aggregators.containers.get_data_version", version),
+        patch("module_data_internal.aggregators.containers.CONTAINERS_VERSION_CHECK_INTERVAL", 0),
+    ):
+        first = await cache.get()
+        assert len(first) == 1
+
+        async with sqlite_db.session_context() as session:
+            session.add(ContainerFactory(size=40, name="40DC"))
+            await session.commit()
+
+        assert await cache.get() is first
+
+        second = await cache.get()
+        assert second.version == 2
+        assert [c.size for c in second] == [20, 40]
+
+
 @pytest.mark.asyncio
 async def test_find_all_paths_rail(sqlite_db: Database):
     async with sqlite_db.session_context() as session:
@@ -587,7 +639,6 @@ def test_process_results_skips_exception():
     result = process_results(
         [ValueError("db error")],
         datetime.date(2024, 6, 15),
-        [1],
     )
     assert result == []
 
@@ -596,7 +647,6 @@ def test_process_results_skips_empty():
     result = process_results(
         [[], None, Exception()],
         datetime.date(2024, 6, 15),
-        [1],
     )
     assert result == []
 
@@ -908,3 +958,211 @@ async def test_find_all_paths_sea_soc_hidden_by_flag(sqlite_db: Database):
     routes = list(result)
     sea_rail_routes = [r for r in routes if len(r.segments) == 2]
     assert len(sea_rail_routes) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("projection_enabled", "query_function"),
+    [(False, "_execute_query"), (True, "_stream_rows")],
+)
+async def test_find_all_paths_many_demultiplexes_pairs(
+    sqlite_db: Database,
+    projection_enabled: bool,
+    query_function: str,
+):
+    async with sqlite_db.session_context() as session:
+        company, point_a, point_b, container = await _seed_basic_data(session)
+
+        point_c = PointFactory(**_unique_point())
+        point_d = PointFactory(**_unique_point())
+        session.add_all([point_c, point_d])
+        await session.flush()
+
+        route_ab = RouteFactory(company_id=company.id, start_point_id=point_a.id, end_point_id=point_b.id)
+        route_cd = RouteFactory(company_id=company.id, start_point_id=point_c.id, end_point_id=point_d.id)
+        # belongs to the cross product of starts and ends, but was not requested
+        route_ad = RouteFactory(company_id=company.id, start_point_id=point_a.id, end_point_id=point_d.id)
+        session.add_all([route_ab, route_cd, route_ad])
+        await session.flush()
+
+        session.add_all([
+            PriceFactory(route_id=route.id, container_id=container.id)
+            for route in (route_ab, route_cd, route_ad)
+        ])
+        await session.commit()
+
+    pair_ab = (point_a.id, point_b.id)
+    pair_cd = (point_c.id, point_d.id)
+    pair_cb = (point_c.id, point_b.id)
+    execute_query = patch.object(
+        routes_aggregator, query_function, wraps=getattr(routes_aggregator, query_function),
+    )
+
+    with (
+        patch("module_data_internal.aggregators.routes.get_database", return_value=sqlite_db),
+        patch("module_data_internal.aggregators.routes.get_settings") as settings,
+        execute_query as execute_query_mock,
+    ):
+        settings.return_value.ROUTES_INDEX_ENABLED = False
+        settings.return_value.ROUTES_QUERY_PROJECTION_ENABLED = projection_enabled
+        result = await find_all_paths_many(
+            date=datetime.date(2024, 6, 15),
+            pairs=[pair_ab, pair_cd, pair_cb],
+            container_ids=[container.id],
+        )
+
+    assert execute_query_mock.call_count == 3
+    assert set(result) == {pair_ab, pair_cd, pair_cb}
+    assert [r.segments[0].id for r in result[pair_ab]] == [route_ab.id]
+    assert [r.segments[0].id for r in result[pair_cd]] == [route_cd.id]
+    assert result[pair_cb] == []
+
+
+@pytest.mark.asyncio
+async def test_projected_search_matches_orm_search(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        company, point_a, point_b, c20 = await _seed_basic_data(session)
+        point_mid = PointFactory(**_unique_point())
+        c40 = ContainerFactory(size=40, weight_from=0, weight_to=28000, name="40HC", type=ContainerType.HC)
+        service = ServiceFactory()
+        session.add_all([point_mid, c40, service])
+        await session.flush()
+
+        rail = RouteFactory(company_id=company.id, start_point_id=point_a.id, end_point_id=point_b.id)
+        sea = RouteFactory(
+            company_id=company.id, start_point_id=point_a.id, end_point_id=point_mid.id, type=RouteType.SEA,
+        )
+        sea_rail = RouteFactory(company_id=company.id, start_point_id=point_mid.id, end_point_id=point_b.id)
+        session.add_all([rail, sea, sea_rail])
+        await session.flush()
+
+        session.add_all([
+            *(
+                PriceFactory(route_id=route.id, container_id=container.id, value=100.0 * container.size)
+                for route in (rail, sea, sea_rail)
+                for container in (c20, c40)
+            ),
+            ServicePriceFactory(route_id=rail.id, service_id=service.id, container_id=None),
+            ServicePriceFactory(route_id=rail.id, service_id=service.id, container_id=c40.id, price=200.0),
+            ServicePriceFactory(route_id=sea.id, service_id=service.id, container_id=c20.id, price=300.0),
+            ServicePriceFactory(route_id=sea_rail.id, service_id=service.id, container_id=None, price=400.0),
+            *(
+                DropFactory(
+                    company_id=company.id,
+                    container_id=container.id,
+                    start_point_id=point_mid.id,
+                    end_point_id=point_b.id,
+                    price=price,
+                )
+                for container, price in ((c20, 500.0), (c40, 600.0))
+            ),
+        ])
+        await session.commit()
+
+    async def search(projection_enabled: bool, container_ids: list[int]) -> dict:
+        with (
+            patch("module_data_internal.aggregators.routes.get_database", return_value=sqlite_db),
+            patch("module_data_internal.aggregators.routes.get_settings") as settings,
+        ):
+            settings.return_value.ROUTES_INDEX_ENABLED = False
+            settings.return_value.ROUTES_QUERY_PROJECTION_ENABLED = projection_enabled
+            return await find_all_paths_many(
+                date=datetime.date(2024, 6, 15),
+                pairs=[(point_a.id, point_b.id), (point_a.id, point_mid.id)],
+                container_ids=container_ids,
+            )
+
+    for container_ids in ([c20.id], [c40.id], [c20.id, c40.id]):
+        orm = await search(False, container_ids)
+        assert [len(route.segments) for routes in orm.values() for route in routes] == [1, 2, 1]
+        assert await search(True, container_ids) == orm
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("projection_enabled", [False, True])
+async def test_find_all_paths_filters_services_of_each_search(sqlite_db: Database, projection_enabled: bool):
+    """Services of other containers are filtered in SQL on every search, not only on the first compiled one"""
+    async with sqlite_db.session_context() as session:
+        company, point_a, point_b, c20 = await _seed_basic_data(session)
+        point_mid = PointFactory(**_unique_point())
+        c40 = ContainerFactory(size=40, weight_from=0, weight_to=28000, name="40HC", type=ContainerType.HC)
+        service = ServiceFactory()
+        session.add_all([point_mid, c40, service])
+        await session.flush()
+
+        sea = RouteFactory(
+            company_id=company.id, start_point_id=point_a.id, end_point_id=point_mid.id, type=RouteType.SEA,
+        )
+        rail = RouteFactory(company_id=company.id, start_point_id=point_mid.id, end_point_id=point_b.id)
+        session.add_all([sea, rail])
+        await session.flush()
+
+        session.add_all([
+            *(PriceFactory(route_id=route.id, container_id=c.id) for route in (sea, rail) for c in (c20, c40)),
+            *(
+                DropFactory(
+                    company_id=company.id, container_id=c.id, start_point_id=point_mid.id, end_point_id=point_b.id,
+                )
+                for c in (c20, c40)
+            ),
+            ServicePriceFactory(route_id=sea.id, service_id=service.id, container_id=None, price=1.0),
+            ServicePriceFactory(route_id=sea.id, service_id=service.id, container_id=c20.id, price=20.0),
+            ServicePriceFactory(route_id=rail.id, service_id=service.id, container_id=c40.id, price=40.0),
+        ])
+        await session.commit()
+
+    with (
+        patch("module_data_internal.aggregators.routes.get_database", return_value=sqlite_db),
+        patch("module_data_internal.aggregators.routes.get_settings") as settings,
+    ):
+        settings.return_value.ROUTES_INDEX_ENABLED = False
+        settings.return_value.ROUTES_QUERY_PROJECTION_ENABLED = projection_enabled
+        prices = {}
+        for container_ids in ([c20.id], [c40.id], [c20.id]):
+            result = await find_all_paths_many(
+                date=datetime.date(2024, 6, 15),
+                pairs=[(point_a.id, point_b.id)],
+                container_ids=container_ids,
+            )
+            [route] = result[(point_a.id, point_b.id)]
+            prices.setdefault(container_ids[0], []).append(sorted(s.price for s in route.services))
+
+    assert prices == {c20.id: [[1.0, 20.0], [1.0, 20.0]], c40.id: [[1.0, 40.0]]}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("projection_enabled", [False, True])
+async def test_find_all_paths_reuses_compiled_statements(sqlite_db: Database, projection_enabled: bool):
+    async with sqlite_db.session_context() as session:
+        company, point_a, point_b, container = await _seed_basic_data(session)
+        point_c = PointFactory(**_unique_point())
+        session.add(point_c)
+        await session.flush()
+
+        route = RouteFactory(company_id=company.id, start_point_id=point_a.id, end_point_id=point_b.id)
+        session.add(route)
+        await session.flush()
+        session.add(PriceFactory(route_id=route.id, container_id=container.id))
+        await session.commit()
+
+    stats = track_statement_cache(sqlite_db._engine.sync_engine)
+    with (
+        patch("module_data_internal.aggregators.routes.get_database", return_value=sqlite_db),
+        patch("module_data_internal.aggregators.routes.get_settings") as settings,
+    ):
+        settings.return_value.ROUTES_INDEX_ENABLED = False
+        settings.return_value.ROUTES_QUERY_PROJECTION_ENABLED = projection_enabled
+        await find_all_paths(datetime.date(2024, 6, 15), point_a.id, point_b.id, [container.id])
+
+        # other values and numbers of ids are parameters of the same statements
+        hits, misses = stats.hits, stats.misses
+        result = await find_all_paths_many(
+            date=datetime.date(2024, 7, 1),
+            pairs=[(point_a.id, point_b.id), (point_c.id, point_b.id), (point_a.id, point_c.id)],
+            container_ids=[container.id, container.id + 1],
+        )
+
+    assert [r.segments[0].id for r in result[(point_a.id, point_b.id)]] == [route.id]
+    assert stats.misses == misses
+    # route queries of three types and the query of services
+    assert stats.hits - hits >= 4
@@ -0,0 +1,112 @@
+import asyncio
+import datetime
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from module_data_internal.cache import get_internal_routes_cached
+from module_shared.models.route import RouteResult, RouteSegment
+
+DATE = datetime.date(2024, 6, 15)
+
+
+def _route(segment_id: int) -> RouteResult:
+    return RouteResult(segments=[RouteSegment(
+        id=segment_id,
+        company="RailCo",
+        type="RAIL",
+        effectiveFrom="2024-01-01",
+        effectiveTo="2025-12-31",
+        startPointCountry="Россия",
+        startPointName="Москва",
+        endPointCountry="Россия",
+        endPointName="Владивосток",
+    )])
+
+
+def _mock_redis(mget_return: list) -> AsyncMock:
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=None)
+
+    mock_redis = AsyncMock()
+    mock_redis.mget = AsyncMock(return_value=mget_return)
+    mock_redis.pipeline = MagicMock(return_value=pipe)
+    return mock_redis
+
+
+@pytest.mark.asyncio
+async def test_fetches_only_missed_pairs():
+    cached = json.dumps([_route(1).model_dump(mode="json")])
+    redis = _mock_redis([cached, None])
+    fetch = AsyncMock(return_value=({(3, 4): [_route(2)]}, True))
+
+    with (
+        patch("module_data_internal.cache.get_redis", return_value=redis),
+        patch("module_data_internal.cache.get_data_version", AsyncMock(return_value=7)),
+    ):
+        result = await get_internal_routes_cached(DATE, [(1, 2), (3, 4)], [2, 1], False, fetch)
+        await asyncio.sleep(0)
+
+    fetch.assert_awaited_once_with([(3, 4)])
+    assert [r.segments[0].id for r in result[(1, 2)]] == [1]
+    assert [r.segments[0].id for r in result[(3, 4)]] == [2]
+
+    keys = redis.mget.call_args.args[0]
+    assert keys == [
+        "backend_user:internal:routes:v7:2024-06-15:1:2:1,2:0",
+        "backend_user:internal:routes:v7:2024-06-15:3:4:1,2:0",
+    ]
+    pipe = redis.pipeline.return_value
+    pipe.set.assert_called_once()
+    assert pipe.set.call_args.args[0] == keys[1]
+
+
+@pytest.mark.asyncio
+async def test_incomplete_results_are_not_cached():
+    redis = _mock_redis([None])
+    fetch = AsyncMock(return_value=({(1, 2): []}, False))
+
+    with (
+        patch("module_data_internal.cache.get_redis", return_value=redis),
+        patch("module_data_internal.cache.get_data_version", AsyncMock(return_value=1)),
+    ):
+        result = await get_internal_routes_cached(DATE, [(1, 2)], [1], True, fetch)
+        await asyncio.sleep(0)
+
+    assert result == {(1, 2): []}
+    redis.pipeline.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_bypassed_when_version_unavailable():
+    redis = _mock_redis([])
+    fetch = AsyncMock(return_value=({(1, 2): [_route(1)]}, True))
+
+    with (
+        patch("module_data_internal.cache.get_redis", return_value=redis),
+        patch("module_data_internal.cache.get_data_version", AsyncMock(return_value=None)),
+    ):
+        result = await get_internal_routes_cached(DATE, [(1, 2)], [1], False, fetch)
+        await asyncio.sleep(0)
+
+    assert len(result[(1, 2)]) == 1
+    redis.mget.assert_not_called()
+    redis.pipeline.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_corrupt_entry_is_refetched():
+    redis = _mock_redis(["not json"])
+    fetch = AsyncMock(return_value=({(1, 2): [_route(1)]}, True))
+
+    with (
+        patch("module_data_internal.cache.get_redis", return_value=redis),
+        patch("module_data_internal.cache.get_data_version", AsyncMock(return_value=1)),
+    ):
+        result = await get_internal_routes_cached(DATE, [(1, 2)], [1], False, fetch)
+        await asyncio.sleep(0)
+
+    fetch.assert_awaited_once_with([(1, 2)])
+    assert len(result[(1, 2)]) == 1
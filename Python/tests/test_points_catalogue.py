@@ -0,0 +1,118 @@
+import asyncio
+import datetime
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from backend_user.api.v2.points.get import _group_points, _strip_demo_fields_from_points
+from backend_user.schemas.errors import RouteError
+from backend_user.schemas.get_points_responses import PointsDataResponse
+from backend_user.services.points_catalogue import (
+    get_points_catalogue,
+    serialize_points,
+    serialize_points_response,
+)
+
+DATE = datetime.date(2024, 6, 15)
+
+
+def _raw_point(point_id, company_id, company_name, name):
+    return {
+        "id": point_id,
+        "company": {"id": company_id, "name": company_name},
+        "ports": [],
+        "translates": {
+            "ru": {"country": "Россия", "name": name},
+            "en": {"country": "Russia", "name": name},
+        },
+    }
+
+
+def _points():
+    return _group_points([
+        _raw_point(1, 1, "RailCo", "Москва"),
+        _raw_point("E1", "FESCO", "FESCO", "Москва"),
+        _raw_point(2, 1, "RailCo", "Владивосток (ВМТП)"),
+    ])
+
+
+def _mock_redis(get_return=None) -> AsyncMock:
+    mock_redis = AsyncMock()
+    mock_redis.get = AsyncMock(return_value=get_return)
+    mock_redis.set = AsyncMock()
+    return mock_redis
+
+
+def test_serialized_response_matches_schema():
+    points = _points()
+    body = serialize_points_response([], serialize_points(points))
+
+    response = PointsDataResponse.model_validate_json(body)
+    assert response.errors == []
+    assert sorted(p.translates["ru"].name for p in response.data) == ["Владивосток", "Москва"]
+    moscow = next(p for p in response.data if p.translates["ru"].name == "Москва")
+    assert moscow.ids == [1]
+    assert moscow.external_ids == ["E1"]
+
+
+@pytest.mark.asyncio
+async def test_built_once_and_cached():
+    redis = _mock_redis()
+    build = AsyncMock(return_value=([], _points()))
+
+    with (
+        patch("backend_user.services.points_catalogue.get_redis", return_value=redis),
+        patch("backend_user.services.points_catalogue.get_data_version", AsyncMock(return_value=3)),
+    ):
+        errors, data = await get_points_catalogue("destinations", DATE, ["2", "1"], build)
+        await asyncio.sleep(0)
+
+    build.assert_awaited_once()
+    assert errors == []
+    key, value = redis.set.call_args.args
+    assert key == "backend_user:points:destinations:v3:2024-06-15:1,2"
+    assert value.encode() == data
+
+
+@pytest.mark.asyncio
+async def test_served_from_cache():
+    cached = serialize_points(_points()).decode()
+    redis = _mock_redis(cached)
+    build = AsyncMock()
+
+    with (
+        patch("backend_user.services.points_catalogue.get_redis", return_value=redis),
+        patch("backend_user.services.points_catalogue.get_data_version", AsyncMock(return_value=3)),
+    ):
+        errors, data = await get_points_catalogue("departures", DATE, [], build)
+
+    build.assert_not_awaited()
+    assert errors == []
+    assert data == cached.encode()
+    redis.get.assert_awaited_once_with("backend_user:points:departures:v3:2024-06-15")
+
+
+@pytest.mark.asyncio
+async def test_results_with_errors_are_not_cached():
+    redis = _mock_redis()
+    error = RouteError(error_type="Exception", error_text="FESCO is down", source="external")
+    build = AsyncMock(return_value=([error], _points()))
+
+    with (
+        patch("backend_user.services.points_catalogue.get_redis", return_value=redis),
+        patch("backend_user.services.points_catalogue.get_data_version", AsyncMock(return_value=3)),
+    ):
+        errors, _ = await get_points_catalogue("departures", DATE, [], build)
+        await asyncio.sleep(0)
+
+    assert errors == [error]
+    redis.set.assert_not_awaited()
+
+
+def test_strip_demo_companies():
+    points = json.loads(serialize_points(_points()))
+
+    _strip_demo_fields_from_points(points, ["company"])
+
+    assert all(p["companies"] == [] for p in points)
+    assert all(port["companies"] == [] for p in points for port in p["ports"])
@@ -48,6 +48,10 @@ def _make_full_route(company: str = "CompanyA", segments_count: int = 1, **segme
     return RouteResult(segments=segments)
 
 
+def _find_all_paths_many_mock(routes: list[RouteResult]) -> AsyncMock:
+    return AsyncMock(side_effect=lambda date, pairs, container_ids: {pair: routes for pair in pairs})
+
+
 def _make_request(
     dispatch_date: datetime.date | None = None,
     dep_internal: list[int] | None = None,
@@ -84,7 +88,7 @@ async def test_rail_only_internal():
             return_value=[ContainerItem(id=1, size=20, weight_from=0, weight_to=28000, type="DC", name="20DC")]
         )
         mock_agg.search_container_ids = lambda containers, weight, size: [1]
-        mock_agg.find_all_paths = AsyncMock(return_value=[route])
+        mock_agg.find_all_paths_many = _find_all_paths_many_mock([route])
         mock_fesco.get_containers = AsyncMock(return_value=[])
         mock_fesco.search_container_ids = lambda containers, weight, size: []
         mock_fesco.find_all_paths = AsyncMock(return_value=[])
@@ -110,7 +114,7 @@ async def test_sea_only_internal():
             return_value=[ContainerItem(id=1, size=20, weight_from=0, weight_to=28000, type="DC", name="20DC")]
         )
         mock_agg.search_container_ids = lambda containers, weight, size: [1]
-        mock_agg.find_all_paths = AsyncMock(return_value=[route])
+        mock_agg.find_all_paths_many = _find_all_paths_many_mock([route])
         mock_fesco.get_containers = AsyncMock(return_value=[])
         mock_fesco.search_container_ids = lambda containers, weight, size: []
         mock_fesco.find_all_paths = AsyncMock(return_value=[])
@@ -132,7 +136,7 @@ async def test_no_routes_found():
             return_value=[ContainerItem(id=1, size=20, weight_from=0, weight_to=28000, type="DC", name="20DC")]
         )
         mock_agg.search_container_ids = lambda containers, weight, size: [1]
-        mock_agg.find_all_paths = AsyncMock(return_value=[])
+        mock_agg.find_all_paths_many = _find_all_paths_many_mock([])
         mock_fesco.get_containers = AsyncMock(return_value=[])
         mock_fesco.search_container_ids = lambda containers, weight, size: []
         mock_fesco.find_all_paths = AsyncMock(return_value=[])
@@ -151,7 +155,7 @@ async def test_no_matching_containers():
     ):
         mock_agg.get_containers = AsyncMock(return_value=[])
         mock_agg.search_container_ids = lambda containers, weight, size: []
-        mock_agg.find_all_paths = AsyncMock(return_value=[])
+        mock_agg.find_all_paths_many = _find_all_paths_many_mock([])
         mock_fesco.get_containers = AsyncMock(return_value=[])
         mock_fesco.search_container_ids = lambda containers, weight, size: []
         mock_fesco.find_all_paths = AsyncMock(return_value=[])
@@ -173,7 +177,7 @@ async def test_multiple_internal_pairs():
             return_value=[ContainerItem(id=1, size=20, weight_from=0, weight_to=28000, type="DC", name="20DC")]
         )
         mock_agg.search_container_ids = lambda containers, weight, size: [1]
-        mock_agg.find_all_paths = AsyncMock(return_value=[route_a])
+        mock_agg.find_all_paths_many = _find_all_paths_many_mock([route_a])
         mock_fesco.get_containers = AsyncMock(return_value=[])
         mock_fesco.search_container_ids = lambda containers, weight, size: []
         mock_fesco.find_all_paths = AsyncMock(return_value=[])
@@ -193,7 +197,7 @@ async def test_fesco_external_source():
     ):
         mock_agg.get_containers = AsyncMock(return_value=[])
         mock_agg.search_container_ids = lambda containers, weight, size: []
-        mock_agg.find_all_paths = AsyncMock(return_value=[])
+        mock_agg.find_all_paths_many = _find_all_paths_many_mock([])
         mock_fesco.get_containers = AsyncMock(
             return_value=[ContainerItem(id="f1", size=20, weight_from=0, weight_to=28000, type="DC", name="20DC")]
         )
@@ -219,7 +223,7 @@ async def test_mixed_internal_and_external():
             return_value=[ContainerItem(id=1, size=20, weight_from=0, weight_to=28000, type="DC", name="20DC")]
         )
         mock_agg.search_container_ids = lambda containers, weight, size: [1]
-        mock_agg.find_all_paths = AsyncMock(return_value=[route_int])
+        mock_agg.find_all_paths_many = _find_all_paths_many_mock([route_int])
         mock_fesco.get_containers = AsyncMock(
             return_value=[ContainerItem(id="f1", size=20, weight_from=0, weight_to=28000, type="DC", name="20DC")]
         )
@@ -248,7 +252,7 @@ async def test_fesco_api_error_does_not_break_all():
             return_value=[ContainerItem(id=1, size=20, weight_from=0, weight_to=28000, type="DC", name="20DC")]
         )
         mock_agg.search_container_ids = lambda containers, weight, size: [1]
-        mock_agg.find_all_paths = AsyncMock(return_value=[route_int])
+        mock_agg.find_all_paths_many = _find_all_paths_many_mock([route_int])
         mock_fesco.get_containers = AsyncMock(side_effect=Exception("FESCO timeout"))
         mock_fesco.search_container_ids = lambda containers, weight, size: []
         mock_fesco.find_all_paths = AsyncMock(side_effect=Exception("FESCO timeout"))
@@ -272,7 +276,7 @@ async def test_external_only_without_internal():
     ):
         mock_agg.get_containers = AsyncMock(return_value=[])
         mock_agg.search_container_ids = lambda containers, weight, size: []
-        mock_agg.find_all_paths = AsyncMock(return_value=[])
+        mock_agg.find_all_paths_many = _find_all_paths_many_mock([])
         mock_fesco.get_containers = AsyncMock(
             return_value=[ContainerItem(id="f1", size=20, weight_from=0, weight_to=28000, type="DC", name="20DC")]
         )
@@ -294,7 +298,7 @@ async def test_empty_ids_lists_returns_empty():
     ):
         mock_agg.get_containers = AsyncMock(return_value=[])
         mock_agg.search_container_ids = lambda containers, weight, size: []
-        mock_agg.find_all_paths = AsyncMock(return_value=[])
+        mock_agg.find_all_paths_many = _find_all_paths_many_mock([])
         mock_fesco.get_containers = AsyncMock(return_value=[])
         mock_fesco.search_container_ids = lambda containers, weight, size: []
         mock_fesco.find_all_paths = AsyncMock(return_value=[])
@@ -314,7 +318,7 @@ async def test_container_fetch_fails_gracefully():
     ):
         mock_agg.get_containers = AsyncMock(side_effect=Exception("DB timeout"))
         mock_agg.search_container_ids = Mock()
-        mock_agg.find_all_paths = AsyncMock(return_value=[])
+        mock_agg.find_all_paths_many = _find_all_paths_many_mock([])
         mock_fesco.get_containers = AsyncMock(return_value=[])
         mock_fesco.search_container_ids = lambda containers, weight, size: []
         mock_fesco.find_all_paths = AsyncMock(return_value=[])
@@ -51,6 +51,10 @@ def _make_full_route(company: str = "CompanyA", segments_count: int = 1, **segme
     return RouteResult(segments=segments)
 
 
+def _find_all_paths_many_mock(routes: list[RouteResult]) -> AsyncMock:
+    return AsyncMock(side_effect=lambda date, pairs, container_ids: {pair: routes for pair in pairs})
+
+
 def _make_request(
     dispatch_date=None,
     dep_internal=None,
@@ -238,6 +242,38 @@ class TestSSEGenerator:
         price = events[0].data.segments[0].prices[0]
         assert price.value == 1100.0
 
+    @pytest.mark.asyncio
+    @patch("backend_user.api.v3.routes.post.get_setting_cached", new_callable=AsyncMock)
+    @patch("backend_user.api.v3.routes.post.get_database")
+    @patch("backend_user.services.profit.get_rates", new_callable=AsyncMock)
+    async def test_sse_demo_context_resolved_once_per_stream(self, mock_rates, mock_db, mock_get_setting):
+        mock_get_setting.return_value = Mock(value=["company"])
+        mock_rates.return_value = ({"RUB": 1, "USD": 90, "EUR": 100}, datetime.date.today())
+        mock_session = AsyncMock()
+        mock_db.return_value.session_context.return_value.__aenter__ = AsyncMock(return_value=mock_session)
+        mock_db.return_value.session_context.return_value.__aexit__ = AsyncMock(return_value=False)
+        routes = [_make_full_route(company=f"Company{i}", type="sea") for i in range(3)]
+        auth = AuthContext(is_demo=True, sea_profit=100.0, sea_profit_currency="USD")
+
+        with patch("backend_user.api.v3.routes.post.calculate_routes_stream") as mock_stream:
+            async def mock_gen(request):
+                for route in routes:
+                    yield route
+
+            mock_stream.side_effect = mock_gen
+
+            request = _make_request()
+            events: list[ServerSentEvent] = []
+            async for event in _sse_generator(request, auth):
+                events.append(event)
+
+        assert len(events) == 3
+        assert all(e.data.segments[0].company is None for e in events)
+        assert all(e.data.segments[0].prices[0].value == 1100.0 for e in events)
+        mock_rates.assert_awaited_once()
+        mock_get_setting.assert_awaited_once()
+        mock_db.return_value.session_context.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_sse_empty_results(self):
         with patch("backend_user.api.v3.routes.post.calculate_routes_stream") as mock_stream:
@@ -271,7 +307,7 @@ class TestCalculateRoutesStream:
                 return_value=[ContainerItem(id=1, size=20, weight_from=0, weight_to=28000, type="DC", name="20DC")]
             )
             mock_agg.search_container_ids = lambda containers, weight, size: [1]
-            mock_agg.find_all_paths = AsyncMock(return_value=[route1, route2])
+            mock_agg.find_all_paths_many = _find_all_paths_many_mock([route1, route2])
             mock_fesco.get_containers = AsyncMock(return_value=[])
             mock_fesco.search_container_ids = lambda containers, weight, size: []
             mock_fesco.find_all_paths = AsyncMock(return_value=[])
@@ -298,7 +334,7 @@ class TestCalculateRoutesStream:
                 return_value=[ContainerItem(id=1, size=20, weight_from=0, weight_to=28000, type="DC", name="20DC")]
             )
             mock_agg.search_container_ids = lambda containers, weight, size: [1]
-            mock_agg.find_all_paths = AsyncMock(side_effect=Exception("DB timeout"))
+            mock_agg.find_all_paths_many = AsyncMock(side_effect=Exception("DB timeout"))
             mock_fesco.get_containers = AsyncMock(return_value=[])
             mock_fesco.search_container_ids = lambda containers, weight, size: []
             mock_fesco.find_all_paths = AsyncMock(return_value=[])
@@ -327,7 +363,7 @@ class TestCalculateRoutesStream:
                 return_value=[ContainerItem(id=1, size=20, weight_from=0, weight_to=28000, type="DC", name="20DC")]
             )
             mock_agg.search_container_ids = lambda containers, weight, size: [1]
-            mock_agg.find_all_paths = AsyncMock(return_value=[route_int])
+            mock_agg.find_all_paths_many = _find_all_paths_many_mock([route_int])
             mock_fesco.get_containers = AsyncMock(
                 return_value=[ContainerItem(id="f1", size=20, weight_from=0, weight_to=28000, type="DC", name="20DC")]
             )
@@ -353,7 +389,7 @@ class TestCalculateRoutesStream:
         ):
             mock_agg.get_containers = AsyncMock(return_value=[])
             mock_agg.search_container_ids = lambda containers, weight, size: []
-            mock_agg.find_all_paths = AsyncMock(return_value=[])
+            mock_agg.find_all_paths_many = _find_all_paths_many_mock([])
             mock_fesco.get_containers = AsyncMock(return_value=[])
             mock_fesco.search_container_ids = lambda containers, weight, size: []
             mock_fesco.find_all_paths = AsyncMock(return_value=[])
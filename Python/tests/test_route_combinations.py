@@ -0,0 +1,140 @@
+import datetime
+from unittest.mock import patch
+
+import pytest
+from module_data_internal import route_combinations
+from module_data_internal.route_combinations import rebuild_route_combinations
+from module_data_internal.schemas import ContainerOwner, RouteCombinationModel, RouteType
+from module_shared.database import Database
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .data import (
+    CompanyFactory,
+    ContainerFactory,
+    DropFactory,
+    PointFactory,
+    PriceFactory,
+    RouteFactory,
+)
+
+
+async def _combinations(session) -> set[tuple]:
+    rows = await session.execute(select(
+        RouteCombinationModel.sea_route_id,
+        RouteCombinationModel.rail_route_id,
+        RouteCombinationModel.drop_id,
+        RouteCombinationModel.container_id,
+        RouteCombinationModel.effective_from,
+        RouteCombinationModel.effective_to,
+    ))
+    return set(rows.all())
+
+
+async def _assert_same_as_rebuilt(session) -> set[tuple]:
+    """Combinations refreshed on commits are the same as rebuilt from scratch"""
+    refreshed = await _combinations(session)
+    await session.run_sync(rebuild_route_combinations)
+    assert await _combinations(session) == refreshed
+    return refreshed
+
+
+@pytest.mark.asyncio
+async def test_combinations_follow_session_changes(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        company = CompanyFactory(name="SeaCo")
+        port = PointFactory(city="Shanghai", RU_city="Шанхай")
+        hub = PointFactory(city="Vladivostok", RU_city="Владивосток")
+        city = PointFactory(city="Moscow", RU_city="Москва")
+        c20 = ContainerFactory(size=20, weight_from=0, weight_to=28, name="20DC")
+        c40 = ContainerFactory(size=40, weight_from=0, weight_to=28, name="40HC")
+        session.add_all([company, port, hub, city, c20, c40])
+        await session.flush()
+
+        sea = RouteFactory(company_id=company.id, start_point_id=port.id, end_point_id=hub.id, type=RouteType.SEA)
+        rail = RouteFactory(
+            company_id=company.id,
+            start_point_id=hub.id,
+            end_point_id=city.id,
+            type=RouteType.RAIL,
+            container_owner=ContainerOwner.SOC,
+        )
+        session.add_all([sea, rail])
+        await session.flush()
+        rail_prices = [PriceFactory(route_id=rail.id, container_id=c20.id)]
+        session.add_all([PriceFactory(route_id=sea.id, container_id=c20.id), *rail_prices])
+        drop20 = DropFactory(
+            company_id=company.id,
+            container_id=c20.id,
+            start_point_id=hub.id,
+            end_point_id=city.id,
+            effective_from=datetime.date(2024, 6, 1),
+            effective_to=datetime.date(2024, 6, 30),
+        )
+        session.add(drop20)
+        await session.commit()
+
+        assert await _assert_same_as_rebuilt(session) == {(
+            sea.id, rail.id, drop20.id, c20.id, datetime.datetime(2024, 6, 1), datetime.datetime(2024, 6, 30),
+        )}
+
+        # the rail route has no price of the container of the drop
+        drop40 = DropFactory(company_id=company.id, container_id=c40.id, start_point_id=hub.id, end_point_id=city.id)
+        session.add(drop40)
+        await session.commit()
+        assert len(await _assert_same_as_rebuilt(session)) == 1
+
+        rail_prices.append(PriceFactory(route_id=rail.id, container_id=c40.id))
+        session.add(rail_prices[-1])
+        await session.commit()
+        assert {row[2] for row in await _assert_same_as_rebuilt(session)} == {drop20.id, drop40.id}
+
+        drop20.effective_from = datetime.date(2026, 1, 1)
+        drop20.effective_to = datetime.date(2026, 12, 31)
+        await session.commit()
+        assert {row[2] for row in await _assert_same_as_rebuilt(session)} == {drop40.id}
+
+        for model in [*rail_prices, rail]:
+            await session.delete(model)
+        await session.commit()
+        assert await _assert_same_as_rebuilt(session) == set()
+
+
+@pytest.mark.asyncio
+async def test_combinations_of_many_changes_are_rebuilt(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        company = CompanyFactory(name="SeaCo")
+        port = PointFactory(city="Shanghai", RU_city="Шанхай")
+        hub = PointFactory(city="Vladivostok", RU_city="Владивосток")
+        container = ContainerFactory(size=20, weight_from=0, weight_to=28, name="20DC")
+        session.add_all([company, port, hub, container])
+        await session.flush()
+
+        sea = RouteFactory(company_id=company.id, start_point_id=port.id, end_point_id=hub.id, type=RouteType.SEA)
+        session.add(sea)
+        await session.flush()
+        sea.dropp_off_point_id = hub.id
+        rail = RouteFactory(company_id=company.id, start_point_id=hub.id, end_point_id=hub.id, type=RouteType.RAIL)
+        session.add(rail)
+
+        with (
+            patch.object(route_combinations, "REFRESH_LIMIT", 1),
+            patch.object(route_combinations, "rebuild_route_combinations", wraps=rebuild_route_combinations) as rebuild,
+        ):
+            await session.commit()
+
+        rebuild.assert_called_once()
+        assert {row[:3] for row in await _assert_same_as_rebuilt(session)} == {(sea.id, rail.id, None)}
+
+
+@pytest.mark.asyncio
+async def test_commits_without_changes_are_not_flushed(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        session.add(CompanyFactory(name="SeaCo"))
+        await session.commit()
+
+        await session.execute(select(RouteCombinationModel))
+        with patch.object(Session, "flush") as flush:
+            await session.commit()
+
+        flush.assert_not_called()
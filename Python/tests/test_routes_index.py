@@ -0,0 +1,190 @@
+import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from module_data_internal.aggregators.routes import find_all_paths
+from module_data_internal.aggregators.routes_index import RoutesIndexHolder, build_routes_index
+from module_data_internal.schemas import ContainerOwner, ContainerType, RouteType
+from module_shared.database import Database
+
+from .data import (
+    CompanyFactory,
+    ContainerFactory,
+    DropFactory,
+    PointFactory,
+    PriceFactory,
+    RouteFactory,
+    ServiceFactory,
+    ServicePriceFactory,
+)
+
+DATE = datetime.date(2024, 6, 15)
+
+
+async def _seed_network(session) -> dict:
+    sea_co = CompanyFactory(name="SeaCo")
+    rail_co = CompanyFactory(name="RailCo")
+    port = PointFactory(city="Port", RU_city="Порт")
+    hub = PointFactory(city="Hub", RU_city="Хаб")
+    city = PointFactory(city="City", RU_city="Город")
+    c20 = ContainerFactory(size=20, weight_from=0, weight_to=28000, name="20DC", type=ContainerType.DC)
+    c40 = ContainerFactory(size=40, weight_from=0, weight_to=28000, name="40DC", type=ContainerType.DC)
+    service = ServiceFactory()
+    session.add_all([sea_co, rail_co, port, hub, city, c20, c40, service])
+    await session.flush()
+
+    routes = {
+        "rail_direct": RouteFactory(
+            company_id=rail_co.id, start_point_id=port.id, end_point_id=city.id, type=RouteType.RAIL,
+        ),
+        "sea_direct": RouteFactory(
+            company_id=sea_co.id, start_point_id=port.id, end_point_id=city.id, type=RouteType.SEA,
+            effective_to=datetime.date(2024, 12, 31),
+        ),
+        "sea_expired": RouteFactory(
+            company_id=sea_co.id, start_point_id=port.id, end_point_id=city.id, type=RouteType.SEA,
+            effective_from=datetime.date(2023, 1, 1), effective_to=datetime.date(2023, 12, 31),
+        ),
+        "sea": RouteFactory(
+            company_id=sea_co.id, start_point_id=port.id, end_point_id=hub.id, type=RouteType.SEA,
+        ),
+        "sea_soc": RouteFactory(
+            company_id=sea_co.id, start_point_id=port.id, end_point_id=hub.id, type=RouteType.SEA,
+            container_owner=ContainerOwner.SOC, effective_to=datetime.date(2024, 12, 31),
+        ),
+        "sea_with_dropp_off": RouteFactory(
+            company_id=sea_co.id, start_point_id=port.id, end_point_id=hub.id, type=RouteType.SEA,
+            dropp_off_point_id=city.id, effective_to=datetime.date(2024, 11, 30),
+        ),
+        "rail_soc": RouteFactory(
+            company_id=rail_co.id, start_point_id=hub.id, end_point_id=city.id, type=RouteType.RAIL,
+            container_owner=ContainerOwner.SOC,
+        ),
+        "rail_coc_other_company": RouteFactory(
+            company_id=rail_co.id, start_point_id=hub.id, end_point_id=city.id, type=RouteType.RAIL,
+            container_owner=ContainerOwner.COC, effective_to=datetime.date(2024, 12, 31),
+        ),
+    }
+    session.add_all(routes.values())
+    await session.flush()
+
+    for route in routes.values():
+        session.add(PriceFactory(route_id=route.id, container_id=c20.id))
+    session.add(PriceFactory(route_id=routes["rail_direct"].id, container_id=c40.id, value=2000.0))
+    session.add_all([
+        ServicePriceFactory(route_id=routes["sea"].id, service_id=service.id, container_id=None),
+        ServicePriceFactory(route_id=routes["sea"].id, service_id=service.id, container_id=c20.id, price=20),
+        ServicePriceFactory(route_id=routes["sea"].id, service_id=service.id, container_id=c40.id, price=40),
+        DropFactory(company_id=sea_co.id, container_id=c20.id, start_point_id=hub.id, end_point_id=city.id),
+    ])
+    await session.commit()
+
+    return {"port": port, "hub": hub, "city": city, "c20": c20, "c40": c40}
+
+
+def _dump(routes) -> list[dict]:
+    return [route.model_dump() for route in routes]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("hide_sea_soc", [False, True])
+async def test_index_matches_sql(sqlite_db: Database, hide_sea_soc: bool):
+    async with sqlite_db.session_context() as session:
+        seeded = await _seed_network(session)
+
+    args = (DATE, seeded["port"].id, seeded["city"].id, [seeded["c20"].id])
+
+    with (
+        patch("module_data_internal.aggregators.routes.get_database", return_value=sqlite_db),
+        patch("module_data_internal.aggregators.routes._get_hide_sea_soc", AsyncMock(return_value=hide_sea_soc)),
+    ):
+        expected = await find_all_paths(*args)
+
+    with patch("module_data_internal.aggregators.routes_index.get_database", return_value=sqlite_db):
+        index = await build_routes_index()
+
+    actual = index.find_all_paths(*args, hide_sea_soc=hide_sea_soc)
+
+    assert len(actual) == (4 if hide_sea_soc else 5)
+    assert _dump(actual) == _dump(expected)
+
+
+@pytest.mark.asyncio
+async def test_index_filters_prices_and_services_by_containers(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        seeded = await _seed_network(session)
+
+    with patch("module_data_internal.aggregators.routes_index.get_database", return_value=sqlite_db):
+        index = await build_routes_index()
+
+    routes = index.find_all_paths(DATE, seeded["port"].id, seeded["hub"].id, [seeded["c20"].id])
+    sea = next(r for r in routes if r.segments[0].container_owner == "COC")
+
+    assert [p.container.id for p in sea.segments[0].prices] == [seeded["c20"].id]
+    assert sorted(s.price for s in sea.services) == [20, 100]
+
+    routes = index.find_all_paths(DATE, seeded["port"].id, seeded["city"].id, [seeded["c40"].id])
+    assert len(routes) == 1
+    assert [p.value for p in routes[0].segments[0].prices] == [2000.0]
+
+
+@pytest.mark.asyncio
+async def test_index_results_are_copies(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        seeded = await _seed_network(session)
+
+    with patch("module_data_internal.aggregators.routes_index.get_database", return_value=sqlite_db):
+        index = await build_routes_index()
+
+    args = (DATE, seeded["port"].id, seeded["city"].id, [seeded["c20"].id])
+    first = index.find_all_paths(*args)
+    for route in first:
+        route.segments[0].company = None
+        for price in route.segments[0].prices:
+            price.value = 0
+
+    second = index.find_all_paths(*args)
+    assert all(route.segments[0].company is not None for route in second)
+    assert all(price.value == 1000.0 for route in second for price in route.segments[0].prices)
+
+
+@pytest.mark.asyncio
+async def test_holder_rebuilds_on_version_change(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        await _seed_network(session)
+
+    holder = RoutesIndexHolder()
+    version = AsyncMock(side_effect=[1, 1, 2])
+
+    with (
+        patch("module_data_internal.aggregators.routes_index.get_database", return_value=sqlite_db),
+        patch("module_data_internal.aggregators.routes_index.get_data_version", version),
+        patch("module_data_internal.aggregators.routes_index.get_settings") as settings,
+    ):
+        settings.return_value.ROUTES_INDEX_VERSION_CHECK_INTERVAL = 0
+
+        first = await holder.get()
+        assert await holder.get() is first
+
+        second = await holder.get()
+        assert second is not first
+        assert second.version == 2
+
+
+@pytest.mark.asyncio
+async def test_holder_keeps_index_when_redis_unavailable(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        await _seed_network(session)
+
+    holder = RoutesIndexHolder()
+
+    with (
+        patch("module_data_internal.aggregators.routes_index.get_database", return_value=sqlite_db),
+        patch("module_data_internal.aggregators.routes_index.get_data_version", AsyncMock(side_effect=[3, None])),
+        patch("module_data_internal.aggregators.routes_index.get_settings") as settings,
+    ):
+        settings.return_value.ROUTES_INDEX_VERSION_CHECK_INTERVAL = 0
+
+        first = await holder.get()
+        assert await holder.get() is first
+        assert first.version == 3
@@ -0,0 +1,216 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from backend_admin.service.routes_loading import processor
+from backend_admin.service.routes_loading.errors import (
+    InvalidDroppRow,
+    NoPriceInRouteException,
+    PointNotFoundException,
+)
+from backend_admin.service.routes_loading.pool import LoadingPool
+from backend_admin.service.routes_loading.processor import load_data
+from backend_admin.service.routes_loading.uploader import DiffCounts
+from module_data_internal.schemas import (
+    ContainerModel,
+    ContainerShipmentTerms,
+    DropModel,
+    PointModel,
+    PriceModel,
+    RouteModel,
+    RouteType,
+    ServicePriceModel,
+)
+from module_shared.database import Database
+from sqlalchemy import select
+
+from .data import uploader_fields_config, uploader_sheets
+
+
+@pytest.mark.asyncio
+async def test_load_data_reports_invalid_rows(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        loaded, routes_count, warnings, changes = await load_data(session, *uploader_sheets(), uploader_fields_config())
+
+        assert not loaded
+        assert routes_count == 2
+        assert changes is None
+        assert [(type(error), i, route_type) for error, i, route_type in warnings] == [
+            (NoPriceInRouteException, 1, RouteType.SEA),
+            (PointNotFoundException, 2, RouteType.SEA),
+            (InvalidDroppRow, 1, None),
+        ]
+        assert warnings[1][0].error_key == "atlantis"
+        assert (await session.execute(select(RouteModel))).scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_load_data_validate_only_writes_nothing(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        loaded, routes_count, warnings, changes = await load_data(
+            session, *uploader_sheets(), uploader_fields_config(), load_on_warnings=True, validate_only=True,
+        )
+
+        assert not loaded
+        assert routes_count == 2
+        assert changes is None
+        assert [(type(error), i, route_type) for error, i, route_type in warnings] == [
+            (NoPriceInRouteException, 1, RouteType.SEA),
+            (PointNotFoundException, 2, RouteType.SEA),
+            (InvalidDroppRow, 1, None),
+        ]
+        for model in (PointModel, ContainerModel, RouteModel, DropModel):
+            assert (await session.execute(select(model))).scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_load_data_rejects_routes_with_zero_prices(sqlite_db: Database):
+    sea, rail, dropp, services, points = uploader_sheets()
+    sea.loc[0, ["sea_20dc", "sea_40hc"]] = 0
+    rail.loc[0, "rail_20dc24t"] = 0
+
+    async with sqlite_db.session_context() as session:
+        _, _, warnings, _ = await load_data(
+            session, sea, rail, dropp, services, points, uploader_fields_config(), validate_only=True,
+        )
+
+    # a zero price is written only with a non-zero one
+    assert [(type(error), i, route_type) for error, i, route_type in warnings][:2] == [
+        (NoPriceInRouteException, 0, RouteType.SEA),
+        (NoPriceInRouteException, 1, RouteType.SEA),
+    ]
+    assert all(route_type is not RouteType.RAIL for _, _, route_type in warnings)
+
+
+@pytest.mark.asyncio
+async def test_load_data_writes_valid_rows(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        loaded, routes_count, _, changes = await load_data(
+            session, *uploader_sheets(), uploader_fields_config(), load_on_warnings=True,
+        )
+        assert loaded
+        assert routes_count == 2
+        assert changes == {"routes": DiffCounts(inserted=2), "dropp": DiffCounts(inserted=2)}
+
+        containers = {
+            container.id: (container.size, container.weight_from, container.weight_to)
+            for container in (await session.execute(select(ContainerModel))).scalars()
+        }
+        routes = {route.type: route for route in (await session.execute(select(RouteModel))).scalars()}
+        assert set(routes) == {RouteType.SEA, RouteType.RAIL}
+        assert routes[RouteType.SEA].timetable == "weekly"
+        assert routes[RouteType.SEA].is_through
+        assert routes[RouteType.RAIL].container_shipment_terms is ContainerShipmentTerms.FOB
+
+        prices = {
+            (price.route_id, containers[price.container_id]): (price.value, price.currency, price.conversation_percents)
+            for price in (await session.execute(select(PriceModel))).scalars()
+        }
+        sea_id, rail_id = routes[RouteType.SEA].id, routes[RouteType.RAIL].id
+        assert prices == {
+            (sea_id, (20, 0, 24)): (1000.0, "USD", 2.0),
+            (sea_id, (20, 24, 28)): (1000.0, "USD", 2.0),
+            (sea_id, (40, 0, 28)): (2000.0, "EUR", 2.0),
+            (rail_id, (20, 0, 24)): (300.0, "РУБ", 2.0),
+            (rail_id, (40, 0, 28)): (500.0, "РУБ", 2.0),
+        }
+
+        service_prices = {
+            (service_price.route_id, containers.get(service_price.container_id)): (
+                service_price.price, service_price.currency,
+            )
+            for service_price in (await session.execute(select(ServicePriceModel))).scalars()
+        }
+        assert service_prices == {
+            (sea_id, None): (50.0, "USD"),
+            (rail_id, (20, 0, 24)): (10.0, "руб"),
+        }
+
+        dropp = (await session.execute(select(DropModel))).scalars().all()
+        assert sorted(containers[drop.container_id] for drop in dropp) == [(20, 0, 24), (20, 24, 28)]
+        assert {drop.price for drop in dropp} == {70.0}
+
+
+@pytest.mark.asyncio
+async def test_load_data_diff_applies_changed_rows(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        await load_data(session, *uploader_sheets(), uploader_fields_config(), load_on_warnings=True)
+
+        _, _, _, changes = await load_data(
+            session, *uploader_sheets(), uploader_fields_config(), load_on_warnings=True, diff=True,
+        )
+        assert changes == {"routes": DiffCounts(unchanged=2), "dropp": DiffCounts(unchanged=2)}
+
+        sea, rail, dropp, services, points = uploader_sheets()
+        sea.loc[0, "sea_40hc"] = 2500
+        sea.loc[1, "sea_20dc"] = 100
+        rail.loc[0, "end_point"] = "Shanghai"
+        dropp.loc[0, "drop20"] = None
+        _, routes_count, _, changes = await load_data(
+            session, sea, rail, dropp, services, points, uploader_fields_config(), load_on_warnings=True, diff=True,
+        )
+        assert routes_count == 3
+        assert changes == {
+            "routes": DiffCounts(inserted=2, changed=1, removed=1),
+            "dropp": DiffCounts(removed=2),
+        }
+
+        rail_route = (await session.execute(select(RouteModel).where(RouteModel.type == RouteType.RAIL))).scalar_one()
+        shanghai = (await session.execute(select(PointModel).where(PointModel.city == "Shanghai"))).scalar_one()
+        assert rail_route.end_point_id == shanghai.id
+        assert sorted((await session.execute(select(PriceModel.value))).scalars().all()) == [
+            100.0, 100.0, 300.0, 500.0, 1000.0, 1000.0, 2500.0,
+        ]
+        assert len((await session.execute(select(ServicePriceModel))).scalars().all()) == 3
+        assert (await session.execute(select(DropModel))).scalars().all() == []
+
+        # the changed route (without a dropp-off point) is updated in place, not inserted again
+        fingerprints = (await session.execute(select(RouteModel.fingerprint))).scalars().all()
+        assert len(fingerprints) == 3
+        assert len(set(fingerprints)) == 3
+
+        _, _, _, changes = await load_data(
+            session, sea, rail, dropp, services, points, uploader_fields_config(), load_on_warnings=True, diff=True,
+        )
+        assert changes == {"routes": DiffCounts(unchanged=3), "dropp": DiffCounts()}
+
+
+@pytest.mark.asyncio
+async def test_load_data_diff_hashes_dont_depend_on_dtypes(sqlite_db: Database):
+    sea, rail, dropp, services, points = uploader_sheets()
+    rail = pd.concat([rail, rail.assign(end_point="Shanghai")], ignore_index=True)
+    rail["conversation_percents"] = 2
+
+    async with sqlite_db.session_context() as session:
+        await load_data(session, sea, rail, dropp, services, points, uploader_fields_config(), load_on_warnings=True)
+
+        # an empty cell turns the column into floats: only the edited route is changed
+        rail.loc[1, "conversation_percents"] = None
+        _, _, _, changes = await load_data(
+            session, sea, rail, dropp, services, points, uploader_fields_config(), load_on_warnings=True, diff=True,
+        )
+        assert changes["routes"] == DiffCounts(changed=1, unchanged=2)
+
+
+@pytest.mark.asyncio
+async def test_load_data_in_loading_pool(sqlite_db: Database):
+    pool = LoadingPool()
+    pool.init(1)
+    try:
+        with patch.object(processor, "get_loading_pool", return_value=pool):
+            async with sqlite_db.session_context() as session:
+                loaded, routes_count, warnings, changes = await load_data(
+                    session, *uploader_sheets(), uploader_fields_config(), load_on_warnings=True,
+                )
+    finally:
+        pool.close()
+
+    assert loaded
+    assert routes_count == 2
+    assert changes["routes"] == DiffCounts(inserted=2)
+    assert [(type(error), i, route_type) for error, i, route_type in warnings] == [
+        (NoPriceInRouteException, 1, RouteType.SEA),
+        (PointNotFoundException, 2, RouteType.SEA),
+        (InvalidDroppRow, 1, None),
+    ]
+    assert warnings[1][0].error_key == "atlantis"
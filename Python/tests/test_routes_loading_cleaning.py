@@ -0,0 +1,99 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from backend_admin.service.routes_loading.helpers import (
+    clean_numeric_strings,
+    none_filter,
+    parse_dates,
+    parse_prices,
+    strip_strings,
+)
+from backend_admin.service.routes_loading.processor import process_conversion_percents
+
+
+def test_parse_dates_supported_formats():
+    series = pd.Series([
+        "2026-01-31",
+        "01-Jan-26",
+        "01-Mаr-26",  # Cyrillic "а"
+        "15-Dec-99",
+        "31.1.2026",
+        " 31 . 01 . 2026 ",
+        "18.дек",
+        "18.Dec",
+        datetime.datetime(2026, 2, 1, 10, 30),
+    ], dtype=object)
+
+    parsed = parse_dates(series)
+
+    this_year = datetime.date.today().year
+    assert [d.date() for d in parsed] == [
+        datetime.date(2026, 1, 31),
+        datetime.date(2026, 1, 1),
+        datetime.date(2026, 3, 1),
+        datetime.date(1999, 12, 15),
+        datetime.date(2026, 1, 31),
+        datetime.date(2026, 1, 31),
+        datetime.date(this_year, 12, 18),
+        datetime.date(this_year, 12, 18),
+        datetime.date(2026, 2, 1),
+    ]
+
+
+def test_parse_dates_unsupported_values_are_nat():
+    series = pd.Series(["", None, np.nan, "2026", "01-Foo-26", "45.01.2026", "tomorrow", 0], dtype=object)
+
+    assert parse_dates(series).isna().all()
+
+
+def test_parse_prices():
+    series = pd.Series(["1 000$", "2\xa0500", "-", "/", "", None, 300, 12.5], dtype=object)
+
+    prices = parse_prices(series)
+
+    assert prices.tolist()[:2] == [1000.0, 2500.0]
+    assert prices[2:6].isna().all()
+    assert prices.tolist()[6:] == [300.0, 12.5]
+
+
+def test_parse_prices_rejects_text():
+    with pytest.raises(ValueError, match="could not convert string to float: 'on request'"):
+        parse_prices(pd.Series(["100", "on request"], dtype=object))
+
+
+def test_string_filters():
+    series = pd.Series([" Moscow ", "", "   ", None, 0], dtype=object)
+
+    stripped = strip_strings(series)
+    assert stripped[0] == "Moscow"
+    assert stripped[2] == ""
+    assert stripped[[1, 3, 4]].isna().all()
+    assert none_filter(series)[[1, 3, 4]].isna().all()
+    assert none_filter(series)[2] == "   "
+
+
+def test_clean_numeric_strings_keeps_numbers():
+    series = pd.Series(["5 %", "$100", 7, 0.5, None], dtype=object)
+
+    assert clean_numeric_strings(series).tolist()[:4] == ["5", "100", 7, 0.5]
+
+    # edited cells of a sheet: a column of object dtype without strings
+    series = pd.Series([0, None, 100], dtype=object)
+    assert clean_numeric_strings(series).tolist() == [0, None, 100]
+
+
+def test_process_conversion_percents():
+    fields_config = type("FieldsConfig", (), {"conversation_percents": "conv"})()
+
+    df = pd.DataFrame({"conv": pd.Series([" 5  % ", 0.05, 3, None], dtype=object)})
+    percents = process_conversion_percents(df, fields_config)["conv"].tolist()
+    assert percents[:3] == ["5", 5.0, 3]
+
+    df = pd.DataFrame({"conv": [0.05, 0.1]})
+    assert process_conversion_percents(df, fields_config)["conv"].tolist() == [5.0, 10.0]
+
+    # whole numbers don't depend on the dtype of the column: an empty cell makes it float
+    df = pd.DataFrame({"conv": [2, None, 0.05]})
+    assert process_conversion_percents(df, fields_config)["conv"].tolist()[::2] == [2, 5.0]
@@ -0,0 +1,190 @@
+import asyncio
+import io
+import os
+import tempfile
+import time
+from fnmatch import fnmatch
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+import pytest
+from backend_admin.service.routes_loading import jobs
+from backend_admin.service.routes_loading.jobs import (
+    UploadIsRunning,
+    UploadJob,
+    create_upload_job,
+    get_upload_job,
+    remove_expired_upload_files,
+    run_upload_job,
+    run_upload_worker,
+    save_upload_file,
+    save_upload_job,
+    upload_lock,
+)
+from backend_admin.service.routes_loading.stages import StageTimer
+
+
+class _FakeLock:
+    def __init__(self, redis, name, blocking):
+        self.redis = redis
+        self.name = name
+        self.blocking = blocking
+
+    async def acquire(self):
+        while self.name in self.redis.locks:
+            if not self.blocking:
+                return False
+            await asyncio.sleep(0.01)
+        self.redis.locks.add(self.name)
+        return True
+
+    async def reacquire(self):
+        return True
+
+    async def release(self):
+        self.redis.locks.discard(self.name)
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.lists = {}
+        self.locks = set()
+        self.saved_stages = []
+
+    def lock(self, name, timeout=None, blocking=True):
+        return _FakeLock(self, name, blocking)
+
+    async def scan_iter(self, match):
+        for key in list(self.values):
+            if fnmatch(key, match):
+                yield key
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):  # noqa: A003
+        self.values[key] = value
+        self.saved_stages.append(UploadJob.model_validate_json(value).stage)
+
+    async def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+    async def blpop(self, keys, timeout=0):
+        for key in keys:
+            if self.lists.get(key):
+                return key, self.lists[key].pop(0)
+        await asyncio.sleep(0.01)
+        return None
+
+
+@pytest.fixture
+def fake_redis():
+    redis = _FakeRedis()
+    with patch.object(jobs, "get_redis", return_value=redis):
+        yield redis
+
+
+async def _process(job: UploadJob, stages: StageTimer):
+    async with stages.stage("download"):
+        pass
+    async with stages.stage("write"):
+        pass
+    return {"routesInsertedCount": str(job.params["rows"])}
+
+
+@pytest.mark.asyncio
+async def test_run_upload_job_saves_stages_and_result(fake_redis: _FakeRedis):
+    job = await create_upload_job({"rows": 3})
+    assert fake_redis.lists[jobs.UPLOAD_JOBS_QUEUE] == [job.id]
+
+    await run_upload_job(job, _process)
+
+    saved = await get_upload_job(job.id)
+    assert saved.status == "done"
+    assert saved.result == {"routesInsertedCount": "3"}
+    assert set(saved.timings) == {"download", "write"}
+    assert saved.finished_at is not None
+    assert "download" in fake_redis.saved_stages and "write" in fake_redis.saved_stages
+
+
+@pytest.mark.asyncio
+async def test_run_upload_job_saves_errors(fake_redis: _FakeRedis):
+    async def process(job, stages):
+        async with stages.stage("clean"):
+            raise HTTPException(status_code=400, detail={"error": "bad sheet"})
+
+    job = await create_upload_job({})
+    await run_upload_job(job, process)
+
+    saved = await get_upload_job(job.id)
+    assert saved.status == "failed"
+    assert saved.stage == "clean"
+    assert set(saved.timings) == {"clean"}
+    assert saved.error == {"status_code": 400, "detail": {"error": "bad sheet"}}
+
+
+@pytest.mark.asyncio
+async def test_upload_worker_runs_queued_jobs(fake_redis: _FakeRedis):
+    first = await create_upload_job({"rows": 1})
+    second = await create_upload_job({"rows": 2})
+
+    worker = asyncio.create_task(run_upload_worker(_process, poll_timeout=0))
+    try:
+        for _ in range(100):
+            if (await get_upload_job(second.id)).is_finished:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        worker.cancel()
+
+    assert (await get_upload_job(first.id)).result == {"routesInsertedCount": "1"}
+    assert (await get_upload_job(second.id)).result == {"routesInsertedCount": "2"}
+
+
+@pytest.mark.asyncio
+async def test_upload_lock_is_exclusive(fake_redis: _FakeRedis):
+    async with upload_lock():
+        with pytest.raises(UploadIsRunning):
+            async with upload_lock(blocking=False):
+                pass
+
+    async with upload_lock(blocking=False):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_upload_worker_fails_interrupted_jobs(fake_redis: _FakeRedis):
+    interrupted = await create_upload_job({"rows": 1})
+    fake_redis.lists[jobs.UPLOAD_JOBS_QUEUE].clear()
+    interrupted.status = "running"
+    await save_upload_job(interrupted)
+    queued = await create_upload_job({"rows": 2})
+
+    worker = asyncio.create_task(run_upload_worker(_process, poll_timeout=0))
+    try:
+        for _ in range(100):
+            if (await get_upload_job(queued.id)).is_finished:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        worker.cancel()
+
+    interrupted = await get_upload_job(interrupted.id)
+    assert interrupted.status == "failed"
+    assert interrupted.error["type"] == "Interrupted"
+    assert (await get_upload_job(queued.id)).status == "done"
+    assert fake_redis.locks == set()
+
+
+def test_remove_expired_upload_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    expired = save_upload_file(io.BytesIO(b"expired"))
+    fresh = save_upload_file(io.BytesIO(b"fresh"))
+    expired_at = time.time() - jobs.UPLOAD_JOB_TTL - 1
+    os.utime(expired, (expired_at, expired_at))
+
+    remove_expired_upload_files()
+
+    assert os.listdir(tmp_path) == [os.path.basename(fresh)]
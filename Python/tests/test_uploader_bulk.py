@@ -0,0 +1,207 @@
+import datetime
+
+import pandas as pd
+import pytest
+from backend_admin.service.routes_loading.uploader import load_dropp, load_points, load_routes
+from module_data_internal.schemas import (
+    ContainerOwner,
+    ContainerShipmentTerms,
+    ContainerTransferTerms,
+    DropModel,
+    PointModel,
+    PriceModel,
+    RouteCombinationModel,
+    RouteModel,
+    RouteType,
+    ServicePriceModel,
+)
+from module_data_internal.schemas.fingerprint import make_fingerprint
+from module_shared.database import Database
+from sqlalchemy import func, select
+
+from .data import (
+    CompanyFactory,
+    ContainerFactory,
+    PointFactory,
+    ServiceFactory,
+)
+
+
+async def _count(session, model) -> int:
+    return (await session.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+async def _setup(session):
+    company = CompanyFactory(name="RailCo")
+    moscow = PointFactory(city="Moscow", country="RU", RU_city="Москва")
+    vladivostok = PointFactory(city="Vladivostok", country="RU", RU_city="Владивосток")
+    container = ContainerFactory()
+    service = ServiceFactory()
+    session.add_all([company, moscow, vladivostok, container, service])
+    await session.commit()
+    return company, moscow, vladivostok, container, service
+
+
+def _with_fingerprints(df: pd.DataFrame, model) -> pd.DataFrame:
+    return df.assign(fingerprint=[make_fingerprint(row) for row in df[list(model.uid)].itertuples(index=False)])
+
+
+def _routes(company, start, end, container, service, routes: list[dict]):
+    """Rows of routes with a price and a service price per route"""
+    base = {
+        "type": RouteType.RAIL,
+        "company_id": company.id,
+        "start_point_id": start.id,
+        "end_point_id": end.id,
+        "dropp_off_point_id": None,
+        "effective_from": datetime.datetime(2024, 1, 1),
+        "effective_to": datetime.datetime(2025, 12, 31),
+        "comment": None,
+        "timetable": None,
+        "container_transfer_terms": ContainerTransferTerms.FILO,
+        "container_shipment_terms": ContainerShipmentTerms.FOR,
+        "container_owner": ContainerOwner.COC,
+        "is_through": False,
+    }
+    prices = pd.DataFrame([{
+        "route": i, "container_id": container.id, "value": 1000.0, "currency": "USD", "conversation_percents": 0,
+    } for i in range(len(routes))])
+    service_prices = pd.DataFrame([{
+        "route": i, "service_id": service.id, "container_id": None, "currency": "USD", "price": 100.0,
+    } for i in range(len(routes))])
+    routes_df = pd.DataFrame([{**base, **route} for route in routes])
+    return _with_fingerprints(routes_df, RouteModel), prices, service_prices
+
+
+@pytest.mark.asyncio
+async def test_load_routes_writes_routes_prices_and_services(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        company, moscow, vladivostok, container, service = await _setup(session)
+
+        await load_routes(session, *_routes(company, moscow, vladivostok, container, service, [
+            {},
+            {"start_point_id": vladivostok.id, "end_point_id": moscow.id},
+            # the same fingerprint as the first one
+            {"comment": "duplicate"},
+        ]))
+
+        assert await _count(session, RouteModel) == 2
+        assert await _count(session, PriceModel) == 2
+        assert await _count(session, ServicePriceModel) == 2
+
+        route = (await session.execute(
+            select(RouteModel).where(RouteModel.start_point_id == moscow.id)
+        )).scalar_one()
+        assert route.comment is None
+        assert route.company_id == company.id
+        price = (await session.execute(select(PriceModel).where(PriceModel.route_id == route.id))).scalar_one()
+        assert price.container_id == container.id
+        assert price.value == 1000.0
+
+
+@pytest.mark.asyncio
+async def test_load_routes_skips_loaded_routes(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        company, moscow, vladivostok, container, service = await _setup(session)
+
+        await load_routes(session, *_routes(company, moscow, vladivostok, container, service, [{}]))
+        await load_routes(session, *_routes(company, moscow, vladivostok, container, service, [
+            {},
+            {"is_through": True},
+        ]))
+
+        assert await _count(session, RouteModel) == 2
+        assert await _count(session, PriceModel) == 2
+        assert await _count(session, ServicePriceModel) == 2
+
+
+@pytest.mark.asyncio
+async def test_load_routes_skips_routes_created_by_hand(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        company, moscow, vladivostok, container, service = await _setup(session)
+        routes, prices, service_prices = _routes(company, moscow, vladivostok, container, service, [{}])
+
+        route = RouteModel(**routes.drop(columns="fingerprint").iloc[0].to_dict())
+        route.effective_from = datetime.date(2024, 1, 1)
+        session.add(route)
+        await session.commit()
+        assert route.fingerprint == routes["fingerprint"][0]
+
+        counts = await load_routes(session, routes, prices, service_prices)
+
+        assert (counts.inserted, counts.unchanged) == (0, 1)
+        assert await _count(session, RouteModel) == 1
+
+
+@pytest.mark.asyncio
+async def test_load_dropp_skips_loaded_dropp(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        company, moscow, vladivostok, container, _ = await _setup(session)
+
+        def dropp(*prices):
+            return _with_fingerprints(pd.DataFrame([{
+                "start_point_id": moscow.id,
+                "end_point_id": vladivostok.id,
+                "company_id": company.id,
+                "container_id": container.id,
+                "effective_from": datetime.datetime(2024, 1, 1),
+                "effective_to": datetime.datetime(2025, 12, 31),
+                "conversation_percents": 0,
+                "currency": "USD",
+                "price": price,
+            } for price in prices]), DropModel)
+
+        await load_dropp(session, dropp(500.0, 600.0))
+        await load_dropp(session, dropp(700.0))
+
+        assert (await session.execute(select(DropModel.price))).scalars().all() == [500.0]
+
+
+@pytest.mark.asyncio
+async def test_load_routes_and_dropp_refresh_route_combinations(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        company, moscow, vladivostok, container, service = await _setup(session)
+        shanghai = PointFactory(city="Shanghai", country="CN", RU_city="Шанхай")
+        session.add(shanghai)
+        await session.commit()
+
+        await load_routes(session, *_routes(company, vladivostok, moscow, container, service, [
+            {"type": RouteType.SEA, "start_point_id": shanghai.id, "end_point_id": vladivostok.id},
+            {"type": RouteType.RAIL},
+        ]))
+        # sea+rail routes without a drop are not combined
+        assert await _count(session, RouteCombinationModel) == 0
+
+        await load_dropp(session, _with_fingerprints(pd.DataFrame([{
+            "start_point_id": vladivostok.id,
+            "end_point_id": moscow.id,
+            "company_id": company.id,
+            "container_id": container.id,
+            "effective_from": datetime.datetime(2024, 1, 1),
+            "effective_to": datetime.datetime(2025, 12, 31),
+            "conversation_percents": 0,
+            "currency": "USD",
+            "price": 500.0,
+        }]), DropModel))
+
+        combination = (await session.execute(select(RouteCombinationModel))).scalar_one()
+        assert (combination.start_point_id, combination.end_point_id) == (shanghai.id, moscow.id)
+        assert combination.drop_id == (await session.execute(select(DropModel.id))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_load_points_returns_point_of_every_row(sqlite_db: Database):
+    async with sqlite_db.session_context() as session:
+        await _setup(session)
+
+        df = pd.DataFrame([
+            {"city": "moscow", "country": "RU", "RU_city": "Москва", "RU_country": "Россия"},
+            {"city": "Beijing", "country": "CN", "RU_city": "Пекин", "RU_country": "Китай"},
+            {"city": "BEIJING", "country": "CN", "RU_city": "Пекин", "RU_country": "Китай"},
+        ])
+        points = await load_points(session, df)
+
+        assert [p.city for p in points] == ["Moscow", "Beijing", "Beijing"]
+        assert points[1] is points[2]
+        assert points[1].id is not None
+        assert await _count(session, PointModel) == 3
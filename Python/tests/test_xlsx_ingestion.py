@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from backend_admin.service.routes_loading.xlsx import read_workbook
+from openpyxl import Workbook
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    workbook = Workbook()
+    sea = workbook.active
+    sea.title = "SEA"
+    sea.append(["company", "price", "effective_from", "comment"])
+    sea.append(["SeaCo", 100.0, datetime(2025, 1, 1), "first"])
+    sea.append([])
+    sea.append(["OtherCo", 150.5, datetime(2025, 2, 1)])
+    sea.append(["ThirdCo", 200, datetime(2025, 3, 1), None])
+    sea.append(["FourthCo", 250, datetime(2025, 4, 1), "last"])
+
+    rail = workbook.create_sheet("RAIL")
+    rail.append(["company", "price"])
+    rail.append(["RailCo", 10])
+
+    path = tmp_path / "sheets.xlsx"
+    workbook.save(path)
+    return str(path)
+
+
+def test_read_workbook_like_pandas(workbook_path):
+    frames = read_workbook(workbook_path, ["SEA", "RAIL"])
+
+    for title in ("SEA", "RAIL"):
+        pd.testing.assert_frame_equal(frames[title], pd.read_excel(workbook_path, title))
+
+
+def test_read_workbook_infers_types_from_all_rows(tmp_path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "SEA"
+    sheet.append(["company", "price"])
+    for i in range(100):
+        sheet.append([f"Co{i}", i])
+    sheet.append(["LastCo", "on request"])
+    path = tmp_path / "mixed.xlsx"
+    workbook.save(path)
+
+    frames = read_workbook(str(path), ["SEA"])
+
+    pd.testing.assert_frame_equal(frames["SEA"], pd.read_excel(path, "SEA"))
+
+
+def test_read_workbook_from_file_object(workbook_path):
+    with open(workbook_path, "rb") as f:
+        frames = read_workbook(f, ["RAIL", "RAIL"])
+
+    assert list(frames) == ["RAIL"]
+    assert frames["RAIL"]["company"].tolist() == ["RailCo"]
+
+
+def test_read_workbook_missing_sheet(workbook_path):
+    with pytest.raises(ValueError, match="DROPP"):
+        read_workbook(workbook_path, ["SEA", "DROPP"])
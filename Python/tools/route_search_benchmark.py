@@ -0,0 +1,170 @@
+"""
+Cost of the SQL route search with ORM entities and with projected columns, per 1k found routes.
+
+A network of routes with prices, services and drops is written into an in-memory SQLite DB
+and the same pairs are searched by both paths; settings of the DB are only read from the env (.env).
+
+Usage (from the Python directory):
+    PYTHONPATH=apps python tools/route_search_benchmark.py --points 30 --repeat 5
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import logging
+import time
+from importlib.util import find_spec
+
+if find_spec("dotenv") is not None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+from module_data_internal.aggregators import routes as routes_aggregator
+from module_data_internal.route_combinations import mark_route_combinations_stale
+from module_data_internal.schemas import (
+    CompanyModel,
+    ContainerModel,
+    ContainerOwner,
+    ContainerType,
+    DropModel,
+    PointModel,
+    PriceModel,
+    RouteModel,
+    RouteType,
+    ServiceModel,
+    ServicePriceModel,
+)
+from module_shared.database import Base, Database, track_statement_cache
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+logger = logging.getLogger(__name__)
+
+DATE = datetime.date(2026, 6, 15)
+PERIODS = [(datetime.datetime(2026, month, 1), datetime.datetime(2026, 12, 31)) for month in (1, 3, 5)]
+
+
+async def seed(session, points_count: int) -> tuple[list[int], list[int]]:
+    """Routes of both types between all pairs of points, for several periods; ids of points and containers"""
+    companies = [CompanyModel(name=f"Company{i}") for i in range(3)]
+    points = [
+        PointModel(city=f"City{i}", country="CN", RU_city=f"Город{i}", RU_country="Китай")
+        for i in range(points_count)
+    ]
+    containers = [
+        ContainerModel(size=20, weight_from=0, weight_to=24, name="20DC", type=ContainerType.DC),
+        ContainerModel(size=40, weight_from=0, weight_to=28, name="40HC", type=ContainerType.HC),
+    ]
+    services = [
+        ServiceModel(
+            name=f"Service{i}", internal_name=f"service{i}", description="", mandatory=False, default=True,
+        )
+        for i in range(2)
+    ]
+    session.add_all([*companies, *points, *containers, *services])
+    await session.flush()
+
+    await session.execute(insert(RouteModel), [
+        {
+            "type": route_type,
+            "company_id": companies[i % len(companies)].id,
+            "start_point_id": start.id,
+            "end_point_id": end.id,
+            "effective_from": effective_from,
+            "effective_to": effective_to,
+            "container_transfer_terms": "FIFO",
+            "container_shipment_terms": "FOB",
+            "container_owner": ContainerOwner.SOC if i % 2 else ContainerOwner.COC,
+            "is_through": False,
+            "timetable": "weekly",
+        }
+        for i, (start, end) in enumerate(itertools.permutations(points, 2))
+        for route_type, (effective_from, effective_to) in itertools.product(RouteType, PERIODS)
+    ])
+    route_ids = (await session.execute(select(RouteModel.id))).scalars().all()
+
+    await session.execute(insert(PriceModel), [
+        {"route_id": route_id, "container_id": container.id, "value": 100 * container.size, "currency": "USD"}
+        for route_id in route_ids
+        for container in containers
+    ])
+    await session.execute(insert(ServicePriceModel), [
+        {"route_id": route_id, "service_id": service.id, "container_id": None, "currency": "USD", "price": 10}
+        for route_id in route_ids
+        for service in services
+    ])
+    await session.execute(insert(DropModel), [
+        {
+            "start_point_id": start.id, "end_point_id": end.id, "container_id": container.id,
+            "company_id": company.id, "effective_from": PERIODS[0][0], "effective_to": PERIODS[0][1],
+            "price": 50, "currency": "USD",
+        }
+        for start, end in itertools.permutations(points, 2)
+        for container in containers
+        for company in companies
+    ])
+    # rows are written by Core statements: combinations are rebuilt on the commit
+    mark_route_combinations_stale(session, everything=True)
+    await session.commit()
+
+    return [point.id for point in points], [container.id for container in containers]
+
+
+async def measure(search, pairs: list[tuple[int, int]], container_ids: list[int], repeat: int) -> tuple[float, int]:
+    """The best time of a search of the pairs and the number of found routes"""
+    best, found = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        grouped, is_complete = await search(DATE, pairs, container_ids, False)
+        best = min(best, time.perf_counter() - start)
+        assert is_complete
+        found = sum(len(routes) for routes in grouped.values())
+    return best, found
+
+
+async def run(points_count: int, repeat: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    db = Database()
+    db._engine = engine
+    db._sessionmaker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    routes_aggregator.get_database = lambda: db
+    stats = track_statement_cache(engine.sync_engine)
+
+    async with db.session_context() as session:
+        point_ids, container_ids = await seed(session, points_count)
+
+    # searches of the API: from a few origins to a few destinations
+    pairs = list(itertools.product(point_ids[:5], point_ids[-5:]))
+    for name, search in [
+        ("ORM", routes_aggregator._search_paths),
+        ("Core", routes_aggregator._search_paths_projected),
+    ]:
+        hits, misses = stats.hits, stats.misses
+        duration, found = await measure(search, pairs, container_ids, repeat)
+        logger.info(
+            "%5s: %8.1fms for %d routes, %6.1fms per 1k routes; compiled statements: %d reused, %d compiled",
+            name, duration * 1000, found, duration * 1e6 / found, stats.hits - hits, stats.misses - misses,
+        )
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=30, help="points of the network")
+    parser.add_argument("--repeat", type=int, default=5, help="searches by each path, the best one is shown")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(run(args.points, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
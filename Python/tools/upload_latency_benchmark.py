@@ -0,0 +1,197 @@
+"""
+Latency of the admin event loop during an upload, with CPU-bound stages in threads and in the loading pool.
+
+Every request of the admin API is served by the same event loop as uploads, so the delay of a periodic timer
+on the loop is the least delay of a request (a health check, a data browser page) made during the upload.
+Synthetic sheets are loaded into an in-memory SQLite DB; settings of the DB are only read from the env (.env).
+
+Usage (from the Python directory):
+    PYTHONPATH=apps python tools/upload_latency_benchmark.py --rows 50000 --processes 2
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from importlib.util import find_spec
+
+if find_spec("dotenv") is not None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+import pandas as pd
+from backend_admin.models.upoader_fields_config import UploaderFieldsConfig
+from backend_admin.service.routes_loading import processor, uploader
+from backend_admin.service.routes_loading.pool import LoadingPool
+from backend_admin.service.routes_loading.stages import StageTimer
+from module_shared.database import Base
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+logger = logging.getLogger(__name__)
+
+PROBE_INTERVAL = 0.01
+
+
+async def _skip_data_version(*_):
+    pass
+
+
+# data versions are kept in Redis, which is not used by the benchmark
+uploader.bump_data_version = _skip_data_version
+
+
+def fields_config() -> UploaderFieldsConfig:
+    fields = {
+        name: name
+        for name, field in UploaderFieldsConfig.model_fields.items()
+        if field.annotation is str and field.is_required()
+    }
+    fields["dthc"] = "DTHC # terminal handling"
+    fields["guard20_24"] = "GUARD # guard"
+    return UploaderFieldsConfig(**fields)
+
+
+def sheets(rows: int):
+    cities = [f"City{i}" for i in range(200)]
+    points = pd.DataFrame([
+        {"city": city, "country": "CN", "RU_city": f"Город{i}", "RU_country": "Китай"}
+        for i, city in enumerate(cities)
+    ])
+    services = pd.DataFrame([
+        {"column_name": "DTHC", "service_name": "DTHC", "description": None, "including": None},
+        {"column_name": "GUARD", "service_name": "Guard", "description": None, "including": 1},
+    ])
+    route = {
+        "dropp_off_point": None,
+        "terminal": None,
+        "container_transfer_terms": None,
+        "container_shipment_terms": None,
+        "container_condition": None,
+        "comment": None,
+        "timetable": "weekly",
+        "is_through": None,
+        "conversation_percents": "2",
+    }
+    sea = pd.DataFrame([
+        {
+            **route,
+            "start_point": cities[i % len(cities)],
+            "end_point": cities[(i * 7 + 1) % len(cities)],
+            "terminal": "VMTP" if i % 10 == 0 else None,
+            "company": f"COMPANY{i % 20}",
+            "effective_from": f"{1 + i % 28:02}.01.2026",
+            "effective_to": "31.12.2026",
+            "sea_20dc": 1000 + i % 500,
+            "sea_20dc_currency": None,
+            "sea_40hc": "2 000",
+            "sea_40hc_currency": "eur",
+            "DTHC # terminal handling": 50,
+            "dthc_currency": None,
+        }
+        for i in range(rows)
+    ])
+    rail = pd.DataFrame([
+        {
+            **route,
+            "start_point": cities[(i * 3 + 2) % len(cities)],
+            "end_point": cities[i % len(cities)],
+            "terminal": "VMTP" if i % 10 == 0 else None,
+            "company": f"RAILCO{i % 10}",
+            "effective_from": f"{1 + i % 28:02}.01.2026",
+            "effective_to": "31.12.2026",
+            "rail_20dc24t": 300 + i % 100,
+            "rail_20dc24t_currency": None,
+            "rail_20dc28t": None,
+            "rail_20dc28t_currency": None,
+            "rail_40hc": 500,
+            "rail_40hc_currency": None,
+            "GUARD # guard": 10,
+            "guard20_24_currency": "руб",
+        }
+        for i in range(rows // 5)
+    ])
+    dropp = pd.DataFrame([
+        {"start_point": cities[i % len(cities)], "end_point": cities[(i + 1) % len(cities)], "terminal": None,
+         "company": f"COMPANY{i % 20}", "effective_from": "01.01.2026", "effective_to": "31.12.2026",
+         "container_condition": None, "conversation_percents": None, "drop20": 70, "drop40": 90}
+        for i in range(rows // 10)
+    ])
+    return sea, rail, dropp, services, points
+
+
+async def probe_loop(lags: dict[str, list[float]], stages: StageTimer, stop: asyncio.Event):
+    """Delays of a timer on the event loop by stages of the upload"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        stage = stages.current
+        start = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.setdefault(stage or "-", []).append((loop.time() - start - PROBE_INTERVAL) * 1000)
+
+
+def _percentile(values: list[float], share: float) -> float:
+    return sorted(values)[int((len(values) - 1) * share)]
+
+
+async def run(rows: int, processes: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    pool = LoadingPool()
+    pool.init(processes)
+    processor.get_loading_pool = lambda: pool
+    # workers of a running server are already started
+    await asyncio.gather(*(pool.run(processor.prepare_data, *sheets(10), fields_config()) for _ in range(processes)))
+
+    lags: dict[str, list[float]] = {}
+    stages = StageTimer()
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop(lags, stages, stop))
+
+    start = time.perf_counter()
+    async with sessionmaker() as session:
+        _, routes_count, warnings, _ = await processor.load_data(
+            session, *sheets(rows), fields_config(), stages=stages,
+        )
+    duration = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    pool.close()
+    await engine.dispose()
+
+    logger.info(
+        "%s: upload %.2fs (%d routes, %d warnings)",
+        "threads" if processes <= 0 else f"{processes} processes", duration, routes_count, len(warnings),
+    )
+    for stage, stage_lags in [("all", [lag for values in lags.values() for lag in values]), *lags.items()]:
+        logger.info(
+            "  %15s (%6.2fs): loop delay p50 %6.1fms, p95 %6.1fms, max %6.1fms",
+            stage,
+            stages.timings.get(stage, duration),
+            statistics.median(stage_lags),
+            _percentile(stage_lags, 0.95),
+            max(stage_lags),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000, help="rows of the sea sheet")
+    parser.add_argument("--processes", type=int, default=2, help="processes of the loading pool")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(run(args.rows, 0))
+    asyncio.run(run(args.rows, args.processes))
+
+
+if __name__ == "__main__":
+    main()